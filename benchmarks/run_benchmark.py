@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+
+"""
+Offline benchmark suite for the session, role assumption and client creation
+paths of ``which_bsm``.
+
+Everything runs without network access: the AWS CLI profiles are written to
+a temporary ``AWS_CONFIG_FILE``, and the ``sts:AssumeRole`` calls are answered
+in-process by :class:`which_bsm.local_sts.LocalSts` with a configurable latency.
+
+Usage::
+
+    python benchmarks/run_benchmark.py
+    python benchmarks/run_benchmark.py --n 200 --fanout 3,12 --sts-latency 0.05
+    python benchmarks/run_benchmark.py --output after.json --compare before.json
+
+Each scenario reports p50 / p95 / p99 (in milliseconds), and the results are
+written as JSON to ``benchmarks/results/`` so two runs can be compared.
+"""
+
+import typing as T
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+
+dir_here = Path(__file__).absolute().parent
+dir_project_root = dir_here.parent
+sys.path.insert(0, str(dir_project_root))
+
+from which_bsm._version import __version__
+from which_bsm.api import BaseBotoSesEnum
+from which_bsm.local_sts import LocalSts
+from which_bsm.paths import dir_benchmark_results
+
+AWS_REGION = "us-east-1"
+
+
+# ------------------------------------------------------------------------------
+# Statistics
+# ------------------------------------------------------------------------------
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Linear interpolation percentile of a sorted list, ``q`` is in [0, 100].
+    """
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (
+        rank - low
+    )
+
+
+def summarize(durations: list[float]) -> dict[str, float]:
+    values = sorted(d * 1000 for d in durations)
+    return {
+        "n": len(values),
+        "min_ms": values[0],
+        "mean_ms": sum(values) / len(values),
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1],
+    }
+
+
+def measure(
+    func: T.Callable[[T.Any], T.Any],
+    n: int,
+    setup: T.Callable[[], T.Any] = lambda: None,
+) -> list[float]:
+    """
+    Call ``func(setup())`` n times, only the ``func`` call is timed.
+    """
+    durations = list()
+    for _ in range(n):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+# ------------------------------------------------------------------------------
+# Offline AWS environment
+# ------------------------------------------------------------------------------
+def make_env_names(n: int) -> list[str]:
+    return [f"env{i}" for i in range(1, n + 1)]
+
+
+@contextlib.contextmanager
+def offline_aws_environment(env_names: list[str]):
+    """
+    Write fake AWS CLI profiles and ``*_AWS_ACCOUNT_ID`` environment variables
+    for the given environments, restore ``os.environ`` on exit.
+    """
+    backup = dict(os.environ)
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        dir_tmp = Path(dir_tmp)
+        lines_config, lines_credentials = [], []
+        for env_name in ["devops", *env_names]:
+            lines_config.append(f"[profile {env_name}]\nregion = {AWS_REGION}\n")
+            lines_credentials.append(
+                f"[{env_name}]\n"
+                f"aws_access_key_id = AKIA{env_name.upper()}\n"
+                f"aws_secret_access_key = secret\n"
+            )
+        (dir_tmp / "config").write_text("\n".join(lines_config))
+        (dir_tmp / "credentials").write_text("\n".join(lines_credentials))
+        for key in list(os.environ):
+            if key.startswith("AWS_"):
+                os.environ.pop(key)
+        os.environ["AWS_CONFIG_FILE"] = str(dir_tmp / "config")
+        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = str(dir_tmp / "credentials")
+        os.environ["AWS_ACCESS_KEY_ID"] = "AKIADEVOPS"
+        os.environ["AWS_SECRET_ACCESS_KEY"] = "secret"
+        for i, env_name in enumerate(env_names, start=1):
+            os.environ[f"{env_name.upper()}_AWS_ACCOUNT_ID"] = f"{i:012d}"
+        try:
+            yield dir_tmp
+        finally:
+            os.environ.clear()
+            os.environ.update(backup)
+
+
+def new_boto_ses_enum(
+    env_names: list[str],
+    is_ci: bool,
+    sts_latency: float = 0.0,
+) -> BaseBotoSesEnum:
+    all_env_names = ["devops", *env_names]
+    return BaseBotoSesEnum(
+        env_to_aws_profile_mapper={env_name: env_name for env_name in all_env_names},
+        env_to_aws_region_mapper={env_name: AWS_REGION for env_name in all_env_names},
+        default_app_env_name=env_names[0],
+        devops_env_name="devops",
+        workload_role_name_prefix_in_ci="bench_",
+        workload_role_name_suffix_in_ci="_deployer",
+        is_local_runtime_group=not is_ci,
+        is_ci_runtime_group=is_ci,
+        is_local=not is_ci,
+        is_cloud9=False,
+        is_ec2=False,
+        is_lambda=False,
+        is_batch=False,
+        is_ecs=False,
+        is_glue=False,
+        sts_stand_in=LocalSts(latency=sts_latency),
+    )
+
+
+# ------------------------------------------------------------------------------
+# Scenarios
+# ------------------------------------------------------------------------------
+def bench_cold_import(n: int) -> list[float]:
+    code = (
+        "import time; start = time.perf_counter(); import which_bsm.api; "
+        "print(time.perf_counter() - start)"
+    )
+    durations = list()
+    for _ in range(n):
+        res = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=str(dir_project_root),
+        )
+        durations.append(float(res.stdout.strip()))
+    return durations
+
+
+def run_benchmarks(
+    n: int,
+    n_import: int,
+    fanout: list[int],
+    sts_latency: float,
+) -> dict[str, dict[str, float]]:
+    results = dict()
+    results["cold_import"] = summarize(bench_cold_import(n_import))
+
+    env_names = make_env_names(max([3, *fanout]))
+    with offline_aws_environment(env_names):
+        results["construct"] = summarize(
+            measure(lambda _: new_boto_ses_enum(env_names[:3], is_ci=False), n)
+        )
+        results["get_env_bsm_local"] = summarize(
+            measure(
+                lambda bse: bse.get_env_bsm(env_names[0]).boto_ses,
+                n,
+                setup=lambda: new_boto_ses_enum(env_names[:3], is_ci=False),
+            )
+        )
+        results["get_env_bsm_ci"] = summarize(
+            measure(
+                lambda bse: bse.get_env_bsm(env_names[0]),
+                n,
+                setup=lambda: new_boto_ses_enum(
+                    env_names[:3], is_ci=True, sts_latency=sts_latency
+                ),
+            )
+        )
+        results["get_env_bsm_cached"] = summarize(
+            measure(
+                lambda bse: bse.get_env_bsm(env_names[0]),
+                n,
+                setup=_cached_setup(env_names[:3]),
+            )
+        )
+        for n_env in fanout:
+            for mode, prefetch in [("serial", False), ("parallel", True)]:
+
+                def run(bse, prefetch=prefetch, n_env=n_env):
+                    if prefetch:
+                        bse.prefetch(env_names[:n_env])
+                    else:
+                        for env_name in env_names[:n_env]:
+                            bse.get_env_bsm(env_name)
+
+                results[f"fanout_{n_env}_ci_{mode}"] = summarize(
+                    measure(
+                        run,
+                        max(1, n // 10),
+                        setup=lambda n_env=n_env: new_boto_ses_enum(
+                            env_names[:n_env], is_ci=True, sts_latency=sts_latency
+                        ),
+                    )
+                )
+
+        def setup_client():
+            bse = new_boto_ses_enum(env_names[:3], is_ci=False)
+            bse.get_env_bsm(env_names[0]).boto_ses
+            return bse
+
+        results["client_create"] = summarize(
+            measure(lambda bse: bse.get_client(env_names[0], "s3"), n, setup_client)
+        )
+        results["client_pooled"] = summarize(
+            measure(
+                lambda bse: bse.get_client(env_names[0], "s3"),
+                n,
+                setup=_pooled_client_setup(env_names[:3]),
+            )
+        )
+    return results
+
+
+def _cached_setup(env_names: list[str]):
+    bse = new_boto_ses_enum(env_names, is_ci=False)
+    bse.get_env_bsm(env_names[0])
+    return lambda: bse
+
+
+def _pooled_client_setup(env_names: list[str]):
+    bse = new_boto_ses_enum(env_names, is_ci=False)
+    bse.get_client(env_names[0], "s3")
+    return lambda: bse
+
+
+# ------------------------------------------------------------------------------
+# Report
+# ------------------------------------------------------------------------------
+def print_report(
+    results: dict[str, dict[str, float]],
+    baseline: T.Optional[dict[str, dict[str, float]]] = None,
+):
+    header = f"{'scenario':<32} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"
+    if baseline:
+        header += f" {'p50 vs baseline':>16}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in results.items():
+        line = (
+            f"{name:<32} {stats['p50_ms']:>10.3f} "
+            f"{stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f}"
+        )
+        if baseline and name in baseline:
+            before = baseline[name]["p50_ms"]
+            if before:
+                line += f" {(stats['p50_ms'] - before) / before * 100:>+15.1f}%"
+        print(line)
+
+
+def main(args: T.Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n", type=int, default=100, help="iterations per scenario")
+    parser.add_argument(
+        "--n-import", type=int, default=10, help="iterations of the cold import"
+    )
+    parser.add_argument(
+        "--fanout",
+        default="3,12",
+        help="comma separated number of environments for the fan-out scenarios",
+    )
+    parser.add_argument(
+        "--sts-latency",
+        type=float,
+        default=0.02,
+        help="simulated sts:AssumeRole latency in seconds",
+    )
+    parser.add_argument("--output", help="the JSON result file path")
+    parser.add_argument("--compare", help="a previous JSON result file to compare")
+    ns = parser.parse_args(args)
+
+    results = run_benchmarks(
+        n=ns.n,
+        n_import=ns.n_import,
+        fanout=[int(x) for x in ns.fanout.split(",") if x],
+        sts_latency=ns.sts_latency,
+    )
+    data = {
+        "meta": {
+            "which_bsm": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "n": ns.n,
+            "sts_latency": ns.sts_latency,
+        },
+        "results": results,
+    }
+    if ns.output:
+        path_output = Path(ns.output)
+    else:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path_output = dir_benchmark_results / f"{timestamp}.json"
+    path_output.parent.mkdir(parents=True, exist_ok=True)
+    path_output.write_text(json.dumps(data, indent=4))
+
+    baseline = None
+    if ns.compare:
+        baseline = json.loads(Path(ns.compare).read_text())["results"]
+    print_report(results, baseline)
+    print(f"\nresults are written to {path_output}")
+    return data
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory benchmark of the shared botocore loader.
+
+Each variant runs in a fresh interpreter: it creates the boto session managers
+of N environments and one client per environment and service, then reports
+the memory allocated (``tracemalloc``), the resident set size growth and the
+time spent creating the clients. The ``shared`` variant uses the default
+``share_botocore_loader=True``, the ``unshared`` one gives every session its
+own botocore loader.
+
+Usage::
+
+    python benchmarks/run_memory_benchmark.py
+    python benchmarks/run_memory_benchmark.py --n-env 12 --services s3,dynamodb,sqs,sts
+"""
+
+import typing as T
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from datetime import datetime, timezone
+
+dir_here = Path(__file__).absolute().parent
+dir_project_root = dir_here.parent
+sys.path.insert(0, str(dir_project_root))
+
+from which_bsm._version import __version__
+from which_bsm.paths import dir_benchmark_results
+
+VARIANTS = ["unshared", "shared"]
+
+
+def get_rss_mb() -> float:
+    """
+    Get the current resident set size in MB, 0 if not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):  # pragma: no cover
+        return 0.0
+    import resource
+
+    return pages * resource.getpagesize() / 1024 / 1024
+
+
+def run_variant(variant: str, n_env: int, services: list[str]) -> dict[str, float]:
+    """
+    Run one variant in the current interpreter.
+    """
+    import tracemalloc
+
+    # import the AWS SDK first, only the session and client memory is measured
+    import boto3  # noqa: F401
+    from run_benchmark import make_env_names, offline_aws_environment, new_boto_ses_enum
+
+    env_names = make_env_names(n_env)
+    with offline_aws_environment(env_names):
+        bse = new_boto_ses_enum(env_names, is_ci=False)
+        bse.share_botocore_loader = variant == "shared"
+        rss_before = get_rss_mb()
+        tracemalloc.start()
+        start = time.perf_counter()
+        for env_name in env_names:
+            for service_name in services:
+                bse.get_client(env_name, service_name)
+        duration = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = get_rss_mb()
+    return {
+        "n_client": len(env_names) * len(services),
+        "client_create_s": duration,
+        "traced_current_mb": current / 1024 / 1024,
+        "traced_peak_mb": peak / 1024 / 1024,
+        "rss_growth_mb": rss_after - rss_before,
+    }
+
+
+def run_benchmarks(n_env: int, services: list[str]) -> dict[str, dict[str, float]]:
+    results = dict()
+    for variant in VARIANTS:
+        res = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                variant,
+                "--n-env",
+                str(n_env),
+                "--services",
+                ",".join(services),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=str(dir_here),
+        )
+        results[variant] = json.loads(res.stdout.strip().splitlines()[-1])
+    return results
+
+
+def print_report(results: dict[str, dict[str, float]]):
+    metrics = [
+        "client_create_s",
+        "traced_current_mb",
+        "traced_peak_mb",
+        "rss_growth_mb",
+    ]
+    header = f"{'metric':<20}" + "".join(f"{variant:>12}" for variant in VARIANTS)
+    header += f"{'saving':>12}"
+    print(header)
+    print("-" * len(header))
+    for metric in metrics:
+        before = results["unshared"][metric]
+        after = results["shared"][metric]
+        line = f"{metric:<20}" + "".join(
+            f"{results[variant][metric]:>12.2f}" for variant in VARIANTS
+        )
+        if before:
+            line += f"{(before - after) / before * 100:>11.1f}%"
+        print(line)
+
+
+def main(args: T.Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--n-env", type=int, default=12, help="number of environments")
+    parser.add_argument(
+        "--services",
+        default="s3,dynamodb,sqs,sts,lambda",
+        help="comma separated AWS service names, one client per environment",
+    )
+    parser.add_argument("--child", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="the JSON result file path")
+    ns = parser.parse_args(args)
+    services = [x for x in ns.services.split(",") if x]
+
+    if ns.child:
+        print(json.dumps(run_variant(ns.child, ns.n_env, services)))
+        return
+
+    results = run_benchmarks(ns.n_env, services)
+    data = {
+        "meta": {
+            "which_bsm": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "n_env": ns.n_env,
+            "services": services,
+        },
+        "results": results,
+    }
+    if ns.output:
+        path_output = Path(ns.output)
+    else:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path_output = dir_benchmark_results / f"memory-{timestamp}.json"
+    path_output.parent.mkdir(parents=True, exist_ok=True)
+    path_output.write_text(json.dumps(data, indent=4))
+    print_report(results)
+    print(f"\nresults are written to {path_output}")
+    return data
+
+
+if __name__ == "__main__":
+    main()
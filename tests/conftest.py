@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from which_bsm.impl import BaseBotoSesEnum
+from which_bsm.local_sts import LocalSts
+from which_bsm.runtime import RUNTIME_ENV_VAR, RUNTIME_FLAGS
+
+
+def _create_base_boto_ses_enum(
+    env_to_aws_profile_mapper=None,
+    env_to_aws_region_mapper=None,
+    default_app_env_name="dev",
+    devops_env_name="devops",
+    workload_role_name_prefix_in_ci="WorkloadRole-",
+    workload_role_name_suffix_in_ci="-Role",
+    is_local_runtime_group=True,
+    is_ci_runtime_group=False,
+    klass=BaseBotoSesEnum,
+    **kwargs,
+) -> BaseBotoSesEnum:
+    """Factory function to create BaseBotoSesEnum with sensible defaults."""
+    if env_to_aws_profile_mapper is None:
+        env_to_aws_profile_mapper = {"dev": "dev-profile", "prod": "prod-profile", "devops": "devops-profile"}
+
+    if env_to_aws_region_mapper is None:
+        env_to_aws_region_mapper = {"dev": "us-east-1", "prod": "us-west-2", "devops": "us-east-1"}
+
+    return klass(
+        env_to_aws_profile_mapper=env_to_aws_profile_mapper,
+        env_to_aws_region_mapper=env_to_aws_region_mapper,
+        default_app_env_name=default_app_env_name,
+        devops_env_name=devops_env_name,
+        workload_role_name_prefix_in_ci=workload_role_name_prefix_in_ci,
+        workload_role_name_suffix_in_ci=workload_role_name_suffix_in_ci,
+        is_local_runtime_group=is_local_runtime_group,
+        is_ci_runtime_group=is_ci_runtime_group,
+        is_local=True,
+        is_cloud9=False,
+        is_ec2=False,
+        is_lambda=False,
+        is_batch=False,
+        is_ecs=False,
+        is_glue=False,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def create_base_boto_ses_enum():
+    """The ``BaseBotoSesEnum`` factory, local runtime by default."""
+    return _create_base_boto_ses_enum
+
+
+@pytest.fixture
+def ci_environ(monkeypatch):
+    """The devops credentials and the account IDs of dev and prod in CI."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIADEVOPS")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "secret")
+    monkeypatch.delenv("AWS_SESSION_TOKEN", raising=False)
+    monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "123456789012")
+    monkeypatch.setenv("PROD_AWS_ACCOUNT_ID", "987654321098")
+
+
+@pytest.fixture
+def local_sts(ci_environ) -> LocalSts:
+    return LocalSts()
+
+
+@pytest.fixture
+def local_config(tmp_path, monkeypatch) -> str:
+    """
+    Write a config file with a ``dev`` AWS CLI profile, detect the local
+    runtime, and return the config file path.
+    """
+    path_config = tmp_path / "which_bsm.json"
+    path_config.write_text(
+        json.dumps(
+            {
+                "env_to_aws_profile_mapper": {"dev": "dev", "devops": "devops"},
+                "env_to_aws_region_mapper": {"dev": "us-east-1", "devops": "us-east-1"},
+                "default_app_env_name": "dev",
+                "devops_env_name": "devops",
+                "workload_role_name_prefix_in_ci": "WorkloadRole-",
+                "workload_role_name_suffix_in_ci": "-Role",
+            }
+        )
+    )
+    path_aws_config = tmp_path / "aws_config"
+    path_aws_config.write_text(
+        "[profile dev]\n"
+        "aws_access_key_id = AKIADEV\n"
+        "aws_secret_access_key = secret\n"
+        "region = us-east-1\n"
+    )
+    flags = {name: False for name in RUNTIME_FLAGS}
+    flags["is_local_runtime_group"] = True
+    flags["is_local"] = True
+    monkeypatch.setenv(RUNTIME_ENV_VAR, json.dumps(flags))
+    monkeypatch.setenv("AWS_CONFIG_FILE", str(path_aws_config))
+    monkeypatch.setenv("AWS_SHARED_CREDENTIALS_FILE", str(path_aws_config))
+    for key in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_PROFILE"]:
+        monkeypatch.delenv(key, raising=False)
+    return str(path_config)
@@ -7,6 +7,15 @@ def test():
     _ = api
     _ = api.get_aws_account_id_in_ci
     _ = api.BaseBotoSesEnum
+    _ = api.CredentialCache
+    _ = api.ClientPoolStats
+    _ = api.EnvSpec
+    _ = api.EnvTopology
+    _ = api.Event
+    _ = api.Instrumentation
+    _ = api.CredentialSnapshot
+    _ = api.Snapshot
+    _ = api.CallerIdentity
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm.broker import CredentialBroker
+
+import json
+import urllib.error
+import urllib.request
+
+import boto3
+
+
+def get(url: str, token: str) -> tuple[int, dict]:
+    request = urllib.request.Request(url, headers={"Authorization": token})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_credential_broker(monkeypatch, local_sts, create_base_boto_ses_enum):
+    boto_ses_enum = create_base_boto_ses_enum(
+        is_local_runtime_group=False,
+        is_ci_runtime_group=True,
+        background_refresh=True,
+        sts_stand_in=local_sts,
+    )
+    with CredentialBroker(boto_ses_enum, ["dev", "prod"]) as broker:
+        # the roles are assumed once on start
+        assert local_sts.stats.assume_role == 2
+
+        status, data = get(broker.get_url("dev"), broker.token)
+        assert status == 200
+        assert data["AccessKeyId"].startswith("ASIA")
+        assert data["Expiration"].endswith("Z")
+        assert get(broker.get_url("dev"), "invalid")[0] == 401
+        assert get(broker.get_url("tst"), broker.token)[0] == 404
+
+        # the AWS SDK reads the credentials from the broker
+        environ = broker.to_environ("prod")
+        assert environ["AWS_REGION"] == "us-west-2"
+        monkeypatch.delenv("AWS_ACCESS_KEY_ID")
+        monkeypatch.delenv("AWS_SECRET_ACCESS_KEY")
+        for key, value in environ.items():
+            monkeypatch.setenv(key, value)
+        credentials = boto3.session.Session().get_credentials()
+        assert credentials.method == "container-role"
+        frozen = credentials.get_frozen_credentials()
+        assert frozen.access_key == get(broker.get_url("prod"), broker.token)[1]["AccessKeyId"]
+        assert local_sts.stats.assume_role == 2
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.broker",
+        preview=False,
+    )
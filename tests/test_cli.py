@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm.cli import load_boto_ses_enum, format_exports, main
+from which_bsm.runtime import RUNTIME_ENV_VAR, RUNTIME_FLAGS
+from which_bsm.credential_cache import make_cache_key, CredentialCache
+
+import sys
+import json
+import signal
+import subprocess
+import urllib.request
+from datetime import datetime, timezone, timedelta
+
+
+def test_load_boto_ses_enum(tmp_path, local_config):
+    dir_config_cache = tmp_path / "config_cache"
+    boto_ses_enum = load_boto_ses_enum(
+        local_config,
+        dir_config_cache=dir_config_cache,
+        background_refresh=True,
+    )
+    assert boto_ses_enum.is_local_runtime_group is True
+    assert boto_ses_enum.background_refresh is True
+    assert len(list(dir_config_cache.glob("*.pickle"))) == 1
+    # the cache hit
+    boto_ses_enum = load_boto_ses_enum(local_config, dir_config_cache=dir_config_cache)
+    assert boto_ses_enum.background_refresh is False
+
+
+def test_format_exports():
+    assert format_exports({"A": "1", "B": "x y"}) == "export A=1\nexport B='x y'\n"
+
+
+def test_broker(tmp_path, local_config):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "which_bsm.cli",
+            "--config",
+            local_config,
+            "--config-cache-dir",
+            str(tmp_path / "config_cache"),
+            "broker",
+            "--env",
+            "dev",
+            "--token",
+            "my-token",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        environ = dict()
+        for _ in range(5):
+            key, value = process.stdout.readline().strip()[len("export ") :].split("=", 1)
+            environ[key] = value
+        assert environ["AWS_CONTAINER_AUTHORIZATION_TOKEN"] == "my-token"
+        url = environ["AWS_CONTAINER_CREDENTIALS_FULL_URI"]
+        assert environ["WHICH_BSM_DEV_CREDENTIALS_FULL_URI"] == url
+        request = urllib.request.Request(url, headers={"Authorization": "my-token"})
+        with urllib.request.urlopen(request) as response:
+            assert json.loads(response.read())["AccessKeyId"] == "AKIADEV"
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=10) == 0
+
+
+def test_credential_process_fast_path(tmp_path, monkeypatch):
+    path_config = tmp_path / "which_bsm.json"
+    dir_cache = tmp_path / "credentials"
+    path_config.write_text(
+        json.dumps(
+            {
+                "env_to_aws_profile_mapper": {},
+                "env_to_aws_region_mapper": {"dev": "us-west-2", "devops": "us-east-1"},
+                "default_app_env_name": "dev",
+                "devops_env_name": "devops",
+                "workload_role_name_prefix_in_ci": "WorkloadRole-",
+                "workload_role_name_suffix_in_ci": "-Role",
+                "credential_cache": {"dir_cache": str(dir_cache)},
+            }
+        )
+    )
+    flags = {name: False for name in RUNTIME_FLAGS}
+    flags["is_ci_runtime_group"] = True
+    monkeypatch.setenv(RUNTIME_ENV_VAR, json.dumps(flags))
+    monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "123456789012")
+    expiration = datetime.now(timezone.utc) + timedelta(hours=1)
+    CredentialCache(dir_cache=dir_cache).put(
+        make_cache_key(
+            role_arn="arn:aws:iam::123456789012:role/WorkloadRole-dev-Role",
+            role_session_name="dev_role_session",
+        ),
+        {
+            "AccessKeyId": "ASIACACHED",
+            "SecretAccessKey": "secret",
+            "SessionToken": "token",
+            "Expiration": expiration.isoformat(),
+        },
+    )
+
+    code = (
+        "import sys\n"
+        "from which_bsm.cli import main\n"
+        "main(sys.argv[1:])\n"
+        "assert 'boto3' not in sys.modules\n"
+        "assert 'botocore' not in sys.modules\n"
+    )
+    args = [sys.executable, "-c", code, "--config", str(path_config), "--no-config-cache"]
+    output = subprocess.check_output(
+        args + ["credential-process", "--env", "dev"],
+        text=True,
+    )
+    data = json.loads(output)
+    assert data["Version"] == 1
+    assert data["AccessKeyId"] == "ASIACACHED"
+    assert data["SessionToken"] == "token"
+
+    output = subprocess.check_output(args + ["export-env", "--env", "dev"], text=True)
+    assert "export AWS_ACCESS_KEY_ID=ASIACACHED\n" in output
+    assert "export AWS_REGION=us-west-2\n" in output
+
+
+def test_profile(tmp_path, local_config, capsys):
+    path_cprofile = tmp_path / "startup.prof"
+    args = ["--config", local_config, "--config-cache-dir", str(tmp_path / "config_cache")]
+    main(args + ["profile", "--env", "dev", "--cprofile", str(path_cprofile)])
+    output = capsys.readouterr().out
+    assert "get_env_bsm" in output
+    assert path_cprofile.exists()
+
+    main(args + ["profile", "--env", "dev", "--json"])
+    data = json.loads(capsys.readouterr().out)
+    assert data["phases"][-1]["name"] == "credentials_resolve"
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_unit_test
+
+    run_unit_test(__file__)
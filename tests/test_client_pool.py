@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from botocore.config import Config
+from boto_session_manager import BotoSesManager
+
+from which_bsm.client_pool import (
+    make_config_key,
+    merge_client_config_kwargs,
+    ClientPool,
+)
+
+
+def test_make_config_key():
+    assert make_config_key(None) == ""
+    assert make_config_key(Config(max_pool_connections=50)) == make_config_key(
+        Config(max_pool_connections=50)
+    )
+    assert make_config_key(Config(max_pool_connections=50)) != make_config_key(
+        Config(max_pool_connections=10)
+    )
+
+
+def test_merge_client_config_kwargs():
+    assert merge_client_config_kwargs() == {}
+    assert merge_client_config_kwargs(
+        {"max_pool_connections": 10, "retries": {"mode": "adaptive"}},
+        {"max_pool_connections": 50, "tcp_keepalive": True},
+        {"retries": {"max_attempts": 10}},
+    ) == {
+        "max_pool_connections": 50,
+        "tcp_keepalive": True,
+        "retries": {"mode": "adaptive", "max_attempts": 10},
+    }
+
+
+def test_client_pool():
+    pool = ClientPool(max_size=2)
+    bsm1 = BotoSesManager(region_name="us-east-1")
+    bsm2 = BotoSesManager(region_name="us-east-1")
+
+    def factory(name):
+        return lambda: object()
+
+    c1 = pool.get_or_create("a", bsm1, factory("a"))
+    assert pool.get_or_create("a", bsm1, factory("a")) is c1
+    c2 = pool.get_or_create("b", bsm1, factory("b"))
+    stats = pool.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 2, 0, 2)
+
+    # "a" is the most recently used, "b" is evicted
+    assert pool.get_or_create("a", bsm1, factory("a")) is c1
+    pool.get_or_create("c", bsm1, factory("c"))
+    assert pool.stats().evictions == 1
+    assert pool.get_or_create("b", bsm1, factory("b")) is not c2
+
+    # client created from a stale boto session manager is replaced
+    assert pool.get_or_create("c", bsm2, factory("c")) is not c1
+    assert len(pool) == 2
+    assert pool.stats().to_dict()["max_size"] == 2
+
+    # per-thread clients are not shared across threads, nor LRU cached
+    c3 = pool.get_or_create("a", bsm1, factory("a"), per_thread=True)
+    assert pool.get_or_create("a", bsm1, factory("a"), per_thread=True) is c3
+    c4 = pool.get_or_create("a", bsm2, factory("a"), per_thread=True)
+    assert c4 is not c3
+    per_thread_clients = []
+    thread = threading.Thread(
+        target=lambda: per_thread_clients.append(
+            pool.get_or_create("a", bsm2, factory("a"), per_thread=True)
+        )
+    )
+    thread.start()
+    thread.join()
+    assert per_thread_clients[0] is not c4
+    assert len(pool) == 2
+
+    pool.clear()
+    assert len(pool) == 0
+    assert pool.get_or_create("a", bsm2, factory("a"), per_thread=True) is not c4
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.client_pool",
+        preview=False,
+    )
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+import json
+import pickle
+import dataclasses
+
+import pytest
+
+from which_bsm.impl import BaseBotoSesEnum
+from which_bsm.credential_cache import CredentialCache
+from which_bsm.rate_limiter import RateLimiter
+from which_bsm.config import (
+    parse_config_file,
+    validate_config,
+    get_config_cache_path,
+    load_config,
+)
+
+CONFIG = {
+    "env_to_aws_profile_mapper": {"devops": "devops-profile", "dev": "dev-profile"},
+    "env_to_aws_region_mapper": {"devops": "us-east-1", "dev": "us-east-1"},
+    "default_app_env_name": "dev",
+    "devops_env_name": "devops",
+    "workload_role_name_prefix_in_ci": "WorkloadRole-",
+    "workload_role_name_suffix_in_ci": "-Role",
+    "is_local_runtime_group": True,
+    "is_ci_runtime_group": False,
+    "is_local": True,
+    "is_cloud9": False,
+    "is_ec2": False,
+    "is_lambda": False,
+    "is_batch": False,
+    "is_ecs": False,
+    "is_glue": False,
+}
+
+TOML = """
+default_app_env_name = "dev"
+devops_env_name = "devops"
+workload_role_name_prefix_in_ci = "WorkloadRole-"
+workload_role_name_suffix_in_ci = "-Role"
+is_local_runtime_group = true
+is_ci_runtime_group = false
+is_local = true
+is_cloud9 = false
+is_ec2 = false
+is_lambda = false
+is_batch = false
+is_ecs = false
+is_glue = false
+
+[env_to_aws_profile_mapper]
+devops = "devops-profile"
+dev = "dev-profile"
+
+[env_to_aws_region_mapper]
+devops = "us-east-1"
+dev = "us-east-1"
+"""
+
+
+def test_parse_config_file(tmp_path):
+    path_json = tmp_path / "config.json"
+    path_json.write_text(json.dumps(CONFIG))
+    path_toml = tmp_path / "config.toml"
+    path_toml.write_text(TOML)
+    assert parse_config_file(path_json) == CONFIG
+    assert parse_config_file(path_toml) == CONFIG
+
+    path_yaml = tmp_path / "config.yml"
+    path_yaml.write_text("")
+    with pytest.raises(ValueError):
+        parse_config_file(path_yaml)
+
+
+def test_validate_config(tmp_path):
+    kwargs = validate_config(BaseBotoSesEnum, CONFIG)
+    assert kwargs == CONFIG
+
+    kwargs = validate_config(
+        BaseBotoSesEnum,
+        {**CONFIG, "credential_cache": {"dir_cache": str(tmp_path)}},
+    )
+    assert isinstance(kwargs["credential_cache"], CredentialCache)
+
+    kwargs = validate_config(
+        BaseBotoSesEnum,
+        {**CONFIG, "sts_rate_limiter": {"rate": 2.0, "dir_state": str(tmp_path)}},
+    )
+    assert isinstance(kwargs["sts_rate_limiter"], RateLimiter)
+    assert kwargs["sts_rate_limiter"].rate == 2.0
+
+    with pytest.raises(ValueError):
+        validate_config(BaseBotoSesEnum, {**CONFIG, "is_esc": False})
+    with pytest.raises(ValueError):
+        validate_config(
+            BaseBotoSesEnum,
+            {k: v for k, v in CONFIG.items() if k != "devops_env_name"},
+        )
+    with pytest.raises(TypeError):
+        validate_config(BaseBotoSesEnum, {**CONFIG, "is_local": "true"})
+    with pytest.raises(TypeError):
+        validate_config(BaseBotoSesEnum, {**CONFIG, "devops_env_name": 1})
+    with pytest.raises(TypeError):
+        validate_config(BaseBotoSesEnum, {**CONFIG, "env_to_aws_region_mapper": []})
+    with pytest.raises(TypeError):
+        validate_config(BaseBotoSesEnum, {**CONFIG, "max_client_pool_size": True})
+    # the dict items and the optional fields are checked too
+    with pytest.raises(TypeError):
+        validate_config(
+            BaseBotoSesEnum,
+            {**CONFIG, "env_to_aws_region_mapper": {"dev": 123}},
+        )
+    with pytest.raises(TypeError):
+        validate_config(
+            BaseBotoSesEnum,
+            {**CONFIG, "env_to_aws_region_mapper": {"dev": ["us-east-1", 1]}},
+        )
+    with pytest.raises(TypeError):
+        validate_config(BaseBotoSesEnum, {**CONFIG, "credential_cache": "yes"})
+    with pytest.raises(TypeError):
+        validate_config(
+            BaseBotoSesEnum,
+            {**CONFIG, "env_to_client_config_mapper": {"dev": 1}},
+        )
+    kwargs = validate_config(
+        BaseBotoSesEnum,
+        {
+            **CONFIG,
+            "env_to_aws_region_mapper": {"dev": ["us-east-1", "us-west-2"]},
+            "credential_cache": None,
+        },
+    )
+    assert kwargs["credential_cache"] is None
+
+    @dataclasses.dataclass
+    class BotoSesEnum(BaseBotoSesEnum):
+        env_names: "list[str]" = dataclasses.field(default_factory=list)
+        options: "UnknownType" = dataclasses.field(default=None)  # noqa: F821
+
+    assert validate_config(BotoSesEnum, {**CONFIG, "env_names": ["dev"]})
+    with pytest.raises(TypeError):
+        validate_config(BotoSesEnum, {**CONFIG, "env_names": "dev"})
+    # unknown types are rejected instead of skipped
+    with pytest.raises(TypeError, match="Cannot validate"):
+        validate_config(BotoSesEnum, {**CONFIG, "options": {}})
+
+
+def test_load_config(tmp_path):
+    dir_cache = tmp_path / "cache"
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(CONFIG))
+    path_cache = get_config_cache_path(BaseBotoSesEnum, path, dir_cache)
+
+    assert load_config(BaseBotoSesEnum, path, dir_cache=None) == CONFIG
+    assert path_cache.exists() is False
+
+    assert load_config(BaseBotoSesEnum, path, dir_cache=dir_cache) == CONFIG
+    assert path_cache.exists() is True
+    # the cache hit doesn't parse the config file again
+    mtime = path_cache.stat().st_mtime_ns
+    assert load_config(BaseBotoSesEnum, path, dir_cache=dir_cache) == CONFIG
+    assert path_cache.stat().st_mtime_ns == mtime
+
+    # the cache is invalidated when the config file changes
+    path.write_text(json.dumps({**CONFIG, "default_app_env_name": "devops"}))
+    kwargs = load_config(BaseBotoSesEnum, path, dir_cache=dir_cache)
+    assert kwargs["default_app_env_name"] == "devops"
+    # the cross-field checks are done by the constructor
+    with pytest.raises(ValueError):
+        BaseBotoSesEnum(**kwargs)
+
+    # the corrupted cache is ignored
+    path.write_text(json.dumps(CONFIG))
+    path_cache.write_bytes(b"not a pickle")
+    assert load_config(BaseBotoSesEnum, path, dir_cache=dir_cache) == CONFIG
+    path_cache.write_bytes(pickle.dumps("truncated")[:-1])
+    assert load_config(BaseBotoSesEnum, path, dir_cache=dir_cache) == CONFIG
+
+
+def test_load_config_with_defaults(tmp_path):
+    dir_cache = tmp_path / "cache"
+    path = tmp_path / "config.json"
+    runtime = {"is_local_runtime_group": False, "is_ci_runtime_group": True}
+    config = {key: value for key, value in CONFIG.items() if key not in runtime}
+    path.write_text(json.dumps(config))
+
+    with pytest.raises(ValueError):
+        load_config(BaseBotoSesEnum, path, dir_cache=dir_cache)
+    kwargs = load_config(BaseBotoSesEnum, path, dir_cache=dir_cache, defaults=runtime)
+    assert kwargs == {**config, **runtime}
+    # the config file wins over the defaults
+    kwargs = load_config(
+        BaseBotoSesEnum,
+        path,
+        dir_cache=dir_cache,
+        defaults={**runtime, "default_app_env_name": "prod"},
+    )
+    assert kwargs["default_app_env_name"] == "dev"
+    with pytest.raises(TypeError):
+        load_config(
+            BaseBotoSesEnum,
+            path,
+            dir_cache=dir_cache,
+            defaults={**runtime, "is_ci_runtime_group": "yes"},
+        )
+
+
+def test_from_dict_and_from_file(tmp_path):
+    boto_ses_enum = BaseBotoSesEnum.from_dict(CONFIG)
+    assert boto_ses_enum.get_aws_profile("dev") == "dev-profile"
+
+    path = tmp_path / "config.toml"
+    path.write_text(TOML)
+    boto_ses_enum = BaseBotoSesEnum.from_file(path, dir_cache=tmp_path / "cache")
+    assert boto_ses_enum.get_aws_region("dev") == "us-east-1"
+    boto_ses_enum = BaseBotoSesEnum.from_file(path, dir_cache=tmp_path / "cache")
+    assert boto_ses_enum.devops_env_name == "devops"
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.config",
+        preview=False,
+    )
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timezone, timedelta
+
+from which_bsm.credential_cache import (
+    make_cache_key,
+    parse_expiration,
+    CredentialCache,
+)
+
+
+def make_credentials(seconds: int) -> dict:
+    expiration = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+    return {
+        "AccessKeyId": "AKIAEXAMPLE",
+        "SecretAccessKey": "secret",
+        "SessionToken": "token",
+        "Expiration": expiration.isoformat(),
+    }
+
+
+def test_make_cache_key():
+    key1 = make_cache_key("arn:aws:iam::111111111111:role/a", "s", {"x": 1, "y": 2})
+    key2 = make_cache_key("arn:aws:iam::111111111111:role/a", "s", {"y": 2, "x": 1})
+    key3 = make_cache_key("arn:aws:iam::111111111111:role/a", "s2", {"x": 1, "y": 2})
+    key4 = make_cache_key("arn:aws:iam::111111111111:role/a", "s")
+    key5 = make_cache_key("arn:aws:iam::111111111111:role/a", "s", {})
+    assert key1 == key2
+    assert key1 != key3
+    assert key4 == key5
+
+
+def test_parse_expiration():
+    expiration = parse_expiration({"Expiration": "2030-01-01T00:00:00"})
+    assert expiration.tzinfo is not None
+    expiration = parse_expiration({"Expiration": "2030-01-01T00:00:00+00:00"})
+    assert expiration.year == 2030
+
+
+class TestCredentialCache:
+    def test_get_put(self, tmp_path):
+        cache = CredentialCache(dir_cache=tmp_path, expiry_margin=300)
+        assert cache.get("key") is None
+
+        credentials = make_credentials(3600)
+        cache.put("key", credentials)
+        assert cache.get("key") == credentials
+
+        # expire within the margin is considered stale
+        cache.put("key", make_credentials(60))
+        assert cache.get("key") is None
+
+        # corrupted entry is a cache miss
+        cache.get_path("key").write_text("not a json")
+        assert cache.get("key") is None
+        cache.get_path("key").write_text("[]")
+        assert cache.get("key") is None
+        cache.get_path("key").write_text('{"AccessKeyId": "AKIAEXAMPLE"}')
+        assert cache.get("key") is None
+
+        cache.put("key", credentials)
+        cache.delete("key")
+        assert cache.get("key") is None
+        cache.delete("key")
+
+    def test_get_or_fetch(self, tmp_path):
+        cache = CredentialCache(dir_cache=tmp_path)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            return make_credentials(3600)
+
+        credentials1 = cache.get_or_fetch("key", fetch)
+        credentials2 = cache.get_or_fetch("key", fetch)
+        assert credentials1 == credentials2
+        assert len(calls) == 1
+
+        # a different cache instance on the same dir shares the entries
+        cache2 = CredentialCache(dir_cache=tmp_path)
+        assert cache2.get_or_fetch("key", fetch) == credentials1
+        assert len(calls) == 1
+
+        cache.clear()
+        cache.get_or_fetch("key", fetch)
+        assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.credential_cache",
+        preview=False,
+    )
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm.local_sts import LocalSts
+
+import os
+import threading
+
+import pytest
+
+
+def run_in_child(func) -> int:
+    """
+    Run ``func`` in a forked child process and return its exit code,
+    the child exits with 0 if ``func`` returns True.
+    """
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        code = 1
+        try:
+            code = 0 if func() else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_session_cache_after_fork(ci_environ, create_base_boto_ses_enum):
+    local_sts = LocalSts()
+    config = create_base_boto_ses_enum(
+        is_local_runtime_group=False,
+        is_ci_runtime_group=True,
+        sts_stand_in=local_sts,
+    )
+    bsm = config.bsm_app
+    boto_ses = bsm.boto_ses
+    client = config.get_client("dev", "sts")
+    access_key = boto_ses.get_credentials().access_key
+
+    def check() -> bool:
+        new_bsm = config.get_env_bsm("dev")
+        return (
+            new_bsm is bsm
+            and config.bsm_app is bsm
+            and new_bsm.boto_ses is not boto_ses
+            and new_bsm.boto_ses.get_credentials().access_key == access_key
+            and config.get_client("dev", "sts") is not client
+            and local_sts.stats.assume_role == 1
+            # the STS calls still go to the stand-in
+            and config.get_client("dev", "sts").get_caller_identity()["Account"]
+            == "123456789012"
+            and new_bsm.sts_client.get_caller_identity()["Account"] == "123456789012"
+        )
+
+    assert run_in_child(check) == 0
+    # the parent is not affected
+    assert bsm.boto_ses is boto_ses
+    assert config.get_client("dev", "sts") is client
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_client_config_after_fork(ci_environ, create_base_boto_ses_enum):
+    config = create_base_boto_ses_enum(
+        is_local_runtime_group=False,
+        is_ci_runtime_group=True,
+        sts_stand_in=LocalSts(),
+        client_config={"max_pool_connections": 50},
+    )
+    bsm = config.get_env_bsm("dev")
+
+    def check() -> bool:
+        client = config.get_env_bsm("dev").get_client("sqs")
+        return client.meta.config.max_pool_connections == 50
+
+    assert run_in_child(check) == 0
+    assert bsm.get_client("sqs").meta.config.max_pool_connections == 50
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_background_refresh_after_fork(ci_environ, create_base_boto_ses_enum):
+    config = create_base_boto_ses_enum(
+        is_local_runtime_group=False,
+        is_ci_runtime_group=True,
+        background_refresh=True,
+        sts_stand_in=LocalSts(),
+    )
+    bsm = config.get_env_bsm("dev")
+    access_key = bsm.boto_ses.get_credentials().access_key
+
+    def check() -> bool:
+        names = [thread.name for thread in threading.enumerate()]
+        return (
+            "which_bsm-credential-refresher" in names
+            and config.get_env_bsm("dev").boto_ses.get_credentials().access_key
+            == access_key
+        )
+
+    assert run_in_child(check) == 0
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.fork",
+        preview=False,
+    )
@@ -4,45 +4,26 @@ from which_bsm.impl import (
     get_aws_account_id_in_ci,
     BaseBotoSesEnum,
 )
+from which_bsm.credential_cache import make_cache_key, CredentialCache
+from which_bsm.local_sts import LocalSts, LocalStsServer
+from which_bsm.loader import get_shared_loader
+from which_bsm.rate_limiter import RateLimiter
+from which_bsm.runtime import RUNTIME_ENV_VAR, RUNTIME_FLAGS
+
+import time
+import json
+import pickle
+import asyncio
+import threading
+import dataclasses
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
 
 import pytest
 import os
-
-
-def create_base_boto_ses_enum(
-    env_to_aws_profile_mapper=None,
-    env_to_aws_region_mapper=None,
-    default_app_env_name="dev",
-    devops_env_name="devops",
-    workload_role_name_prefix_in_ci="WorkloadRole-",
-    workload_role_name_suffix_in_ci="-Role",
-    is_local_runtime_group=True,
-    is_ci_runtime_group=False,
-) -> BaseBotoSesEnum:
-    """Factory function to create BaseBotoSesEnum with sensible defaults."""
-    if env_to_aws_profile_mapper is None:
-        env_to_aws_profile_mapper = {"dev": "dev-profile", "prod": "prod-profile", "devops": "devops-profile"}
-    
-    if env_to_aws_region_mapper is None:
-        env_to_aws_region_mapper = {"dev": "us-east-1", "prod": "us-west-2", "devops": "us-east-1"}
-    
-    return BaseBotoSesEnum(
-        env_to_aws_profile_mapper=env_to_aws_profile_mapper,
-        env_to_aws_region_mapper=env_to_aws_region_mapper,
-        default_app_env_name=default_app_env_name,
-        devops_env_name=devops_env_name,
-        workload_role_name_prefix_in_ci=workload_role_name_prefix_in_ci,
-        workload_role_name_suffix_in_ci=workload_role_name_suffix_in_ci,
-        is_local_runtime_group=is_local_runtime_group,
-        is_ci_runtime_group=is_ci_runtime_group,
-        is_local=True,
-        is_cloud9=False,
-        is_ec2=False,
-        is_lambda=False,
-        is_batch=False,
-        is_ecs=False,
-        is_glue=False,
-    )
+from botocore.config import Config
+from boto_session_manager import BotoSesManager
 
 
 def test_get_aws_account_id_in_ci():
@@ -96,7 +77,7 @@ def test_get_aws_account_id_in_ci():
 
 
 class TestBaseBotoSesEnum:
-    def test_get_workload_role_arn_in_ci(self):
+    def test_get_workload_role_arn_in_ci(self, create_base_boto_ses_enum):
         """Test get_workload_role_arn_in_ci method covering all logic branches."""
 
         # Create test instance using factory
@@ -135,7 +116,7 @@ class TestBaseBotoSesEnum:
             if original_value is not None:
                 os.environ[env_var_name] = original_value
 
-    def test_post_init_validation(self):
+    def test_post_init_validation(self, create_base_boto_ses_enum):
         """Test __post_init__ validation logic."""
 
         # Test valid configuration
@@ -152,7 +133,7 @@ class TestBaseBotoSesEnum:
                 devops_env_name="devops",
             )
 
-    def test_get_aws_profile_and_region(self):
+    def test_get_aws_profile_and_region(self, create_base_boto_ses_enum):
         """Test get_aws_profile and get_aws_region methods."""
         
         config = create_base_boto_ses_enum()
@@ -173,6 +154,735 @@ class TestBaseBotoSesEnum:
         with pytest.raises(KeyError):
             config.get_aws_region("nonexistent")
 
+    def test_get_env_bsm_in_ci_with_credential_cache(self, tmp_path, monkeypatch, create_base_boto_ses_enum):
+        """Test get_env_bsm_in_ci reuses the credentials from the cache."""
+        cache = CredentialCache(dir_cache=tmp_path)
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            credential_cache=cache,
+        )
+        monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "123456789012")
+        monkeypatch.setenv("PROD_AWS_ACCOUNT_ID", "987654321098")
+        key = make_cache_key(
+            role_arn=config.get_workload_role_arn_in_ci("dev"),
+            role_session_name=config.get_workfload_role_session_name("dev"),
+        )
+        cache.put(
+            key,
+            {
+                "AccessKeyId": "AKIAEXAMPLE",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": "2099-01-01T00:00:00+00:00",
+            },
+        )
+
+        def get_devops_bsm():  # pragma: no cover
+            raise AssertionError("should not assume role on cache hit")
+
+        monkeypatch.setattr(config, "get_devops_bsm", get_devops_bsm)
+        bsm = config.get_env_bsm("dev")
+        assert bsm.aws_access_key_id == "AKIAEXAMPLE"
+        assert bsm.aws_session_token == "token"
+        assert config.instrumentation.get_count("credential_cache_hit") == 1
+        assert bsm.aws_region == "us-east-1"
+        assert bsm.is_expired() is False
+
+    def test_get_env_bsm_cache(self, create_base_boto_ses_enum):
+        """Test get_env_bsm caches the boto session manager per environment."""
+        config = create_base_boto_ses_enum()
+        bsm_dev = config.get_env_bsm("dev")
+        assert bsm_dev.profile_name == "dev-profile"
+        assert config.get_env_bsm("dev") is bsm_dev
+        assert config.bsm_app is bsm_dev
+        assert config.get_env_bsm("dev", {"duration_seconds": 900}) is not bsm_dev
+        assert config.bsm_devops.profile_name == "devops-profile"
+        assert config.new_env_bsm("dev") is not bsm_dev
+
+    def test_get_env_bsm_many_and_prefetch(self, monkeypatch, create_base_boto_ses_enum):
+        """Test get_env_bsm_many builds the sessions concurrently."""
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+        )
+        # the three sessions only pass the barrier if they are built concurrently
+        barrier = threading.Barrier(3, timeout=10)
+
+        def get_env_bsm_in_ci(env_name, assume_role_kwargs=None):
+            barrier.wait()
+            return BotoSesManager(
+                aws_access_key_id=env_name,
+                aws_secret_access_key="secret",
+                region_name=config.get_aws_region(env_name),
+            )
+
+        def get_devops_bsm():
+            barrier.wait()
+            return BotoSesManager(region_name="us-east-1")
+
+        monkeypatch.setattr(config, "get_env_bsm_in_ci", get_env_bsm_in_ci)
+        monkeypatch.setattr(config, "get_devops_bsm", get_devops_bsm)
+
+        assert config.get_env_bsm_many([]) == {}
+
+        bsm_mapper = config.prefetch()
+        assert list(bsm_mapper) == ["dev", "prod", "devops"]
+        assert bsm_mapper["dev"].aws_access_key_id == "dev"
+
+        # the cached_property accessors reuse the prefetched sessions
+        assert config.bsm_app is bsm_mapper["dev"]
+        assert config.bsm_devops is bsm_mapper["devops"]
+        assert config.get_env_bsm_many(["prod", "prod"]) == {"prod": bsm_mapper["prod"]}
+
+    def test_get_env_bsm_in_ci_with_background_refresh(self, tmp_path, monkeypatch, create_base_boto_ses_enum):
+        """Test get_env_bsm_in_ci returns a never expired boto session manager."""
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            credential_cache=CredentialCache(dir_cache=tmp_path),
+            background_refresh=True,
+        )
+        monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "123456789012")
+        monkeypatch.setenv("PROD_AWS_ACCOUNT_ID", "987654321098")
+
+        class FakeDevopsBsm:
+            def is_expired(self, delta=0):
+                return False
+
+            def assume_role(self, role_arn, role_session_name, **kwargs):
+                return BotoSesManager(
+                    aws_access_key_id="AKIAEXAMPLE",
+                    aws_secret_access_key="secret",
+                    aws_session_token="token",
+                    expiration_time=datetime.now(timezone.utc) + timedelta(hours=1),
+                )
+
+        monkeypatch.setattr(config, "get_devops_bsm", lambda: FakeDevopsBsm())
+        bsm = config.get_env_bsm("dev")
+        assert bsm.is_expired() is False
+        assert bsm.aws_region == "us-east-1"
+        credentials = bsm.boto_ses.get_credentials().get_frozen_credentials()
+        assert credentials.access_key == "AKIAEXAMPLE"
+        # the initial credentials are stored in the cache
+        assert len(list(tmp_path.glob("*.json"))) == 1
+        assert config.instrumentation.get_count("credential_cache_miss") == 1
+        assert config.instrumentation.get_count("assume_role", env_name="dev") == 1
+        # the refreshes assume the role again and update the cache
+        bsm.boto_ses.get_credentials()._refresh_using()
+        assert config.instrumentation.get_count("assume_role", env_name="dev") == 2
+        assert config.instrumentation.get_count("credential_cache_miss") == 1
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+    def test_get_env_bsm_in_local(self, create_base_boto_ses_enum):
+        """Test the local sessions use the AWS CLI profiles, except on Cloud9."""
+        config = create_base_boto_ses_enum()
+        bsm = config.get_env_bsm("dev")
+        assert bsm.profile_name == "dev-profile"
+        assert bsm.region_name == "us-east-1"
+        assert config.bsm_devops.profile_name == "devops-profile"
+        assert config.get_devops_bsm() is not config.bsm_devops
+
+        config.is_cloud9 = True
+        bsm = config.get_devops_bsm()
+        assert bsm.profile_name != "devops-profile"
+        assert bsm.region_name == "us-east-1"
+
+    def test_get_env_bsm_single_flight(self, monkeypatch, create_base_boto_ses_enum):
+        """Test concurrent first accesses collapse into one construction."""
+
+        @dataclasses.dataclass
+        class BotoSesEnum(BaseBotoSesEnum):
+            @cached_property
+            def bsm_prod(self):
+                return self.get_env_bsm(env_name="prod")
+
+        config = create_base_boto_ses_enum()
+        config = BotoSesEnum(
+            **{
+                field.name: getattr(config, field.name)
+                for field in dataclasses.fields(config)
+                if field.init
+            }
+        )
+        n_calls = []
+
+        def get_env_bsm_in_local(env_name):
+            n_calls.append(env_name)
+            time.sleep(0.1)
+            return BotoSesManager(region_name=config.get_aws_region(env_name))
+
+        monkeypatch.setattr(config, "get_env_bsm_in_local", get_env_bsm_in_local)
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            bsm_list = list(executor.map(lambda _: config.bsm_app, range(32)))
+            bsm_prod_list = list(executor.map(lambda _: config.bsm_prod, range(32)))
+        assert len({id(bsm) for bsm in bsm_list}) == 1
+        assert len({id(bsm) for bsm in bsm_prod_list}) == 1
+        assert sorted(n_calls) == ["dev", "prod"]
+
+    def test_get_client(self, monkeypatch, create_base_boto_ses_enum):
+        """Test get_client memoizes the clients per env, service and config."""
+        config = create_base_boto_ses_enum()
+
+        def get_env_bsm_in_local(env_name):
+            return BotoSesManager(
+                aws_access_key_id="AKIAEXAMPLE",
+                aws_secret_access_key="secret",
+                region_name=config.get_aws_region(env_name),
+            )
+
+        monkeypatch.setattr(config, "get_env_bsm_in_local", get_env_bsm_in_local)
+        s3_client = config.get_client("dev", "s3")
+        assert config.get_client("dev", "s3") is s3_client
+        assert s3_client.meta.region_name == "us-east-1"
+        assert config.get_client("prod", "s3").meta.region_name == "us-west-2"
+        assert config.get_client("dev", "s3", region_name="us-west-1") is not s3_client
+        s3_client_with_config = config.get_client(
+            "dev", "s3", config=Config(max_pool_connections=50)
+        )
+        assert s3_client_with_config is not s3_client
+        assert (
+            config.get_client("dev", "s3", config=Config(max_pool_connections=50))
+            is s3_client_with_config
+        )
+
+        per_thread_clients = []
+        for _ in range(2):
+            thread = threading.Thread(
+                target=lambda: per_thread_clients.append(
+                    config.get_client("dev", "s3", per_thread=True)
+                )
+            )
+            thread.start()
+            thread.join()
+        assert per_thread_clients[0] is not s3_client
+
+        stats = config.get_client_pool_stats()
+        assert stats.hits >= 2
+        assert stats.misses >= 5
+
+        instrumentation = config.instrumentation
+        assert instrumentation.get_count("client_cache_hit") == stats.hits
+        assert instrumentation.get_count("client_cache_miss") == stats.misses
+        assert instrumentation.get_count("client_create") == stats.misses
+        assert instrumentation.get_count("session_cache_miss") == 2
+        assert instrumentation.get_count("session_build", env_name="dev") == 1
+
+    def test_aget_env_bsm(self, monkeypatch, create_base_boto_ses_enum):
+        """Test the asyncio API deduplicates concurrent awaits."""
+        config = create_base_boto_ses_enum()
+        n_calls = []
+        # prod and devops, built by aprefetch, only pass the barrier if
+        # they are built concurrently
+        barrier = threading.Barrier(2, timeout=10)
+
+        def get_env_bsm_in_local(env_name):
+            n_calls.append(env_name)
+            if env_name == "dev":
+                time.sleep(0.2)
+            else:
+                barrier.wait()
+            return BotoSesManager(region_name=config.get_aws_region(env_name))
+
+        def get_devops_bsm():
+            n_calls.append("devops")
+            barrier.wait()
+            return BotoSesManager(region_name="us-east-1")
+
+        monkeypatch.setattr(config, "get_env_bsm_in_local", get_env_bsm_in_local)
+        monkeypatch.setattr(config, "get_devops_bsm", get_devops_bsm)
+
+        async def main():
+            bsm_list = await asyncio.gather(
+                *[config.aget_app_bsm() for _ in range(10)]
+            )
+            assert len({id(bsm) for bsm in bsm_list}) == 1
+            # cached, no executor needed
+            assert await config.aget_env_bsm("dev") is bsm_list[0]
+
+            bsm_mapper = await config.aprefetch()
+            assert list(bsm_mapper) == ["dev", "prod", "devops"]
+            return bsm_mapper
+
+        bsm_mapper = asyncio.run(main())
+        assert sorted(n_calls) == ["dev", "devops", "prod"]
+        assert config.bsm_devops is bsm_mapper["devops"]
+        assert config._async_inflight == {}
+
+    def test_compile_topology(self, monkeypatch, create_base_boto_ses_enum):
+        """Test compile_topology validates and resolves all environments."""
+        monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "123456789012")
+        monkeypatch.setenv("PROD_AWS_ACCOUNT_ID", "987654321098")
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+        )
+        topology = config.compile_topology()
+        assert topology.env_names == ("dev", "prod", "devops")
+        assert len(topology) == 3
+        assert "dev" in topology
+        assert [spec.env_name for spec in topology] == ["dev", "prod", "devops"]
+        assert topology.get_aws_profile("dev") == "dev-profile"
+        assert topology.get_aws_region("prod") == "us-west-2"
+        assert topology.get_aws_account_id("prod") == "987654321098"
+        assert (
+            topology.get_role_arn("dev")
+            == "arn:aws:iam::123456789012:role/WorkloadRole-dev-Role"
+        )
+        assert topology.get_role_session_name("dev") == "dev_role_session"
+        assert topology.get("devops").role_arn is None
+        with pytest.raises(ValueError):
+            topology.get_role_arn("devops")
+        with pytest.raises(KeyError):
+            topology.get("nonexistent")
+        with pytest.raises(AttributeError):
+            topology.devops_env_name = "dev"
+        with pytest.raises(AttributeError):
+            topology.get("dev").aws_region = "us-west-1"
+        assert topology.get("dev") == config.compile_topology().get("dev")
+
+        # the topology is compiled again when an account id changes
+        assert config.topology is config.topology
+        monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "111111111111")
+        role_arn = config.get_workload_role_arn_in_ci("dev")
+        assert config.topology.get_role_arn("dev") == role_arn
+        assert config.topology.get_aws_account_id("dev") == "111111111111"
+
+        # in CI, a missing account id only fails on lookup
+        monkeypatch.delenv("PROD_AWS_ACCOUNT_ID")
+        topology = config.compile_topology()
+        assert topology.get("prod").aws_account_id is None
+        with pytest.raises(KeyError):
+            topology.get_aws_account_id("prod")
+        with pytest.raises(KeyError):
+            topology.get_role_arn("prod")
+        monkeypatch.setenv("DEV_AWS_ACCOUNT_ID", "123")
+        with pytest.raises(ValueError):
+            config.compile_topology()
+
+        # in local, account ids are optional
+        monkeypatch.delenv("DEV_AWS_ACCOUNT_ID")
+        config = create_base_boto_ses_enum(
+            env_to_aws_profile_mapper={"dev": "dev-profile"},
+        )
+        topology = config.compile_topology()
+        assert topology.get("prod").aws_profile is None
+        with pytest.raises(KeyError):
+            topology.get_aws_profile("prod")
+        with pytest.raises(KeyError):
+            topology.get_aws_account_id("dev")
+        with pytest.raises(KeyError):
+            topology.get_role_arn("dev")
+
+    def test_compile_topology_with_overridden_hooks(self, local_sts, create_base_boto_ses_enum):
+        """Test the CI role assumption uses the overridden role ARN hooks."""
+
+        class BotoSesEnum(BaseBotoSesEnum):
+            def get_workload_role_arn_in_ci(self, env_name: str) -> str:
+                return f"arn:aws:iam::111111111111:role/custom-{env_name}"
+
+            def get_workfload_role_session_name(self, env_name: str) -> str:
+                return f"custom-{env_name}"
+
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+            klass=BotoSesEnum,
+        )
+        assert config.topology.get_role_arn("dev") == (
+            "arn:aws:iam::111111111111:role/custom-dev"
+        )
+        assert config.topology.get_role_session_name("dev") == "custom-dev"
+        bsm = config.get_env_bsm("dev")
+        assert bsm.aws_account_id == "111111111111"
+        assert bsm.principal_arn.startswith(
+            "arn:aws:sts::111111111111:assumed-role/custom-dev/custom-dev"
+        )
+        assert config.verify_identities(["dev"])["dev"].aws_account_id == (
+            "111111111111"
+        )
+
+    def test_sts_stand_in(self, local_sts, create_base_boto_ses_enum):
+        """Test the CI sessions are resolved against the stand-in STS."""
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+        )
+        assert config.bsm_devops.aws_account_id == "000000000000"
+        bsm_dev = config.get_env_bsm("dev")
+        assert bsm_dev.aws_account_id == "123456789012"
+        assert config.get_env_bsm("prod").aws_account_id == "987654321098"
+        assert local_sts.stats.assume_role == 2
+        assert config.instrumentation.get_count("assume_role", "dev") == 1
+
+    def test_get_env_bsm_in_ci_with_missing_account_id(self, local_sts, monkeypatch, create_base_boto_ses_enum):
+        """Test a missing account ID only fails the environments using it."""
+        monkeypatch.delenv("PROD_AWS_ACCOUNT_ID")
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+        )
+        assert config.get_env_bsm("dev").aws_account_id == "123456789012"
+        with pytest.raises(KeyError):
+            config.get_env_bsm("prod")
+
+    def test_multi_region(self, local_sts, create_base_boto_ses_enum):
+        """Test the regional sessions derived from the primary one."""
+        config = create_base_boto_ses_enum(
+            env_to_aws_region_mapper={
+                "dev": ["us-east-1", "eu-west-1"],
+                "prod": "us-west-2",
+                "devops": "us-east-1",
+            },
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+        )
+        assert config.get_aws_region("dev") == "us-east-1"
+        assert config.get_aws_regions("dev") == ["us-east-1", "eu-west-1"]
+        assert config.get_aws_regions("prod") == ["us-west-2"]
+        assert config.topology.get_aws_regions("dev") == ("us-east-1", "eu-west-1")
+
+        bsm = config.get_env_bsm("dev")
+        assert config.get_env_bsm("dev", region="us-east-1") is bsm
+        bsm_eu = config.get_env_bsm("dev", region="eu-west-1")
+        assert bsm_eu.aws_region == "eu-west-1"
+        assert bsm_eu.get_client("sts").meta.region_name == "eu-west-1"
+        assert bsm_eu.aws_account_id == "123456789012"
+        assert config.get_env_bsm("dev", region="eu-west-1") is bsm_eu
+        assert asyncio.run(config.aget_env_bsm("dev", region="eu-west-1")) is bsm_eu
+        # the regional session shares the credentials of the primary one
+        assert local_sts.stats.assume_role == 1
+        assert (
+            bsm_eu.boto_ses.get_credentials().access_key
+            == bsm.boto_ses.get_credentials().access_key
+        )
+
+        # the regional session is re-derived when the primary one is re-created
+        config._session_registry.pop(config._get_bsm_cache_key("dev"))
+        bsm_eu_new = config.get_env_bsm("dev", region="eu-west-1")
+        assert bsm_eu_new is not bsm_eu
+        assert local_sts.stats.assume_role == 2
+
+        with pytest.raises(ValueError):
+            config.get_env_bsm("dev", region="ap-northeast-1")
+        config.env_to_aws_region_mapper["prod"] = []
+        with pytest.raises(ValueError):
+            config.get_aws_regions("prod")
+
+    def test_snapshot(self, tmp_path, local_sts, create_base_boto_ses_enum):
+        """Test to_snapshot / from_snapshot round trip the credentials."""
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            credential_cache=CredentialCache(dir_cache=tmp_path),
+            sts_stand_in=local_sts,
+        )
+        assert config.to_snapshot().credentials == {}
+        bsm_dev = config.get_env_bsm("dev")
+        snapshot = config.to_snapshot()
+        assert list(snapshot.credentials) == ["devops", "dev"]
+        snapshot = config.to_snapshot(env_names=["dev", "prod"])
+        assert local_sts.stats.assume_role == 2
+
+        snapshot = pickle.loads(pickle.dumps(snapshot))
+        new_config = BaseBotoSesEnum.from_snapshot(snapshot, sts_stand_in=local_sts)
+        assert new_config == config
+        new_bsm_dev = new_config.get_env_bsm("dev")
+        assert new_bsm_dev.aws_account_id == "123456789012"
+        assert (
+            new_bsm_dev.boto_ses.get_credentials().access_key
+            == bsm_dev.boto_ses.get_credentials().access_key
+        )
+        new_config.get_env_bsm("prod")
+        assert local_sts.stats.assume_role == 2
+
+        # expired credentials are fetched again
+        new_config = BaseBotoSesEnum.from_snapshot(
+            snapshot,
+            expiry_margin=7200,
+            sts_stand_in=local_sts,
+        )
+        new_config.credential_cache = None
+        new_config.get_env_bsm("dev")
+        assert local_sts.stats.assume_role == 3
+
+    def test_session_dependency_graph(self, local_sts, monkeypatch, create_base_boto_ses_enum):
+        """Test the child sessions share the session of their parent."""
+        monkeypatch.setenv("PRODRO_AWS_ACCOUNT_ID", "987654321098")
+        config = create_base_boto_ses_enum(
+            env_to_aws_region_mapper={
+                "dev": "us-east-1",
+                "prod": "us-east-1",
+                "prodro": "us-east-1",
+                "devops": "us-east-1",
+            },
+            env_to_parent_env_mapper={"prodro": "prod"},
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+        )
+        assert config.get_env_chain("dev") == ["devops", "dev"]
+        assert config.get_env_chain("prodro") == ["devops", "prod", "prodro"]
+
+        config.get_env_bsm_many(["dev", "prod", "prodro"], max_workers=1)
+        assert local_sts.stats.assume_role == 3
+        # one devops session and one prod session are shared by the children
+        assert config.instrumentation.get_count("session_build", "devops") == 1
+        assert config.instrumentation.get_count("session_build", "prod") == 1
+        assert config.get_env_bsm("prodro").aws_account_id == "987654321098"
+
+        with pytest.raises(ValueError):
+            create_base_boto_ses_enum(env_to_parent_env_mapper={"dev": "prod", "prod": "dev"})
+        with pytest.raises(ValueError):
+            create_base_boto_ses_enum(env_to_parent_env_mapper={"devops": "dev"})
+        # a typo in the parent environment name
+        with pytest.raises(ValueError, match="'stgae' of 'dev' is not a known"):
+            create_base_boto_ses_enum(env_to_parent_env_mapper={"dev": "stgae"})
+        config = create_base_boto_ses_enum(env_to_parent_env_mapper={"dev": "devops"})
+        assert config.get_env_chain("dev") == ["devops", "dev"]
+
+    def test_from_runtime(self, monkeypatch):
+        """Test from_runtime fills the detected runtime flags."""
+        flags = {name: False for name in RUNTIME_FLAGS}
+        flags["is_ci_runtime_group"] = True
+        monkeypatch.setenv(RUNTIME_ENV_VAR, json.dumps(flags))
+        kwargs = dict(
+            dir_cache=None,
+            env_to_aws_profile_mapper={},
+            env_to_aws_region_mapper={"dev": "us-east-1", "devops": "us-east-1"},
+            default_app_env_name="dev",
+            devops_env_name="devops",
+            workload_role_name_prefix_in_ci="WorkloadRole-",
+            workload_role_name_suffix_in_ci="-Role",
+        )
+        config = BaseBotoSesEnum.from_runtime(**kwargs)
+        assert config.is_ci_runtime_group is True
+        assert config.is_local_runtime_group is False
+        assert config.is_local is False
+
+        # the keyword arguments override the detected flags
+        config = BaseBotoSesEnum.from_runtime(is_local=True, **kwargs)
+        assert config.is_local is True
+        assert config.is_ci_runtime_group is True
+
+    def test_get_env_credentials(self, tmp_path, local_sts, create_base_boto_ses_enum):
+        """Test get_env_credentials reads the credential cache first."""
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            credential_cache=CredentialCache(dir_cache=tmp_path),
+            sts_stand_in=local_sts,
+        )
+        # cold cache, resolve the session
+        credentials = config.get_env_credentials("prod")
+        assert credentials.region_name == "us-west-2"
+        assert local_sts.stats.assume_role == 1
+        assert config.instrumentation.get_count("credential_cache_hit") == 0
+
+        # warm cache, in a new process
+        new_config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            credential_cache=CredentialCache(dir_cache=tmp_path),
+            sts_stand_in=local_sts,
+        )
+        assert new_config.get_env_credentials("prod") == credentials
+        assert len(new_config._session_registry) == 0
+        assert new_config.instrumentation.get_count("credential_cache_hit") == 1
+        assert new_config.get_env_credentials("devops").region_name == "us-east-1"
+
+    def test_verify_identities(self, local_sts, monkeypatch, create_base_boto_ses_enum):
+        """Test verify_identities checks the account ID of each environment."""
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+        )
+        identities = config.verify_identities()
+        assert list(identities) == ["dev", "prod", "devops"]
+        assert identities["devops"].aws_account_id == "000000000000"
+        assert identities["dev"].aws_account_id == "123456789012"
+        assert identities["prod"].principal_arn.startswith(
+            "arn:aws:sts::987654321098:assumed-role/WorkloadRole-prod-Role/"
+        )
+        assert local_sts.stats.get_caller_identity == 3
+
+        # cached for the lifetime of the credentials
+        assert config.verify_identities(["prod", "dev"]) == {
+            "prod": identities["prod"],
+            "dev": identities["dev"],
+        }
+        assert local_sts.stats.get_caller_identity == 3
+        assert config.verify_identities([]) == {}
+
+        # the credentials of dev belong to another account
+        config._session_registry.clear()
+        get_caller_identity = local_sts.get_caller_identity
+
+        def wrong_account(access_key_id=None):
+            response = get_caller_identity(access_key_id)
+            if response["Account"] == "123456789012":
+                response["Account"] = "111122223333"
+            return response
+
+        monkeypatch.setattr(local_sts, "get_caller_identity", wrong_account)
+        with pytest.raises(ValueError, match="'dev' expects AWS account 123456789012"):
+            config.verify_identities(["dev", "prod"], max_workers=1)
+        assert "dev" not in config._verified_identities
+
+    def test_client_config(self, local_sts, monkeypatch, create_base_boto_ses_enum):
+        """Test the client config is merged at global, env and service level."""
+        config = create_base_boto_ses_enum(
+            env_to_aws_region_mapper={
+                "dev": ["us-east-1", "eu-west-1"],
+                "prod": "us-west-2",
+                "devops": "us-east-1",
+            },
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+            client_config={"tcp_keepalive": True, "retries": {"mode": "adaptive"}},
+            env_to_client_config_mapper={"prod": {"max_pool_connections": 50}},
+            service_to_client_config_mapper={
+                "s3": {"max_pool_connections": 100, "retries": {"max_attempts": 10}},
+            },
+        )
+        assert config.get_client_config_kwargs("prod", "s3") == {
+            "tcp_keepalive": True,
+            "retries": {"mode": "adaptive", "max_attempts": 10},
+            "max_pool_connections": 100,
+        }
+        assert create_base_boto_ses_enum().get_client_config("dev") is None
+
+        # the env level config is the session default
+        bsm_prod = config.get_env_bsm("prod")
+        sqs_client = bsm_prod.get_client("sqs")
+        assert sqs_client.meta.config.max_pool_connections == 50
+        assert sqs_client.meta.config.tcp_keepalive is True
+        assert sqs_client.meta.config.retries["mode"] == "adaptive"
+        assert config.bsm_devops.get_client("sqs").meta.config.max_pool_connections == 10
+        bsm_eu = config.get_env_bsm("dev", region="eu-west-1")
+        assert bsm_eu.get_client("sqs").meta.config.tcp_keepalive is True
+
+        # the service level config is applied by get_client
+        s3_client = config.get_client("prod", "s3")
+        assert s3_client.meta.config.max_pool_connections == 100
+        assert s3_client.meta.config.retries["mode"] == "adaptive"
+        assert s3_client.meta.config.retries["total_max_attempts"] == 11
+        s3_client = config.get_client("prod", "s3", config=Config(read_timeout=5))
+        assert s3_client.meta.config.max_pool_connections == 100
+        assert s3_client.meta.config.read_timeout == 5
+
+        # the configured Config is built once per environment and service
+        n_calls = list()
+        get_client_config = config.get_client_config
+        monkeypatch.setattr(
+            config,
+            "get_client_config",
+            lambda *args: n_calls.append(args) or get_client_config(*args),
+        )
+        s3_client = config.get_client("prod", "s3")
+        assert config.get_client("prod", "s3") is s3_client
+        assert config.get_client("dev", "s3").meta.config.max_pool_connections == 100
+        assert config.get_client("dev", "s3") is not s3_client
+        assert n_calls == [("dev", "s3")]
+
+    def test_sts_rate_limiter(self, tmp_path, ci_environ, create_base_boto_ses_enum):
+        """Test the throttled sts:AssumeRole calls are retried by the limiter."""
+        local_sts = LocalSts(throttle_probability=0.5, seed=1)
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+            sts_rate_limiter=RateLimiter(
+                rate=1000,
+                burst=1000,
+                dir_state=tmp_path,
+                max_attempts=20,
+                base_delay=0.001,
+            ),
+        )
+        config.get_env_bsm_many(["dev", "prod"])
+        assert local_sts.stats.assume_role == 2
+        assert local_sts.stats.throttled > 0
+        assert (
+            config.instrumentation.get_count("sts_throttled")
+            == local_sts.stats.throttled
+        )
+        assert config.to_snapshot([]).config["sts_rate_limiter"]["rate"] == 1000
+
+        # the throttled requests are not retried by botocore behind the limiter
+        local_sts = LocalSts(throttle_probability=0.5, seed=1)
+        with LocalStsServer(local_sts) as server:
+            config = create_base_boto_ses_enum(
+                is_local_runtime_group=False,
+                is_ci_runtime_group=True,
+                sts_stand_in=server,
+                sts_rate_limiter=RateLimiter(
+                    rate=1000,
+                    burst=1000,
+                    dir_state=tmp_path,
+                    name="sts-server",
+                    max_attempts=20,
+                    base_delay=0.001,
+                ),
+            )
+            config.get_env_bsm_many(["dev", "prod"])
+            assert local_sts.stats.assume_role == 2
+            assert local_sts.stats.throttled > 0
+            assert (
+                config.instrumentation.get_count("sts_throttled")
+                == local_sts.stats.throttled
+            )
+            # the session manager of the parent environment keeps its retries
+            sts_client = config.get_client(
+                "devops", "sts", config=Config(retries={"total_max_attempts": 1})
+            )
+            assert sts_client.meta.config.retries["total_max_attempts"] == 1
+            assert config.bsm_devops.sts_client is not sts_client
+
+    def test_share_botocore_loader(self, local_sts, create_base_boto_ses_enum):
+        """Test all the sessions use the shared botocore loader."""
+        config = create_base_boto_ses_enum(
+            env_to_aws_region_mapper={
+                "dev": ["us-east-1", "eu-west-1"],
+                "prod": "us-west-2",
+                "devops": "us-east-1",
+            },
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+        )
+        loader = get_shared_loader()
+        bsm_list = [
+            config.bsm_devops,
+            config.get_env_bsm("dev"),
+            config.get_env_bsm("dev", region="eu-west-1"),
+            config.get_env_bsm("prod"),
+        ]
+        for bsm in bsm_list:
+            assert bsm.boto_ses._session.get_component("data_loader") is loader
+        # the boto3 session is re-created with the shared loader
+        bsm_list[1].clear_cache()
+        assert bsm_list[1].boto_ses._loader is loader
+        # a boto3 session created before the setup is set up as well
+        bsm = BotoSesManager(region_name="us-east-1")
+        bsm.boto_ses
+        assert config._setup_bsm("dev", bsm).boto_ses._loader is loader
+
+        config = create_base_boto_ses_enum(
+            is_local_runtime_group=False,
+            is_ci_runtime_group=True,
+            sts_stand_in=local_sts,
+            share_botocore_loader=False,
+        )
+        bsm = config.get_env_bsm("dev")
+        assert bsm.boto_ses._session.get_component("data_loader") is not loader
+
 
 if __name__ == "__main__":
     from which_bsm.tests import run_cov_test
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+"""
+Import time regression check. ``import which_bsm.api`` should not import the
+AWS SDK, and should stay under :data:`IMPORT_TIME_BUDGET` seconds.
+"""
+
+import sys
+import json
+import subprocess
+
+IMPORT_TIME_BUDGET = 0.5
+
+CODE = """
+import sys
+import json
+import time
+
+start = time.perf_counter()
+import which_bsm.api
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": [
+        name
+        for name in ["boto3", "botocore", "boto_session_manager"]
+        if name in sys.modules
+    ],
+}))
+"""
+
+
+def test_import_time():
+    # run in a fresh interpreter, this process has already imported everything
+    res = subprocess.run(
+        [sys.executable, "-c", CODE],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    data = json.loads(res.stdout)
+    assert data["modules"] == []
+    assert data["elapsed"] < IMPORT_TIME_BUDGET
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.api",
+        preview=False,
+    )
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import boto3.session
+
+from which_bsm.loader import get_shared_loader, is_shared_loader, share_loader
+
+
+def test_share_loader():
+    loader = get_shared_loader()
+    assert get_shared_loader() is loader
+    assert is_shared_loader(loader) is True
+    assert is_shared_loader(None) is False
+
+    boto_ses_1 = boto3.session.Session(region_name="us-east-1")
+    boto_ses_2 = boto3.session.Session(region_name="us-east-1")
+    assert is_shared_loader(boto_ses_1._session.get_component("data_loader")) is False
+    share_loader(boto_ses_1)
+    share_loader(boto_ses_2)
+    assert boto_ses_1._session.get_component("data_loader") is loader
+    assert boto_ses_2._loader is loader
+    n_search_path = len(loader.search_paths)
+
+    # a new boto3 session on the same botocore session appends the boto3 data path
+    boto_ses_3 = boto3.session.Session(botocore_session=boto_ses_1._session)
+    share_loader(boto_ses_3)
+    assert len(loader.search_paths) == n_search_path
+
+    # the service models are loaded once
+    boto_ses_1.client("sqs")
+    boto_ses_2.client("sqs")
+    model_1 = boto_ses_1._session.get_service_data("sqs")
+    model_2 = boto_ses_2._session.get_service_data("sqs")
+    assert model_1 is model_2
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.loader",
+        preview=False,
+    )
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm.local_sts import LocalStsError, LocalSts, LocalStsServer
+
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from boto_session_manager import BotoSesManager
+
+
+@pytest.fixture
+def fake_credentials(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "AKIADEVOPS")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "secret")
+    monkeypatch.delenv("AWS_SESSION_TOKEN", raising=False)
+    monkeypatch.delenv("AWS_PROFILE", raising=False)
+
+
+ROLE_ARN = "arn:aws:iam::123456789012:role/WorkloadRole-dev"
+
+
+class TestLocalSts:
+    def test_assume_role(self):
+        local_sts = LocalSts()
+        res = local_sts.assume_role(ROLE_ARN, "dev_role_session")
+        access_key_id = res["Credentials"]["AccessKeyId"]
+        assert access_key_id.startswith("ASIA")
+        res = local_sts.get_caller_identity(access_key_id)
+        assert res["Account"] == "123456789012"
+        assert res["Arn"].endswith("assumed-role/WorkloadRole-dev/dev_role_session")
+        assert local_sts.get_caller_identity()["Account"] == "000000000000"
+        assert local_sts.stats.to_dict() == {
+            "assume_role": 1,
+            "get_caller_identity": 2,
+            "throttled": 0,
+        }
+        with pytest.raises(LocalStsError):
+            local_sts.assume_role("invalid", "dev_role_session")
+
+    def test_throttle(self):
+        local_sts = LocalSts(throttle_probability=1.0)
+        with pytest.raises(LocalStsError) as e:
+            local_sts.get_caller_identity()
+        assert e.value.code == "Throttling"
+
+        local_sts = LocalSts(max_requests_per_second=2)
+        local_sts.get_caller_identity()
+        local_sts.get_caller_identity()
+        with pytest.raises(LocalStsError):
+            local_sts.get_caller_identity()
+        assert local_sts.stats.throttled == 1
+
+    def test_attach(self, fake_credentials):
+        local_sts = LocalSts()
+        bsm = local_sts.attach(BotoSesManager(region_name="us-east-1"))
+        assert bsm.aws_account_id == "000000000000"
+        bsm_dev = bsm.assume_role(ROLE_ARN, "dev_role_session")
+        local_sts.attach(bsm_dev)
+        assert bsm_dev.aws_account_id == "123456789012"
+
+        local_sts.throttle_probability = 1.0
+        with pytest.raises(ClientError) as e:
+            bsm.assume_role(ROLE_ARN, "dev_role_session")
+        assert e.value.response["Error"]["Code"] == "Throttling"
+
+
+class TestLocalStsServer:
+    def test_attach(self, fake_credentials):
+        with LocalStsServer(LocalSts()) as server:
+            assert server.endpoint_url.startswith("http://127.0.0.1:")
+            bsm = server.attach(BotoSesManager(region_name="us-east-1"))
+            assert bsm.aws_account_id == "000000000000"
+            bsm_dev = bsm.assume_role(ROLE_ARN, "dev_role_session")
+            server.attach(bsm_dev)
+            assert bsm_dev.aws_account_id == "123456789012"
+            assert server.local_sts.stats.assume_role == 1
+
+            server.local_sts.throttle_probability = 1.0
+            client = bsm.boto_ses.client(
+                "sts",
+                config=Config(
+                    retries={"max_attempts": 1}
+                ),
+            )
+            with pytest.raises(ClientError) as e:
+                client.get_caller_identity()
+            assert e.value.response["Error"]["Code"] == "Throttling"
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.local_sts",
+        preview=False,
+    )
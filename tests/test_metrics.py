@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from which_bsm.metrics import (
+    OP_ASSUME_ROLE,
+    OP_SESSION_CACHE_HIT,
+    STATUS_ERROR,
+    Histogram,
+    Instrumentation,
+)
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    assert histogram.counts == [1, 2]
+    assert histogram.count == 3
+    assert histogram.to_dict()["buckets"] == {"0.1": 1, "1.0": 2}
+
+
+def test_instrumentation():
+    instrumentation = Instrumentation(buckets=(0.1, 1.0))
+    events = []
+    instrumentation.add_hook(events.append)
+
+    instrumentation.record(OP_SESSION_CACHE_HIT, "dev")
+    with instrumentation.measure(OP_ASSUME_ROLE, "dev"):
+        pass
+    with pytest.raises(RuntimeError):
+        with instrumentation.measure(OP_ASSUME_ROLE, "prd"):
+            raise RuntimeError
+
+    assert [event.operation for event in events] == [
+        OP_SESSION_CACHE_HIT,
+        OP_ASSUME_ROLE,
+        OP_ASSUME_ROLE,
+    ]
+    assert events[0].duration is None
+    assert events[1].duration >= 0
+    assert events[2].status == STATUS_ERROR
+    assert instrumentation.get_count(OP_ASSUME_ROLE) == 2
+    assert instrumentation.get_count(OP_ASSUME_ROLE, env_name="dev") == 1
+    assert instrumentation.get_count(OP_ASSUME_ROLE, status=STATUS_ERROR) == 1
+
+    data = instrumentation.to_dict()
+    assert len(data["counters"]) == 3
+    assert len(data["histograms"]) == 2
+
+    text = instrumentation.to_prometheus()
+    assert "# TYPE which_bsm_operations_total counter" in text
+    assert (
+        'which_bsm_operations_total{operation="session_cache_hit",env="dev",status="ok"} 1'
+        in text
+    )
+    assert (
+        'which_bsm_operation_duration_seconds_bucket{operation="assume_role",env="dev",status="ok",le="+Inf"} 1'
+        in text
+    )
+    assert "which_bsm_operation_duration_seconds_count" in text
+
+    instrumentation.remove_hook(events.append)
+    instrumentation.record(OP_SESSION_CACHE_HIT, "dev")
+    assert len(events) == 3
+
+    instrumentation.reset()
+    assert instrumentation.to_dict() == {"counters": [], "histograms": []}
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.metrics",
+        preview=False,
+    )
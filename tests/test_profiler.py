@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm.profiler import (
+    PHASE_GET_ENV_BSM,
+    PHASE_CREDENTIALS_RESOLVE,
+    StartupProfiler,
+    profile_bootstrap,
+)
+from which_bsm.local_sts import LocalSts
+
+import pstats
+
+import pytest
+
+
+def test_startup_profiler(tmp_path, ci_environ, create_base_boto_ses_enum):
+    boto_ses_enum = create_base_boto_ses_enum(
+        is_local_runtime_group=False,
+        is_ci_runtime_group=True,
+        sts_stand_in=LocalSts(latency=0.01),
+    )
+    path_cprofile = tmp_path / "startup.prof"
+    with StartupProfiler(cprofile_path=path_cprofile) as profiler:
+        profiler.watch(boto_ses_enum)
+        with profiler.phase("get_env_bsm"):
+            boto_ses_enum.get_env_bsm("dev")
+        with pytest.raises(ZeroDivisionError):
+            with profiler.phase("error"):
+                1 / 0
+    assert [phase.name for phase in profiler.phases] == ["get_env_bsm", "error"]
+    assert profiler.total >= 0.01
+    events = {(event.operation, event.env_name) for event in profiler.events}
+    assert ("assume_role", "dev") in events
+    assert ("session_build", "devops") in events
+    assert "assume_role" in profiler.format()
+    assert profiler.to_dict()["phases"][0]["name"] == "get_env_bsm"
+    pstats.Stats(str(path_cprofile))
+
+    # the hook is removed on exit
+    n_event = len(profiler.events)
+    boto_ses_enum.get_env_bsm("prod")
+    assert len(profiler.events) == n_event
+
+
+def test_profile_bootstrap(local_config):
+    profiler = profile_bootstrap(local_config, "dev", dir_config_cache=None)
+    assert [phase.name for phase in profiler.phases] == [
+        "runtime_detection",
+        "config_load",
+        "import_aws_sdk",
+        PHASE_GET_ENV_BSM,
+        "boto_session_create",
+        PHASE_CREDENTIALS_RESOLVE,
+    ]
+    assert [event.operation for event in profiler.events] == ["session_build"]
+    assert profiler.cprofile_path is None
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.profiler",
+        preview=False,
+    )
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from botocore.exceptions import ClientError
+
+from which_bsm.rate_limiter import is_throttling_error, RateLimiter
+
+
+def make_client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "AssumeRole")
+
+
+def test_is_throttling_error():
+    assert is_throttling_error(make_client_error("Throttling")) is True
+    assert is_throttling_error(make_client_error("AccessDenied")) is False
+    assert is_throttling_error(ValueError("Throttling")) is False
+
+
+def test_rate_limiter(tmp_path):
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0, dir_state=tmp_path)
+    with pytest.raises(ValueError):
+        RateLimiter(burst=0, dir_state=tmp_path)
+
+    limiter = RateLimiter(rate=1, burst=2, dir_state=tmp_path)
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == 0
+    assert 0 < limiter.try_acquire() <= 1
+
+    # another process shares the same bucket
+    other = RateLimiter(rate=1, burst=2, dir_state=tmp_path)
+    assert other.try_acquire() > 0
+    sleeps = []
+    other.acquire(sleep=sleeps.append)
+    assert len(sleeps) >= 1
+
+    limiter.clear()
+    assert limiter.try_acquire() == 0
+    limiter.drain()
+    assert limiter.try_acquire() > 0
+
+    # a corrupted state file is a full bucket
+    limiter.get_path().write_text("not json")
+    assert limiter.try_acquire() == 0
+
+
+def test_rate_limiter_call(tmp_path):
+    limiter = RateLimiter(
+        rate=1000,
+        burst=1000,
+        dir_state=tmp_path,
+        max_attempts=3,
+        base_delay=1,
+        max_delay=1.5,
+    )
+    sleeps = []
+    throttled = []
+    responses = [make_client_error("Throttling"), make_client_error("Throttling")]
+
+    def func():
+        if responses:
+            raise responses.pop(0)
+        return "ok"
+
+    result = limiter.call(func, sleep=sleeps.append, on_throttled=throttled.append)
+    assert result == "ok"
+    assert len(throttled) == 2
+    # backoff delays, refill waits after the drain are much shorter
+    backoff = [delay for delay in sleeps if delay > 0.01]
+    assert len(backoff) <= 2
+    assert all(delay <= 1.5 for delay in sleeps)
+
+    # give up after max_attempts
+    responses.extend([make_client_error("Throttling")] * 3)
+    with pytest.raises(ClientError):
+        limiter.call(func, sleep=lambda delay: None)
+    assert len(responses) == 0
+
+    # the other errors are not retried
+    responses.extend([make_client_error("AccessDenied"), "unused"])
+    with pytest.raises(ClientError):
+        limiter.call(func, sleep=lambda delay: None)
+    assert len(responses) == 1
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.rate_limiter",
+        preview=False,
+    )
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+import gc
+import time
+from datetime import datetime, timezone, timedelta
+
+from botocore.credentials import RefreshableCredentials
+
+from which_bsm.refresh import (
+    credentials_to_metadata,
+    CredentialRefresher,
+    create_refreshable_botocore_session,
+)
+
+
+class MetadataFetcher:
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.n_calls = 0
+
+    def __call__(self) -> dict:
+        self.n_calls += 1
+        expiration = datetime.now(timezone.utc) + timedelta(seconds=self.seconds)
+        return credentials_to_metadata(
+            {
+                "AccessKeyId": f"AKIA{self.n_calls}",
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": expiration.isoformat(),
+            }
+        )
+
+
+def wait_until(condition, timeout: float = 5.0):
+    start = time.time()
+    while time.time() - start < timeout:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_create_refreshable_botocore_session():
+    fetch_metadata = MetadataFetcher(seconds=2)
+    botocore_session, refresher = create_refreshable_botocore_session(
+        fetch_metadata=fetch_metadata,
+        refresh_margin=1,
+    )
+    try:
+        credentials = botocore_session.get_credentials()
+        assert credentials._access_key == "AKIA1"
+        assert refresher.is_alive
+        # the refresh happens in the background ahead of expiry
+        assert wait_until(lambda: fetch_metadata.n_calls >= 2)
+        assert wait_until(lambda: credentials._access_key != "AKIA1")
+    finally:
+        refresher.stop()
+    assert refresher.is_alive is False
+
+
+def test_credential_refresher():
+    fetch_metadata = MetadataFetcher(seconds=3600)
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=fetch_metadata(),
+        refresh_using=fetch_metadata,
+        method="test",
+    )
+    refresher = CredentialRefresher(credentials=credentials, refresh_margin=1200)
+    assert 2390 < refresher.get_seconds_until_refresh() <= 2400
+    # short lived credentials are refreshed at half of their lifetime
+    refresher.refresh_margin = 3000
+    assert 1790 < refresher.get_seconds_until_refresh() <= 1800
+
+    assert refresher.is_alive is False
+    assert refresher.start() is refresher
+    thread = refresher._thread
+    assert refresher.is_alive
+    refresher.start()
+    assert refresher._thread is thread
+    refresher.stop()
+    assert refresher.is_alive is False
+    # not due, the thread didn't refresh
+    assert fetch_metadata.n_calls == 1
+
+    assert refresher.refresh() is True
+    assert credentials.access_key == "AKIA2"
+    refresher.start()
+    assert refresher._thread is not thread
+    refresher.stop()
+    assert refresher.is_alive is False
+
+
+def test_credential_refresher_stop_on_gc():
+    fetch_metadata = MetadataFetcher(seconds=3600)
+    botocore_session, refresher = create_refreshable_botocore_session(
+        fetch_metadata=fetch_metadata,
+    )
+    assert refresher.get_seconds_until_refresh() > 0
+    del botocore_session
+    gc.collect()
+    assert refresher.get_seconds_until_refresh() is None
+    assert refresher.refresh() is False
+    refresher.stop()
+
+
+def test_credential_refresher_fork_jitter(monkeypatch):
+    fetch_metadata = MetadataFetcher(seconds=3600)
+    botocore_session, refresher = create_refreshable_botocore_session(
+        fetch_metadata=fetch_metadata,
+    )
+    refresher.stop()
+    assert refresher.fork_jitter == 600
+    # what the fork hook does in the child, with the largest jitter
+    monkeypatch.setattr("which_bsm.refresh.random.uniform", lambda a, b: b)
+    refresher = CredentialRefresher(
+        credentials=botocore_session.get_credentials(),
+        fork_jitter=3600,
+    )
+    refresher._first_wait_jitter = refresher.fork_jitter
+    refresher.start()
+    try:
+        assert wait_until(lambda: fetch_metadata.n_calls == 2)
+        assert refresher._first_wait_jitter == 0
+        # only the first wait is jittered
+        time.sleep(0.2)
+        assert fetch_metadata.n_calls == 2
+    finally:
+        refresher.stop()
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.refresh",
+        preview=False,
+    )
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from boto_session_manager import BotoSesManager
+
+from which_bsm.registry import SessionRegistry
+
+
+def test_session_registry():
+    registry = SessionRegistry()
+    n_calls = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            n_calls.append(1)
+        time.sleep(0.1)
+        return BotoSesManager(region_name="us-east-1")
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        bsm_list = list(
+            executor.map(lambda _: registry.get_or_create("dev", factory), range(32))
+        )
+    assert len(n_calls) == 1
+    assert len({id(bsm) for bsm in bsm_list}) == 1
+    assert "dev" in registry
+    assert len(registry) == 1
+    assert registry.get("dev") is bsm_list[0]
+    assert registry.items() == [("dev", bsm_list[0])]
+
+    # invalid session is re-created
+    bsm = registry.get_or_create("dev", factory, is_valid=lambda bsm: False)
+    assert bsm is not bsm_list[0]
+    assert len(n_calls) == 2
+    assert registry.get("dev", is_valid=lambda bsm: False) is None
+
+    registry.put("tst", bsm)
+    assert registry.pop("tst") is bsm
+    assert registry.pop("tst") is None
+    registry.clear()
+    assert len(registry) == 0
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.registry",
+        preview=False,
+    )
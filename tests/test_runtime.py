@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm import runtime
+from which_bsm.runtime import (
+    RUNTIME_ENV_VAR,
+    RUNTIME_FLAGS,
+    get_ci_job_id,
+    detect_runtime,
+    load_runtime,
+)
+
+import json
+
+
+def test_get_ci_job_id():
+    assert get_ci_job_id({}) is None
+    assert get_ci_job_id({"CI_JOB_ID": "42"}) == "42"
+    assert get_ci_job_id({"GITHUB_RUN_ID": "1", "GITHUB_JOB": "test"}) is None
+    assert (
+        get_ci_job_id(
+            {"GITHUB_RUN_ID": "1", "GITHUB_RUN_ATTEMPT": "2", "GITHUB_JOB": "test"}
+        )
+        == "1|2|test"
+    )
+
+
+def test_detect_runtime():
+    flags = detect_runtime()
+    assert set(flags) == set(RUNTIME_FLAGS)
+    assert all(isinstance(value, bool) for value in flags.values())
+
+
+def test_load_runtime(tmp_path, monkeypatch):
+    calls = []
+    flags = {name: False for name in RUNTIME_FLAGS}
+    flags["is_ci_runtime_group"] = True
+
+    def fake_detect_runtime():
+        calls.append(1)
+        return dict(flags)
+
+    monkeypatch.setattr(runtime, "detect_runtime", fake_detect_runtime)
+
+    # detect once, then publish to the environment variable and the cache file
+    environ = {"CI_JOB_ID": "42"}
+    assert load_runtime(environ=environ, dir_cache=tmp_path) == flags
+    assert json.loads(environ[RUNTIME_ENV_VAR]) == flags
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    # child process
+    assert load_runtime(environ=dict(environ), dir_cache=tmp_path) == flags
+    # another invocation in the same CI job
+    assert load_runtime(environ={"CI_JOB_ID": "42"}, dir_cache=tmp_path) == flags
+    assert len(calls) == 1
+
+    # another CI job
+    load_runtime(environ={"CI_JOB_ID": "43"}, dir_cache=tmp_path)
+    assert len(calls) == 2
+    # no CI job ID, no cache file
+    load_runtime(environ={}, dir_cache=tmp_path)
+    assert len(calls) == 3
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    # invalid value is ignored
+    load_runtime(environ={RUNTIME_ENV_VAR: '{"is_local": 1}'}, dir_cache=None)
+    load_runtime(environ={RUNTIME_ENV_VAR: "invalid"}, dir_cache=None)
+    assert len(calls) == 5
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.runtime",
+        preview=False,
+    )
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+from which_bsm.snapshot import SNAPSHOT_ENV_VAR, CredentialSnapshot, Snapshot
+
+import pickle
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+
+def make_credentials(expires_in: int) -> CredentialSnapshot:
+    expiration = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+    return CredentialSnapshot(
+        access_key_id="ASIAEXAMPLE",
+        secret_access_key="secret",
+        session_token="token",
+        expiration=expiration.isoformat(),
+        region_name="us-east-1",
+    )
+
+
+def test_credential_snapshot():
+    credentials = make_credentials(3600)
+    assert credentials.is_fresh() is True
+    assert make_credentials(60).is_fresh() is False
+    environ = credentials.to_environ()
+    assert environ["AWS_ACCESS_KEY_ID"] == "ASIAEXAMPLE"
+    assert environ["AWS_SESSION_TOKEN"] == "token"
+    assert environ["AWS_DEFAULT_REGION"] == "us-east-1"
+
+    bsm = credentials.to_bsm()
+    assert bsm.aws_region == "us-east-1"
+    assert bsm.expiration_time == credentials.get_expiration()
+    assert CredentialSnapshot.from_bsm(bsm) == credentials
+
+
+def test_snapshot():
+    snapshot = Snapshot(
+        config={"devops_env_name": "devops"},
+        credentials={"dev": make_credentials(3600), "prod": make_credentials(-1)},
+    )
+    assert pickle.loads(pickle.dumps(snapshot)) == snapshot
+    assert Snapshot.from_json(snapshot.to_json()) == snapshot
+
+    environ = snapshot.to_environ()
+    assert list(environ) == [SNAPSHOT_ENV_VAR]
+    assert Snapshot.from_environ(environ) == snapshot
+    assert Snapshot.from_environ({}) is None
+
+    environ = snapshot.to_environ("dev")
+    assert environ["AWS_ACCESS_KEY_ID"] == "ASIAEXAMPLE"
+    with pytest.raises(ValueError):
+        snapshot.to_environ("prod")
+    with pytest.raises(ValueError):
+        snapshot.to_environ("tst")
+
+
+if __name__ == "__main__":
+    from which_bsm.tests import run_cov_test
+
+    run_cov_test(
+        __file__,
+        "which_bsm.snapshot",
+        preview=False,
+    )
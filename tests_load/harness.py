@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+
+"""
+Load-test harness that simulates many concurrent CI jobs assuming roles.
+
+N worker processes (the CI jobs) × M threads each call ``get_env_bsm`` across
+the environments, against one :class:`which_bsm.local_sts.LocalStsServer`
+running in the parent process. The STS stand-in can be slowed down and rate
+limited like the real STS, so you can find the CI matrix size where STS
+starts rejecting calls, and how much the credential cache helps.
+
+Two modes:
+
+- ``step``: every call creates a new ``BaseBotoSesEnum``, like a CI job that
+  runs many short-lived scripts. Only the credential cache can save STS calls.
+- ``job``: the threads of a worker share one ``BaseBotoSesEnum``, like one
+  long-running CI job. The session cache saves STS calls too.
+
+Usage::
+
+    python tests_load/harness.py --processes 8 --threads 4 --iterations 20
+    python tests_load/harness.py --sts-max-rps 20 --no-credential-cache
+    python tests_load/harness.py --sts-max-rps 20 --no-credential-cache --sts-rate-limit 15
+"""
+
+import typing as T
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+import dataclasses
+import multiprocessing
+from pathlib import Path
+
+dir_here = Path(__file__).absolute().parent
+dir_project_root = dir_here.parent
+if str(dir_project_root) not in sys.path:  # pragma: no cover
+    sys.path.insert(0, str(dir_project_root))
+
+from which_bsm.api import BaseBotoSesEnum, CredentialCache, Instrumentation
+from which_bsm.local_sts import LocalSts, LocalStsServer
+from which_bsm.rate_limiter import RateLimiter
+from which_bsm.metrics import (
+    OP_SESSION_CACHE_HIT,
+    OP_SESSION_CACHE_MISS,
+    OP_CREDENTIAL_CACHE_HIT,
+    OP_CREDENTIAL_CACHE_MISS,
+    OP_STS_THROTTLED,
+)
+
+AWS_REGION = "us-east-1"
+MODE_STEP = "step"
+MODE_JOB = "job"
+
+
+@dataclasses.dataclass
+class LoadTestOptions:
+    """
+    :param processes: the number of worker processes, i.e. concurrent CI jobs
+    :param threads: the number of threads per worker process
+    :param iterations: the number of ``get_env_bsm`` calls per thread
+    :param n_env: the number of workload environments
+    :param mode: ``"step"`` or ``"job"``, see the module docstring
+    :param credential_cache: use a credential cache shared by all workers
+    :param sts_latency: the simulated STS latency in seconds
+    :param sts_max_rps: the STS requests per second limit, None for no limit
+    :param sts_throttle_probability: the probability of a random throttle
+    :param max_attempts: the botocore retry ``max_attempts`` for STS
+    :param sts_rate_limit: the requests per second of the ``sts_rate_limiter``
+        shared by all workers, None to disable it
+    :param sts_rate_limit_burst: the burst of the ``sts_rate_limiter``
+    """
+
+    processes: int = 4
+    threads: int = 4
+    iterations: int = 10
+    n_env: int = 3
+    mode: str = MODE_STEP
+    credential_cache: bool = True
+    sts_latency: float = 0.02
+    sts_max_rps: T.Optional[float] = None
+    sts_throttle_probability: float = 0.0
+    max_attempts: int = 3
+    sts_rate_limit: T.Optional[float] = None
+    sts_rate_limit_burst: int = 1
+
+    @property
+    def env_names(self) -> list[str]:
+        return [f"env{i}" for i in range(1, 1 + self.n_env)]
+
+
+@dataclasses.dataclass
+class LoadTestResult:
+    options: LoadTestOptions
+    duration: float
+    latencies: list[float]
+    errors: dict[str, int]
+    counters: dict[str, int]
+    sts_stats: dict[str, int]
+
+    @property
+    def n_call(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.n_call / self.duration
+
+    @property
+    def throttle_rate(self) -> float:
+        """
+        The ratio of STS requests rejected with ``Throttling``.
+        """
+        total = sum(self.sts_stats.values())
+        return self.sts_stats["throttled"] / total if total else 0.0
+
+    @property
+    def credential_cache_hit_rate(self) -> float:
+        hit = self.counters[OP_CREDENTIAL_CACHE_HIT]
+        total = hit + self.counters[OP_CREDENTIAL_CACHE_MISS]
+        return hit / total if total else 0.0
+
+    @property
+    def session_cache_hit_rate(self) -> float:
+        hit = self.counters[OP_SESSION_CACHE_HIT]
+        total = hit + self.counters[OP_SESSION_CACHE_MISS]
+        return hit / total if total else 0.0
+
+    def to_dict(self) -> dict[str, T.Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "options": dataclasses.asdict(self.options),
+            "duration": self.duration,
+            "n_call": self.n_call,
+            "n_error": sum(self.errors.values()),
+            "errors": self.errors,
+            "throughput": self.throughput,
+            "latency_ms": {
+                "p50": percentile(latencies, 50) * 1000,
+                "p95": percentile(latencies, 95) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+                "max": (latencies[-1] if latencies else 0.0) * 1000,
+            },
+            "sts": self.sts_stats,
+            "throttle_rate": self.throttle_rate,
+            "credential_cache_hit_rate": self.credential_cache_hit_rate,
+            "session_cache_hit_rate": self.session_cache_hit_rate,
+        }
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Linear interpolated percentile of an ascending sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100
+    f = int(k)
+    c = min(f + 1, len(sorted_values) - 1)
+    return sorted_values[f] + (sorted_values[c] - sorted_values[f]) * (k - f)
+
+
+def new_boto_ses_enum(
+    options: LoadTestOptions,
+    port: int,
+    dir_cache: T.Optional[str],
+    dir_rate_limiter: str,
+    instrumentation: Instrumentation,
+) -> BaseBotoSesEnum:
+    env_names = options.env_names
+    all_env_names = ["devops", *env_names]
+    if dir_cache is None:
+        credential_cache = None
+    else:
+        credential_cache = CredentialCache(dir_cache=Path(dir_cache))
+    if options.sts_rate_limit is None:
+        sts_rate_limiter = None
+    else:
+        sts_rate_limiter = RateLimiter(
+            rate=options.sts_rate_limit,
+            burst=options.sts_rate_limit_burst,
+            dir_state=Path(dir_rate_limiter),
+        )
+    return BaseBotoSesEnum(
+        env_to_aws_profile_mapper={},
+        env_to_aws_region_mapper={env_name: AWS_REGION for env_name in all_env_names},
+        default_app_env_name=env_names[0],
+        devops_env_name="devops",
+        workload_role_name_prefix_in_ci="load_",
+        workload_role_name_suffix_in_ci="_deployer",
+        is_local_runtime_group=False,
+        is_ci_runtime_group=True,
+        is_local=False,
+        is_cloud9=False,
+        is_ec2=False,
+        is_lambda=False,
+        is_batch=False,
+        is_ecs=False,
+        is_glue=False,
+        credential_cache=credential_cache,
+        sts_rate_limiter=sts_rate_limiter,
+        instrumentation=instrumentation,
+        sts_stand_in=LocalStsServer(port=port),
+    )
+
+
+def run_worker(
+    worker_index: int,
+    options: LoadTestOptions,
+    port: int,
+    dir_cache: T.Optional[str],
+    dir_rate_limiter: str,
+) -> dict[str, T.Any]:
+    """
+    The worker process entry point, run ``options.threads`` threads that each
+    call ``get_env_bsm`` ``options.iterations`` times.
+    """
+    from botocore.exceptions import ClientError
+
+    env_names = options.env_names
+    instrumentation = Instrumentation()
+    lock = threading.Lock()
+    latencies: list[float] = list()
+    errors: dict[str, int] = dict()
+
+    def new() -> BaseBotoSesEnum:
+        return new_boto_ses_enum(
+            options, port, dir_cache, dir_rate_limiter, instrumentation
+        )
+
+    shared_enum = new()
+
+    def run_thread(thread_index: int):
+        for i in range(options.iterations):
+            env_name = env_names[(worker_index + thread_index + i) % len(env_names)]
+            if options.mode == MODE_JOB:
+                bse = shared_enum
+            else:
+                bse = new()
+            start = time.perf_counter()
+            try:
+                bse.get_env_bsm(env_name)
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code", "Unknown")
+                with lock:
+                    errors[code] = errors.get(code, 0) + 1
+            else:
+                duration = time.perf_counter() - start
+                with lock:
+                    latencies.append(duration)
+
+    threads = [
+        threading.Thread(target=run_thread, args=(thread_index,))
+        for thread_index in range(options.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "latencies": latencies,
+        "errors": errors,
+        "counters": {
+            op: instrumentation.get_count(op)
+            for op in [
+                OP_SESSION_CACHE_HIT,
+                OP_SESSION_CACHE_MISS,
+                OP_CREDENTIAL_CACHE_HIT,
+                OP_CREDENTIAL_CACHE_MISS,
+                OP_STS_THROTTLED,
+            ]
+        },
+    }
+
+
+@contextlib.contextmanager
+def offline_aws_environment(options: LoadTestOptions):
+    """
+    Temporarily set up the environment variables inherited by the worker
+    processes: fake devops credentials, the workload AWS account IDs, the
+    STS retry settings, and no AWS config file nor instance metadata.
+    """
+    backup = dict(os.environ)
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        path_config = Path(dir_tmp) / "config"
+        path_config.write_text("")
+        try:
+            for key in list(os.environ):
+                if key.startswith("AWS_"):
+                    os.environ.pop(key)
+            os.environ["AWS_CONFIG_FILE"] = str(path_config)
+            os.environ["AWS_SHARED_CREDENTIALS_FILE"] = str(path_config)
+            os.environ["AWS_EC2_METADATA_DISABLED"] = "true"
+            os.environ["AWS_ACCESS_KEY_ID"] = "AKIALOADTEST"
+            os.environ["AWS_SECRET_ACCESS_KEY"] = "secret"
+            os.environ["AWS_MAX_ATTEMPTS"] = str(options.max_attempts)
+            os.environ["AWS_RETRY_MODE"] = "standard"
+            for i, env_name in enumerate(options.env_names, start=1):
+                os.environ[f"{env_name.upper()}_AWS_ACCOUNT_ID"] = str(i).zfill(12)
+            yield dir_tmp
+        finally:
+            os.environ.clear()
+            os.environ.update(backup)
+
+
+def run_load_test(options: LoadTestOptions) -> LoadTestResult:
+    """
+    Start the STS stand-in, run the worker processes and collect the result.
+    """
+    local_sts = LocalSts(
+        latency=options.sts_latency,
+        throttle_probability=options.sts_throttle_probability,
+        max_requests_per_second=options.sts_max_rps,
+    )
+    with offline_aws_environment(options) as dir_tmp:
+        if options.credential_cache:
+            dir_cache = str(Path(dir_tmp) / "credentials")
+        else:
+            dir_cache = None
+        dir_rate_limiter = str(Path(dir_tmp) / "rate_limiter")
+        # spawn a fresh interpreter per worker, like separate CI jobs
+        context = multiprocessing.get_context("spawn")
+        with LocalStsServer(local_sts) as server:
+            with context.Pool(processes=options.processes) as pool:
+                start = time.perf_counter()
+                worker_results = pool.starmap(
+                    run_worker,
+                    [
+                        (worker_index, options, server.port, dir_cache, dir_rate_limiter)
+                        for worker_index in range(options.processes)
+                    ],
+                )
+                duration = time.perf_counter() - start
+
+    latencies = list()
+    errors = dict()
+    counters = dict()
+    for worker_result in worker_results:
+        latencies.extend(worker_result["latencies"])
+        for code, count in worker_result["errors"].items():
+            errors[code] = errors.get(code, 0) + count
+        for op, count in worker_result["counters"].items():
+            counters[op] = counters.get(op, 0) + count
+    return LoadTestResult(
+        options=options,
+        duration=duration,
+        latencies=latencies,
+        errors=errors,
+        counters=counters,
+        sts_stats=local_sts.stats.to_dict(),
+    )
+
+
+def print_report(result: LoadTestResult):
+    data = result.to_dict()
+    options = result.options
+    print(
+        f"{options.processes} processes x {options.threads} threads x "
+        f"{options.iterations} iterations, {options.n_env} envs, mode={options.mode}, "
+        f"credential_cache={options.credential_cache}"
+    )
+    print(f"calls                     {data['n_call']} ({data['n_error']} errors: {data['errors']})")
+    print(f"throughput                {data['throughput']:.1f} calls/s")
+    latency = data["latency_ms"]
+    print(
+        f"latency ms                p50={latency['p50']:.1f} p95={latency['p95']:.1f} "
+        f"p99={latency['p99']:.1f} max={latency['max']:.1f}"
+    )
+    print(f"sts requests              {data['sts']}")
+    print(f"sts throttle rate         {data['throttle_rate']:.1%}")
+    print(f"sts throttled and retried {result.counters[OP_STS_THROTTLED]}")
+    print(f"credential cache hit rate {data['credential_cache_hit_rate']:.1%}")
+    print(f"session cache hit rate    {data['session_cache_hit_rate']:.1%}")
+
+
+def main(args: T.Optional[list[str]] = None):  # pragma: no cover
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    defaults = LoadTestOptions()
+    parser.add_argument("--processes", type=int, default=defaults.processes)
+    parser.add_argument("--threads", type=int, default=defaults.threads)
+    parser.add_argument("--iterations", type=int, default=defaults.iterations)
+    parser.add_argument("--n-env", type=int, default=defaults.n_env)
+    parser.add_argument("--mode", choices=[MODE_STEP, MODE_JOB], default=defaults.mode)
+    parser.add_argument(
+        "--no-credential-cache",
+        dest="credential_cache",
+        action="store_false",
+    )
+    parser.add_argument("--sts-latency", type=float, default=defaults.sts_latency)
+    parser.add_argument("--sts-max-rps", type=float, default=defaults.sts_max_rps)
+    parser.add_argument(
+        "--sts-throttle-probability",
+        type=float,
+        default=defaults.sts_throttle_probability,
+    )
+    parser.add_argument("--max-attempts", type=int, default=defaults.max_attempts)
+    parser.add_argument("--sts-rate-limit", type=float, default=defaults.sts_rate_limit)
+    parser.add_argument(
+        "--sts-rate-limit-burst",
+        type=int,
+        default=defaults.sts_rate_limit_burst,
+    )
+    parser.add_argument("--output", help="write the result as JSON to this file")
+    ns = parser.parse_args(args)
+    kwargs = vars(ns)
+    output = kwargs.pop("output")
+    result = run_load_test(LoadTestOptions(**kwargs))
+    print_report(result)
+    if output:
+        Path(output).write_text(json.dumps(result.to_dict(), indent=4))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
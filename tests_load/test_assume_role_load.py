@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+from harness import (
+    MODE_STEP,
+    MODE_JOB,
+    LoadTestOptions,
+    run_load_test,
+    print_report,
+)
+
+
+def test_step_mode_with_credential_cache():
+    options = LoadTestOptions(
+        processes=2,
+        threads=2,
+        iterations=3,
+        mode=MODE_STEP,
+        credential_cache=True,
+    )
+    result = run_load_test(options)
+    print_report(result)
+    assert result.errors == {}
+    assert result.n_call == 12
+    # the workers share one credential set per environment
+    assert result.sts_stats["assume_role"] == options.n_env
+    assert result.credential_cache_hit_rate > 0
+
+
+def test_job_mode_without_credential_cache():
+    options = LoadTestOptions(
+        processes=2,
+        threads=4,
+        iterations=3,
+        mode=MODE_JOB,
+        credential_cache=False,
+    )
+    result = run_load_test(options)
+    print_report(result)
+    assert result.errors == {}
+    assert result.sts_stats["assume_role"] == options.processes * options.n_env
+    assert result.session_cache_hit_rate > 0
+
+
+def test_throttling():
+    options = LoadTestOptions(
+        processes=1,
+        threads=2,
+        iterations=2,
+        credential_cache=False,
+        sts_latency=0,
+        sts_throttle_probability=1.0,
+        max_attempts=1,
+    )
+    result = run_load_test(options)
+    print_report(result)
+    assert result.errors == {"Throttling": 4}
+    assert result.throttle_rate == 1.0
+
+
+def test_shared_rate_limiter():
+    options = LoadTestOptions(
+        processes=3,
+        threads=2,
+        iterations=2,
+        credential_cache=False,
+        sts_latency=0,
+        sts_max_rps=4,
+        max_attempts=1,
+        sts_rate_limit=3,
+        sts_rate_limit_burst=1,
+    )
+    result = run_load_test(options)
+    print_report(result)
+    # the workers share one STS budget below the STS limit
+    assert result.errors == {}
+    assert result.sts_stats["assume_role"] == 12
+
+
+if __name__ == "__main__":
+    import pytest
+
+    pytest.main([__file__, "-s"])
@@ -2,3 +2,12 @@
 
 from .impl import get_aws_account_id_in_ci
 from .impl import BaseBotoSesEnum
+from .credential_cache import CredentialCache
+from .client_pool import ClientPoolStats
+from .topology import EnvSpec
+from .topology import EnvTopology
+from .metrics import Event
+from .metrics import Instrumentation
+from .snapshot import CredentialSnapshot
+from .snapshot import Snapshot
+from .identity import CallerIdentity
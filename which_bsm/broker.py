@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""
+Local credential broker for CI jobs.
+
+In a CI job, many tools (Python scripts, the AWS CLI, Terraform, ...) need
+the same workload role credentials, and each of them would assume the role
+on its own. :class:`CredentialBroker` assumes the roles once with a
+``BaseBotoSesEnum``, keeps them refreshed in the background, and serves them
+on ``127.0.0.1`` in the container credential provider format. Every AWS SDK
+and the AWS CLI read it when these environment variables are set::
+
+    AWS_CONTAINER_CREDENTIALS_FULL_URI=http://127.0.0.1:${port}/${env_name}
+    AWS_CONTAINER_AUTHORIZATION_TOKEN=${token}
+
+See :meth:`CredentialBroker.to_environ`.
+"""
+
+import typing as T
+import json
+import hmac
+import secrets
+import threading
+from datetime import timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from .snapshot import CredentialSnapshot
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from .impl import BaseBotoSesEnum
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def log_message(self, format, *args):  # pragma: no cover
+        pass
+
+    def _send_json(self, status_code: int, data: dict[str, T.Any]):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        broker = self.server.broker
+        token = self.headers.get("Authorization", "")
+        if not hmac.compare_digest(token, broker.token):
+            self._send_json(401, {"code": "Unauthorized", "message": "Invalid token"})
+            return
+        env_name = self.path.strip("/")
+        if env_name not in broker.env_names:
+            self._send_json(
+                404,
+                {"code": "NotFound", "message": f"Unknown environment {env_name!r}"},
+            )
+            return
+        try:
+            data = broker.get_credentials(env_name)
+        except Exception as e:  # pragma: no cover
+            self._send_json(500, {"code": type(e).__name__, "message": str(e)})
+            return
+        self._send_json(200, data)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    broker: "CredentialBroker"
+
+
+class CredentialBroker:
+    """
+    Serve the credentials of many environments on ``127.0.0.1``.
+
+    :param boto_ses_enum: the ``BaseBotoSesEnum`` to get the sessions from.
+        Enable its ``background_refresh`` so the served credentials never
+        get close to expiry.
+    :param env_names: the environments to serve
+    :param token: the authorization token the clients have to send,
+        a random one is generated by default
+    :param port: the port to listen on, 0 to pick a free port
+    """
+
+    def __init__(
+        self,
+        boto_ses_enum: "BaseBotoSesEnum",
+        env_names: T.Iterable[str],
+        token: T.Optional[str] = None,
+        port: int = 0,
+    ):
+        self.boto_ses_enum = boto_ses_enum
+        self.env_names = list(dict.fromkeys(env_names))
+        if token is None:
+            token = secrets.token_urlsafe(32)
+        self.token = token
+        self.port = port
+        self._server: T.Optional[_Server] = None
+        self._thread: T.Optional[threading.Thread] = None
+
+    def get_url(self, env_name: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{env_name}"
+
+    def get_credentials(self, env_name: str) -> dict[str, str]:
+        """
+        Get the credentials of the environment in the container credential
+        provider response format.
+        """
+        bsm = self.boto_ses_enum.get_env_bsm(env_name)
+        credentials = CredentialSnapshot.from_bsm(bsm)
+        expiration = credentials.get_expiration().astimezone(timezone.utc)
+        data = {
+            "AccessKeyId": credentials.access_key_id,
+            "SecretAccessKey": credentials.secret_access_key,
+            "Expiration": expiration.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        if credentials.session_token:
+            data["Token"] = credentials.session_token
+        return data
+
+    def to_environ(self, env_name: str) -> dict[str, str]:
+        """
+        The environment variables that point the AWS SDKs and CLI to the
+        credentials of ``env_name``.
+        """
+        return {
+            "AWS_CONTAINER_CREDENTIALS_FULL_URI": self.get_url(env_name),
+            "AWS_CONTAINER_AUTHORIZATION_TOKEN": self.token,
+            "AWS_REGION": self.boto_ses_enum.get_aws_region(env_name),
+            "AWS_DEFAULT_REGION": self.boto_ses_enum.get_aws_region(env_name),
+        }
+
+    def start(self) -> "CredentialBroker":
+        """
+        Assume the roles of all environments concurrently, then start serving
+        in a daemon thread.
+        """
+        self.boto_ses_enum.get_env_bsm_many(self.env_names)
+        self._server = _Server(("127.0.0.1", self.port), _Handler)
+        self._server.broker = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="which_bsm-credential-broker",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> "CredentialBroker":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
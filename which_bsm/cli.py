@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""
+The ``which-bsm`` command line interface.
+
+Usage::
+
+    # serve the credentials of dev and prd to every process in the CI job
+    which-bsm --config which_bsm.json broker --env dev --env prd > broker.sh &
+    until [ -s broker.sh ]; do sleep 0.1; done
+    source broker.sh
+
+    # credentials of one environment for a shell script
+    eval "$(which-bsm --config which_bsm.json export-env --env prd)"
+
+    # ~/.aws/config
+    # credential_process = which-bsm --config /path/to/which_bsm.json credential-process --env prd
+
+    # where the startup time goes
+    which-bsm --config which_bsm.json profile --env dev --cprofile startup.prof
+
+In CI, ``export-env`` and ``credential-process`` read the credential cache
+without importing boto3 when it is warm.
+"""
+
+import typing as T
+import os
+import sys
+import json
+import shlex
+import signal
+import argparse
+import threading
+from pathlib import Path
+
+from .config import dir_default_config_cache
+
+#: the environment variable of the default ``--config`` value
+CONFIG_ENV_VAR = "WHICH_BSM_CONFIG"
+#: the environment variable of the default ``broker --token`` value
+BROKER_TOKEN_ENV_VAR = "WHICH_BSM_BROKER_TOKEN"
+
+
+def load_boto_ses_enum(
+    path: str,
+    use_credential_cache: bool = False,
+    dir_config_cache: T.Optional[T.Union[str, Path]] = dir_default_config_cache,
+    **kwargs,
+):
+    """
+    Create a ``BaseBotoSesEnum`` from a JSON or TOML config file, through the
+    validated config cache of :func:`~which_bsm.config.load_config`. The
+    runtime flags missing in the config file are filled by
+    :func:`~which_bsm.runtime.load_runtime`.
+
+    :param use_credential_cache: use the default
+        :class:`~which_bsm.credential_cache.CredentialCache` if the config
+        file doesn't set one
+    :param dir_config_cache: the validated config cache directory, None to
+        disable the cache
+
+    :param kwargs: override the config file values
+    """
+    from .impl import BaseBotoSesEnum
+    from .config import validate_config, load_config
+    from .credential_cache import CredentialCache
+    from .runtime import load_runtime
+
+    data = {
+        **load_config(
+            BaseBotoSesEnum,
+            path,
+            dir_cache=dir_config_cache,
+            defaults=load_runtime(),
+        ),
+        **validate_config(BaseBotoSesEnum, kwargs, check_missing=False),
+    }
+    if use_credential_cache and data.get("credential_cache") is None:
+        data["credential_cache"] = CredentialCache()
+    return BaseBotoSesEnum(**data)
+
+
+def format_exports(environ: dict[str, str]) -> str:
+    return "".join(
+        f"export {key}={shlex.quote(value)}\n" for key, value in environ.items()
+    )
+
+
+def get_credentials_uri_env_var_name(env_name: str) -> str:
+    return f"WHICH_BSM_{env_name.upper()}_CREDENTIALS_FULL_URI"
+
+
+def run_broker(ns: argparse.Namespace):
+    from .broker import CredentialBroker
+
+    boto_ses_enum = load_boto_ses_enum(
+        ns.config,
+        dir_config_cache=ns.config_cache_dir,
+        background_refresh=True,
+    )
+    broker = CredentialBroker(
+        boto_ses_enum=boto_ses_enum,
+        env_names=ns.env,
+        token=ns.token,
+        port=ns.port,
+    )
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    with broker:
+        # the first environment is the default one
+        environ = broker.to_environ(broker.env_names[0])
+        for env_name in broker.env_names:
+            environ[get_credentials_uri_env_var_name(env_name)] = broker.get_url(
+                env_name
+            )
+        sys.stdout.write(format_exports(environ))
+        sys.stdout.flush()
+        try:
+            stop_event.wait()
+        except KeyboardInterrupt:  # pragma: no cover
+            pass
+
+
+def run_export_env(ns: argparse.Namespace):
+    boto_ses_enum = load_boto_ses_enum(
+        ns.config,
+        use_credential_cache=ns.credential_cache,
+        dir_config_cache=ns.config_cache_dir,
+    )
+    credentials = boto_ses_enum.get_env_credentials(ns.env)
+    sys.stdout.write(format_exports(credentials.to_environ()))
+
+
+def run_credential_process(ns: argparse.Namespace):
+    boto_ses_enum = load_boto_ses_enum(
+        ns.config,
+        use_credential_cache=ns.credential_cache,
+        dir_config_cache=ns.config_cache_dir,
+    )
+    credentials = boto_ses_enum.get_env_credentials(ns.env)
+    data = {
+        "Version": 1,
+        "AccessKeyId": credentials.access_key_id,
+        "SecretAccessKey": credentials.secret_access_key,
+        "Expiration": credentials.expiration,
+    }
+    if credentials.session_token:
+        data["SessionToken"] = credentials.session_token
+    sys.stdout.write(json.dumps(data) + "\n")
+
+
+def run_profile(ns: argparse.Namespace):
+    from .profiler import profile_bootstrap
+
+    profiler = profile_bootstrap(
+        ns.config,
+        ns.env,
+        use_credential_cache=ns.credential_cache,
+        dir_config_cache=ns.config_cache_dir,
+        cprofile_path=ns.cprofile,
+    )
+    if ns.json:
+        sys.stdout.write(json.dumps(profiler.to_dict(), indent=4) + "\n")
+    else:
+        sys.stdout.write(profiler.format() + "\n")
+        if ns.cprofile:
+            sys.stdout.write(f"\ncProfile stats are written to {ns.cprofile}\n")
+
+
+def add_credential_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--env", required=True, help="the environment name")
+    parser.add_argument(
+        "--no-credential-cache",
+        dest="credential_cache",
+        action="store_false",
+        help="don't use the default credential cache when the config file "
+        "doesn't set one",
+    )
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="which-bsm",
+        description="Boto session manager tools for multi-environment AWS projects.",
+    )
+    parser.add_argument(
+        "--config",
+        default=os.environ.get(CONFIG_ENV_VAR),
+        help=f"the JSON or TOML config file, default to ${CONFIG_ENV_VAR}",
+    )
+    parser.add_argument(
+        "--config-cache-dir",
+        default=dir_default_config_cache,
+        help=f"the validated config cache directory, default to {dir_default_config_cache}",
+    )
+    parser.add_argument(
+        "--no-config-cache",
+        dest="config_cache_dir",
+        action="store_const",
+        const=None,
+        help="parse and validate the config file on every call",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    broker = subparsers.add_parser(
+        "broker",
+        help="assume roles once and serve the credentials on 127.0.0.1 "
+        "for AWS_CONTAINER_CREDENTIALS_FULL_URI",
+    )
+    broker.add_argument(
+        "--env",
+        action="append",
+        required=True,
+        help="the environment to serve, can be repeated, the first one is the default",
+    )
+    broker.add_argument("--port", type=int, default=0, help="default to a free port")
+    broker.add_argument(
+        "--token",
+        default=os.environ.get(BROKER_TOKEN_ENV_VAR),
+        help=f"the authorization token, default to ${BROKER_TOKEN_ENV_VAR} or a random one",
+    )
+    broker.set_defaults(func=run_broker)
+
+    export_env = subparsers.add_parser(
+        "export-env",
+        help="print the credentials of an environment as shell export lines",
+    )
+    add_credential_arguments(export_env)
+    export_env.set_defaults(func=run_export_env)
+
+    credential_process = subparsers.add_parser(
+        "credential-process",
+        help="print the credentials of an environment in the AWS CLI "
+        "credential_process format",
+    )
+    add_credential_arguments(credential_process)
+    credential_process.set_defaults(func=run_credential_process)
+
+    profile = subparsers.add_parser(
+        "profile",
+        help="run the get_env_bsm bootstrap of an environment and print "
+        "the phase-level timings",
+    )
+    add_credential_arguments(profile)
+    profile.add_argument("--cprofile", help="write the cProfile stats to this file")
+    profile.add_argument("--json", action="store_true", help="print as JSON")
+    profile.set_defaults(func=run_profile)
+    return parser
+
+
+def main(args: T.Optional[list[str]] = None):
+    parser = make_parser()
+    ns = parser.parse_args(args)
+    if not ns.config:
+        parser.error(f"--config or ${CONFIG_ENV_VAR} is required")
+    ns.func(ns)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+"""
+Bounded LRU pool of boto3 clients.
+
+Creating a boto3 client loads the service model and resolves the endpoint,
+which costs tens of milliseconds. :class:`ClientPool` memoizes the clients
+keyed by environment, service, region and config, and evicts the least
+recently used ones once the pool is full.
+"""
+
+import typing as T
+import json
+import threading
+import dataclasses
+from collections import OrderedDict
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from botocore.client import BaseClient
+    from botocore.config import Config
+    from boto_session_manager import BotoSesManager
+
+
+def make_config_key(config: T.Optional["Config"]) -> str:
+    """
+    Generate a hashable key for a botocore ``Config`` object, two configs
+    with the same user provided options have the same key.
+    """
+    if config is None:
+        return ""
+    return json.dumps(config._user_provided_options, sort_keys=True, default=repr)
+
+
+def merge_client_config_kwargs(*kwargs_list: dict[str, T.Any]) -> dict[str, T.Any]:
+    """
+    Merge the botocore ``Config`` keyword arguments, the later ones win.
+    The dictionary options such as ``retries`` or ``s3`` are merged key by key.
+    """
+    merged = dict()
+    for kwargs in kwargs_list:
+        for key, value in kwargs.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = {**merged[key], **value}
+            else:
+                merged[key] = value
+    return merged
+
+
+@dataclasses.dataclass
+class ClientPoolStats:
+    """
+    The hit / miss counters of a :class:`ClientPool`.
+    """
+
+    hits: int = dataclasses.field(default=0)
+    misses: int = dataclasses.field(default=0)
+    evictions: int = dataclasses.field(default=0)
+    size: int = dataclasses.field(default=0)
+    max_size: int = dataclasses.field(default=0)
+
+    def to_dict(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
+
+
+class ClientPool:
+    """
+    A thread-safe, bounded LRU cache of boto3 clients.
+
+    Each pooled client remembers the boto session manager it was created from.
+    When the boto session manager of an environment is re-created (for example
+    because it expired), the stale client is replaced on the next access.
+
+    The per-thread clients live in a ``threading.local``, outside of the LRU
+    cache, they are released when their thread exits.
+
+    :param max_size: the maximum number of clients in the pool
+    """
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._key_locks: dict[T.Hashable, threading.Lock] = dict()
+        self._clients: "OrderedDict[T.Hashable, tuple[BotoSesManager, BaseClient]]" = (
+            OrderedDict()
+        )
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_thread_clients(
+        self,
+    ) -> dict[T.Hashable, tuple["BotoSesManager", "BaseClient"]]:
+        try:
+            return self._local.clients
+        except AttributeError:
+            self._local.clients = dict()
+            return self._local.clients
+
+    def _get_key_lock(self, key: T.Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _get(self, key: T.Hashable, bsm: "BotoSesManager") -> T.Optional["BaseClient"]:
+        with self._lock:
+            try:
+                owner, client = self._clients[key]
+            except KeyError:
+                return None
+            if owner is not bsm:
+                return None
+            self._clients.move_to_end(key)
+            self.hits += 1
+            return client
+
+    def get_or_create(
+        self,
+        key: T.Hashable,
+        bsm: "BotoSesManager",
+        factory: T.Callable[[], "BaseClient"],
+        per_thread: bool = False,
+    ) -> "BaseClient":
+        """
+        Get the pooled client, or create it with ``factory``.
+
+        :param key: the pool key
+        :param bsm: the boto session manager the client is created from
+        :param factory: a callable that creates the client
+        :param per_thread: if True, the client is only shared within the
+            current thread
+        """
+        if per_thread:
+            return self._get_or_create_per_thread(key, bsm, factory)
+        client = self._get(key, bsm)
+        if client is not None:
+            return client
+        # avoid creating the same client twice
+        with self._get_key_lock(key):
+            client = self._get(key, bsm)
+            if client is not None:
+                return client
+            client = factory()
+            with self._lock:
+                self.misses += 1
+                self._clients[key] = (bsm, client)
+                self._clients.move_to_end(key)
+                while len(self._clients) > self.max_size:
+                    evicted_key, _ = self._clients.popitem(last=False)
+                    self._key_locks.pop(evicted_key, None)
+                    self.evictions += 1
+            return client
+
+    def _get_or_create_per_thread(
+        self,
+        key: T.Hashable,
+        bsm: "BotoSesManager",
+        factory: T.Callable[[], "BaseClient"],
+    ) -> "BaseClient":
+        clients = self._get_thread_clients()
+        try:
+            owner, client = clients[key]
+        except KeyError:
+            owner, client = None, None
+        if owner is bsm:
+            with self._lock:
+                self.hits += 1
+            return client
+        client = factory()
+        clients[key] = (bsm, client)
+        with self._lock:
+            self.misses += 1
+        return client
+
+    def stats(self) -> ClientPoolStats:
+        with self._lock:
+            return ClientPoolStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=len(self._clients),
+                max_size=self.max_size,
+            )
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._key_locks.clear()
+            self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self._clients)
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+"""
+Load ``BaseBotoSesEnum`` configuration from JSON / TOML files.
+
+Parsing and validating the configuration is repeated by every short-lived CLI
+invocation. :func:`load_config` stores the validated configuration as a pickle
+file keyed on the config file path, modification time and size, so the
+following invocations skip parsing and validation as long as the config file
+doesn't change.
+"""
+
+import typing as T
+import os
+import sys
+import json
+import types
+import pickle
+import hashlib
+import dataclasses
+from pathlib import Path
+
+from .file_lock import file_lock
+
+try:
+    dir_default_config_cache = Path.home() / ".cache" / "which_bsm" / "config"
+except Exception:  # pragma: no cover
+    dir_default_config_cache = None
+
+#: bump this when the pickled format changes
+CONFIG_CACHE_VERSION = 1
+
+
+def _load_toml(text: str) -> dict[str, T.Any]:
+    try:
+        import tomllib
+    except ImportError:  # pragma: no cover
+        try:
+            import tomli as tomllib
+        except ImportError:
+            raise ImportError(
+                "You need Python 3.11+ or to install 'tomli' to load TOML config file."
+            )
+    return tomllib.loads(text)
+
+
+def parse_config_file(path: T.Union[str, Path]) -> dict[str, T.Any]:
+    """
+    Parse a JSON or TOML config file, the format is detected by the file extension.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        return json.loads(path.read_text())
+    elif suffix == ".toml":
+        return _load_toml(path.read_text())
+    else:
+        raise ValueError(
+            f"Unsupported config file format '{suffix}', only .json and .toml are supported."
+        )
+
+
+def _is_instance(value: T.Any, type_: T.Any) -> bool:
+    """
+    Check ``value`` against a type annotation, the ``dict`` / ``list``
+    items and the ``Optional`` / ``Union`` members included.
+
+    :raises TypeError: if the type annotation is not supported
+    """
+    if type_ is T.Any:
+        return True
+    if type_ is type(None):
+        return value is None
+    if type_ is bool:
+        return isinstance(value, bool)
+    if type_ is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    if type_ is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    origin = T.get_origin(type_)
+    if origin is T.Union or origin is types.UnionType:
+        unsupported = list()
+        for arg in T.get_args(type_):
+            try:
+                if _is_instance(value, arg):
+                    return True
+            except TypeError:
+                unsupported.append(arg)
+        if unsupported:
+            raise TypeError(f"Unsupported type {unsupported[0]!r}.")
+        return False
+    if origin is dict:
+        key_type, value_type = T.get_args(type_) or (T.Any, T.Any)
+        return isinstance(value, dict) and all(
+            _is_instance(k, key_type) and _is_instance(v, value_type)
+            for k, v in value.items()
+        )
+    if origin is list:
+        (item_type,) = T.get_args(type_) or (T.Any,)
+        return isinstance(value, list) and all(
+            _is_instance(item, item_type) for item in value
+        )
+    if origin is None and isinstance(type_, type):
+        return isinstance(value, type_)
+    raise TypeError(f"Unsupported type {type_!r}.")
+
+
+def _check_type(name: str, type_: T.Any, value: T.Any):
+    try:
+        ok = _is_instance(value, type_)
+    except TypeError as e:
+        raise TypeError(f"Cannot validate config field '{name}': {e}")
+    if not ok:
+        raise TypeError(
+            f"Invalid value {value!r} for config field '{name}', expected {type_}."
+        )
+
+
+def _get_init_fields(klass: type) -> dict[str, dataclasses.Field]:
+    return {field.name: field for field in dataclasses.fields(klass) if field.init}
+
+
+def _resolve_type(klass: type, type_: T.Any) -> T.Any:
+    """
+    Evaluate a string annotation, for example in a subclass module using
+    ``from __future__ import annotations``, in the module of ``klass``.
+    """
+    if not isinstance(type_, str):
+        return type_
+    try:
+        return eval(type_, vars(sys.modules[klass.__module__]))
+    except Exception:
+        return type_
+
+
+def check_missing_fields(klass: type, data: dict[str, T.Any]):
+    """
+    :raises ValueError: if a required field of ``klass`` is not in ``data``
+    """
+    missing = [
+        name
+        for name, field in _get_init_fields(klass).items()
+        if name not in data
+        and field.default is dataclasses.MISSING
+        and field.default_factory is dataclasses.MISSING
+    ]
+    if missing:
+        raise ValueError(f"Missing config fields: {missing}")
+
+
+def validate_config(
+    klass: type,
+    data: dict[str, T.Any],
+    check_missing: bool = True,
+) -> dict[str, T.Any]:
+    """
+    Validate the raw config data against the dataclass fields of ``klass``
+    and return the keyword arguments for its constructor.
+
+    :param check_missing: if False, the required fields may be missing,
+        for partial config data
+
+    :raises ValueError: if there is unknown or missing field
+    :raises TypeError: if a field has the wrong type
+    """
+    fields = _get_init_fields(klass)
+    unknown = [key for key in data if key not in fields]
+    if unknown:
+        raise ValueError(f"Unknown config fields: {unknown}")
+    if check_missing:
+        check_missing_fields(klass, data)
+    kwargs = dict(data)
+    if isinstance(kwargs.get("credential_cache"), dict):
+        from .credential_cache import CredentialCache
+
+        kwargs["credential_cache"] = CredentialCache(**kwargs["credential_cache"])
+    if isinstance(kwargs.get("sts_rate_limiter"), dict):
+        from .rate_limiter import RateLimiter
+
+        kwargs["sts_rate_limiter"] = RateLimiter(**kwargs["sts_rate_limiter"])
+    for key, value in kwargs.items():
+        _check_type(key, _resolve_type(klass, fields[key].type), value)
+    return kwargs
+
+
+def get_config_cache_path(
+    klass: type,
+    path: Path,
+    dir_cache: Path,
+) -> Path:
+    key = f"{klass.__module__}.{klass.__qualname__}:{path.absolute()}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return dir_cache / f"{digest}.pickle"
+
+
+def _load_config_file(
+    klass: type,
+    path: Path,
+    dir_cache: T.Optional[T.Union[str, Path]],
+) -> dict[str, T.Any]:
+    """
+    Load and validate the config file, except the missing fields check.
+    """
+    stat = path.stat()
+    signature = (CONFIG_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    if dir_cache is None:
+        return validate_config(klass, parse_config_file(path), check_missing=False)
+
+    path_cache = get_config_cache_path(klass, path, Path(dir_cache))
+    try:
+        cached_signature, kwargs = pickle.loads(path_cache.read_bytes())
+        if cached_signature == signature:
+            return kwargs
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    kwargs = validate_config(klass, parse_config_file(path), check_missing=False)
+    path_cache.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(path_cache.with_suffix(".lock")):
+        path_tmp = path_cache.with_name(f"{path_cache.name}.{os.getpid()}.tmp")
+        path_tmp.write_bytes(pickle.dumps((signature, kwargs)))
+        os.replace(path_tmp, path_cache)
+    return kwargs
+
+
+def load_config(
+    klass: type,
+    path: T.Union[str, Path],
+    dir_cache: T.Optional[T.Union[str, Path]] = dir_default_config_cache,
+    defaults: T.Optional[dict[str, T.Any]] = None,
+) -> dict[str, T.Any]:
+    """
+    Load and validate the config file, return the keyword arguments for the
+    ``klass`` constructor.
+
+    :param klass: the ``BaseBotoSesEnum`` (sub)class
+    :param path: the JSON or TOML config file path
+    :param dir_cache: the directory to store the validated config cache,
+        None to disable the cache
+    :param defaults: the values of the fields not set in the config file,
+        for example the detected runtime flags. They are not cached.
+    """
+    kwargs = _load_config_file(klass, Path(path), dir_cache)
+    if defaults:
+        kwargs = {
+            **validate_config(klass, defaults, check_missing=False),
+            **kwargs,
+        }
+    check_missing_fields(klass, kwargs)
+    return kwargs
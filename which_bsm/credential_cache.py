@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+Persistent on-disk cache for assumed role credentials.
+
+In CI, every step of a pipeline is usually a separate Python process. Without
+a cache, each of them calls ``sts:AssumeRole`` again for the same role. The
+:class:`CredentialCache` stores the temporary credentials in a local directory
+protected by a file lock, so separate processes in the same job reuse one
+assumed credential set until shortly before it expires.
+
+Each cache entry is a JSON file using the same field names as the
+``Credentials`` object in the ``sts:AssumeRole`` response::
+
+    {
+        "AccessKeyId": "...",
+        "SecretAccessKey": "...",
+        "SessionToken": "...",
+        "Expiration": "2024-01-01T00:00:00+00:00"
+    }
+"""
+
+import typing as T
+import os
+import json
+import hashlib
+import dataclasses
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+from .file_lock import file_lock
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from boto_session_manager import BotoSesManager
+
+try:
+    dir_default_credential_cache = (
+        Path.home() / ".cache" / "which_bsm" / "credentials"
+    )
+except Exception:  # pragma: no cover
+    dir_default_credential_cache = None
+
+
+def make_cache_key(
+    role_arn: str,
+    role_session_name: str,
+    assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+) -> str:
+    """
+    Generate a deterministic cache key for a role assumption request.
+
+    :param role_arn: the IAM role ARN to assume
+    :param role_session_name: the role session name
+    :param assume_role_kwargs: additional keyword arguments passed to
+        ``BotoSesManager.assume_role``
+
+    :returns: a hex digest that is safe to use as a file name
+    """
+    if assume_role_kwargs is None:
+        assume_role_kwargs = {}
+    payload = json.dumps(
+        {
+            "role_arn": role_arn,
+            "role_session_name": role_session_name,
+            "assume_role_kwargs": assume_role_kwargs,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def dump_bsm_credentials(bsm: "BotoSesManager") -> dict[str, str]:
+    """
+    Extract the static temporary credentials of an assumed role
+    ``BotoSesManager`` in the cache entry format.
+    """
+    return {
+        "AccessKeyId": bsm.aws_access_key_id,
+        "SecretAccessKey": bsm.aws_secret_access_key,
+        "SessionToken": bsm.aws_session_token,
+        "Expiration": bsm.expiration_time.isoformat(),
+    }
+
+
+def parse_expiration(credentials: dict[str, str]) -> datetime:
+    """
+    Parse the ``Expiration`` field of a cache entry into a timezone aware datetime.
+    """
+    expiration = datetime.fromisoformat(credentials["Expiration"])
+    if expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=timezone.utc)
+    return expiration
+
+
+@dataclasses.dataclass
+class CredentialCache:
+    """
+    File-locked local directory cache for assumed role credentials.
+
+    :param dir_cache: the directory to store the cache entries
+    :param expiry_margin: a cached credential is considered stale and
+        re-fetched when it expires within this many seconds
+    """
+
+    dir_cache: Path = dataclasses.field(
+        default_factory=lambda: dir_default_credential_cache
+    )
+    expiry_margin: int = dataclasses.field(default=300)
+
+    def __post_init__(self):
+        if self.dir_cache is None:  # pragma: no cover
+            raise EnvironmentError("your system may not support $HOME directory")
+        self.dir_cache = Path(self.dir_cache)
+
+    def get_path(self, key: str) -> Path:
+        return self.dir_cache / f"{key}.json"
+
+    def get_lock_path(self, key: str) -> Path:
+        return self.dir_cache / f"{key}.lock"
+
+    def is_fresh(self, credentials: dict[str, str]) -> bool:
+        """
+        Check whether the credentials are still valid for at least
+        ``expiry_margin`` seconds.
+        """
+        now = datetime.now(timezone.utc)
+        return parse_expiration(credentials) > now + timedelta(
+            seconds=self.expiry_margin
+        )
+
+    def _read(self, key: str) -> T.Optional[dict[str, str]]:
+        path = self.get_path(key)
+        try:
+            credentials = json.loads(path.read_text())
+            is_fresh = self.is_fresh(credentials)
+        # a corrupted entry, for example a JSON array or no expiration
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return None
+        if is_fresh:
+            return credentials
+        return None
+
+    def _write(self, key: str, credentials: dict[str, str]):
+        path = self.get_path(key)
+        path_tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        fd = os.open(str(path_tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(credentials))
+        os.replace(path_tmp, path)
+
+    def get(self, key: str) -> T.Optional[dict[str, str]]:
+        """
+        Get the fresh cached credentials, return None if not cached or stale.
+        """
+        with file_lock(self.get_lock_path(key)):
+            return self._read(key)
+
+    def put(self, key: str, credentials: dict[str, str]):
+        """
+        Store the credentials in the cache.
+        """
+        with file_lock(self.get_lock_path(key)):
+            self._write(key, credentials)
+
+    def get_or_fetch(
+        self,
+        key: str,
+        fetch: T.Callable[[], dict[str, str]],
+    ) -> dict[str, str]:
+        """
+        Get the fresh cached credentials, or call ``fetch`` and store the result.
+
+        The lock is held while fetching, so when many processes miss the cache
+        at the same time, only one of them calls STS and the others wait and
+        then read the stored result.
+        """
+        with file_lock(self.get_lock_path(key)):
+            credentials = self._read(key)
+            if credentials is None:
+                credentials = fetch()
+                self._write(key, credentials)
+            return credentials
+
+    def delete(self, key: str):
+        """
+        Remove a cache entry.
+        """
+        with file_lock(self.get_lock_path(key)):
+            try:
+                self.get_path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """
+        Remove all cache entries.
+        """
+        if self.dir_cache.exists():
+            for path in self.dir_cache.glob("*.json"):
+                self.delete(path.stem)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+A minimal cross-process file lock based on OS level advisory locking.
+
+It is used to coordinate multiple Python processes running in the same
+CI job (or on the same machine) that share a local cache directory.
+"""
+
+import os
+import contextlib
+from pathlib import Path
+
+try:  # pragma: no cover
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+try:  # pragma: no cover
+    import msvcrt
+except ImportError:  # pragma: no cover
+    msvcrt = None
+
+
+def _lock(fd: int):  # pragma: no cover
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    elif msvcrt is not None:
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+
+def _unlock(fd: int):  # pragma: no cover
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def file_lock(path: Path):
+    """
+    Acquire an exclusive lock on ``path`` for the duration of the context.
+
+    The lock file is created if it doesn't exist, and it is never deleted,
+    because deleting a lock file that another process is waiting on breaks
+    the mutual exclusion.
+
+    :param path: the lock file path.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        _lock(fd)
+        try:
+            yield path
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Fork safety for the session cache.
+
+boto3 sessions, botocore clients and their urllib3 connection pools must not
+be shared between a parent and a forked child process, for example the
+prefork workers of gunicorn or celery. Every ``BaseBotoSesEnum`` registers
+itself here, and a ``os.register_at_fork`` hook re-initializes it in the child:
+
+- the cached boto session managers are kept, but their boto3 sessions and
+  clients are discarded, they are re-created on next use with the same
+  still-valid credentials and default client config, so no STS call is made.
+- the client pool is emptied, and all the locks are re-created.
+
+The background credential refreshers are restarted by :mod:`which_bsm.refresh`.
+"""
+
+import typing as T
+import os
+import sys
+import weakref
+import logging
+import threading
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from boto_session_manager import BotoSesManager
+    from .impl import BaseBotoSesEnum
+
+logger = logging.getLogger(__name__)
+
+# keyed by id() because the dataclass instances are not hashable
+_instances: "weakref.WeakValueDictionary[int, BaseBotoSesEnum]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def register(obj: "BaseBotoSesEnum"):
+    """
+    Re-initialize ``obj`` in the child process after a fork.
+    """
+    _instances[id(obj)] = obj
+
+
+def reset_bsm(bsm: "BotoSesManager"):
+    """
+    Discard the boto3 session and clients of the boto session manager in
+    place, but keep its resolved credentials.
+    """
+    boto_ses = getattr(bsm, "_boto_ses_cache", None)
+    botocore_session = getattr(boto_ses, "_session", None)
+    credentials = getattr(botocore_session, "_credentials", None)
+    client_config = None
+    if botocore_session is not None:
+        client_config = botocore_session.get_default_client_config()
+    bsm.clear_cache()
+    if credentials is not None:
+        # the lock may be held by a thread that doesn't exist in the child
+        if hasattr(credentials, "_refresh_lock"):
+            credentials._refresh_lock = threading.Lock()
+        bsm.boto_ses._session._credentials = credentials
+    if client_config is not None:
+        bsm.boto_ses._session.set_default_client_config(client_config)
+
+
+def is_bsm(value: T.Any) -> bool:
+    module = sys.modules.get("boto_session_manager")
+    return module is not None and isinstance(value, module.BotoSesManager)
+
+
+def _after_fork_in_child():
+    for obj in list(_instances.values()):
+        try:
+            obj._after_fork_in_child()
+        except Exception:  # pragma: no cover
+            logger.warning("Failed to re-initialize %r after fork.", obj, exc_info=True)
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"""
+Caller identity of the boto session managers, used by the preflight check
+``BaseBotoSesEnum.verify_identities``.
+"""
+
+import typing as T
+import dataclasses
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from botocore.client import BaseClient
+
+
+@dataclasses.dataclass(frozen=True)
+class CallerIdentity:
+    """
+    The ``sts:GetCallerIdentity`` result of an environment.
+
+    :param env_name: the environment name
+    :param aws_account_id: the AWS account ID of the credentials
+    :param principal_arn: the IAM user or assumed role ARN
+    :param user_id: the unique identifier of the caller
+    """
+
+    env_name: str
+    aws_account_id: str
+    principal_arn: str
+    user_id: str
+
+    @classmethod
+    def from_sts_client(
+        cls,
+        env_name: str,
+        sts_client: "BaseClient",
+    ) -> "CallerIdentity":
+        res = sts_client.get_caller_identity()
+        return cls(
+            env_name=env_name,
+            aws_account_id=res["Account"],
+            principal_arn=res["Arn"],
+            user_id=res["UserId"],
+        )
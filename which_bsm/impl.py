@@ -8,22 +8,77 @@ The ``BaseBotoSesEnum`` class serves as a factory for creating environment-speci
 boto session managers, automatically selecting the appropriate authentication method
 based on runtime detection (local, CI/CD, or AWS compute services).
 
-All methods and properties use lazy loading for optimal performance.
+All methods and properties use lazy loading for optimal performance. The
+AWS SDK (``boto3``, ``botocore`` and ``boto_session_manager``) is only imported
+on the first boto session manager construction, so the code paths that never
+talk to AWS (config validation, ARN generation, etc.) don't pay the import cost.
 """
 
 import typing as T
 import os
+import copy
+import json
+import threading
 import dataclasses
+from datetime import datetime, timezone
 from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 
-from boto_session_manager import BotoSesManager
+if T.TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+    import boto3.session
+    from pathlib import Path
+    from boto_session_manager import BotoSesManager
+    from botocore.client import BaseClient
+    from botocore.config import Config
+    from .local_sts import LocalSts, LocalStsServer
+
+from .topology import (
+    validate_aws_account_id,
+    get_aws_account_id_env_var_name,
+    EnvSpec,
+    EnvTopology,
+)
+from .config import dir_default_config_cache, validate_config, load_config
+from .runtime import dir_default_runtime_cache, load_runtime
+from .registry import is_not_expired, SessionRegistry
+from .metrics import (
+    OP_SESSION_BUILD,
+    OP_ASSUME_ROLE,
+    OP_CLIENT_CREATE,
+    OP_SESSION_CACHE_HIT,
+    OP_SESSION_CACHE_MISS,
+    OP_CREDENTIAL_CACHE_HIT,
+    OP_CREDENTIAL_CACHE_MISS,
+    OP_CLIENT_CACHE_HIT,
+    OP_CLIENT_CACHE_MISS,
+    OP_STS_THROTTLED,
+    Instrumentation,
+)
+from .client_pool import (
+    make_config_key,
+    merge_client_config_kwargs,
+    ClientPoolStats,
+    ClientPool,
+)
+from .credential_cache import (
+    CredentialCache,
+    make_cache_key,
+    dump_bsm_credentials,
+    parse_expiration,
+)
+from .rate_limiter import RateLimiter
+from .loader import share_loader
+from .snapshot import CredentialSnapshot, Snapshot
+from .identity import CallerIdentity
+from . import fork
 
 
 def get_aws_account_id_in_ci(env_name: str) -> str:
     """
     Retrieve the AWS account ID for the specified environment in CI.
     """
-    key = f"{env_name.upper()}_AWS_ACCOUNT_ID"
+    key = get_aws_account_id_env_var_name(env_name)
     try:
         value = os.environ[key]
     except KeyError:
@@ -31,17 +86,32 @@ def get_aws_account_id_in_ci(env_name: str) -> str:
             f"Environment variable '{key}' is not set. "
             "Make sure to set it in your CI environment to store the AWS account ID."
         )
-    if len(value) != 12:
-        raise ValueError(
-            f"Invalid AWS account ID '{value}' for environment '{env_name}'. "
-            "It should be a 12-digit number."
-        )
-    if not value.isdigit():
-        raise ValueError(
-            f"Invalid AWS account ID '{value}' for environment '{env_name}'. "
-            "It should contain only digits."
-        )
-    return value
+    return validate_aws_account_id(env_name, value)
+
+
+def derive_regional_bsm(
+    bsm: "BotoSesManager",
+    region_name: str,
+) -> "BotoSesManager":
+    """
+    Create a boto session manager for another region that shares the
+    credentials of ``bsm``. No API call is made, and if the credentials of
+    ``bsm`` are refreshable, the derived one is refreshed along with it.
+    """
+    import botocore.session
+    from boto_session_manager import BotoSesManager
+
+    botocore_session = botocore.session.get_session()
+    botocore_session._credentials = bsm.boto_ses._session.get_credentials()
+    botocore_session.set_default_client_config(
+        bsm.boto_ses._session.get_default_client_config()
+    )
+    return BotoSesManager(
+        botocore_session=botocore_session,
+        region_name=region_name,
+        expiration_time=bsm.expiration_time,
+        default_client_kwargs=bsm.default_client_kwargs,
+    )
 
 
 @dataclasses.dataclass
@@ -54,7 +124,9 @@ class BaseBotoSesEnum:
     Supports multiple AWS execution environments and runtime detection.
 
     :param env_to_aws_profile_mapper: Mapping from environment names to AWS CLI profile names
-    :param env_to_aws_region_mapper: Mapping from environment names to AWS regions
+    :param env_to_aws_region_mapper: Mapping from environment names to AWS regions.
+        The value can be a list of regions for multi-region deployments, the
+        first one is the primary region, see :meth:`get_env_bsm`.
     :param default_app_env_name: Default application environment name
     :param devops_env_name: DevOps environment name (cannot be same as default_app_env_name)
     :param workload_role_name_prefix_in_ci: Prefix for workload IAM role names in CI
@@ -66,15 +138,54 @@ class BaseBotoSesEnum:
     :param is_ec2: Whether running on AWS EC2 instance
     :param is_lambda: Whether running in AWS Lambda function
     :param is_batch: Whether running in AWS Batch job
-    :param is_esc: Whether running in AWS ECS (Elastic Container Service)
+    :param is_ecs: Whether running in AWS ECS (Elastic Container Service)
     :param is_glue: Whether running in AWS Glue job
+    :param credential_cache: Optional :class:`~which_bsm.credential_cache.CredentialCache`.
+        If set, the assumed role credentials in CI are stored on local disk and
+        reused by other processes in the same job until shortly before expiry.
+    :param background_refresh: If True, the assumed role credentials in CI are
+        renewed in a background thread ahead of expiry, so the boto session
+        manager (and all the clients created from it) never expires.
+    :param background_refresh_margin: Renew the credentials when they expire
+        within this many seconds, used when ``background_refresh`` is True.
+    :param max_client_pool_size: The maximum number of boto3 clients kept
+        by :meth:`get_client`.
+    :param env_to_parent_env_mapper: Mapping from environment names to the
+        environment whose session assumes their workload role in CI, default
+        to the devops environment. Use it for role chains, for example
+        ``{"prod-readonly": "prod"}``, see :meth:`get_env_chain`.
+    :param client_config: The default botocore ``Config`` keyword arguments
+        of all clients, for example ``{"max_pool_connections": 50,
+        "tcp_keepalive": True, "retries": {"mode": "adaptive"}}``.
+    :param env_to_client_config_mapper: Mapping from environment names to the
+        botocore ``Config`` keyword arguments of their clients, they override
+        ``client_config``.
+    :param service_to_client_config_mapper: Mapping from AWS service names
+        to the botocore ``Config`` keyword arguments of their clients, they
+        override the environment ones, see :meth:`get_client_config`.
+    :param sts_rate_limiter: Optional :class:`~which_bsm.rate_limiter.RateLimiter`.
+        If set, the ``sts:AssumeRole`` calls in CI take a token from this
+        cross-process token bucket first, and are retried with jittered
+        backoff when throttled.
+    :param share_botocore_loader: If True, all the boto sessions created by
+        this object use one botocore data loader, so the service models are
+        loaded and kept in memory once per process, see :mod:`which_bsm.loader`.
+    :param instrumentation: The :class:`~which_bsm.metrics.Instrumentation`
+        that records the counters and latency of session build, role
+        assumption, client creation and cache hit / miss. You can register
+        event hooks on it.
+    :param sts_stand_in: Optional :class:`~which_bsm.local_sts.LocalSts` or
+        :class:`~which_bsm.local_sts.LocalStsServer`. If set, the STS API calls
+        of all the boto session managers created by this object go to the
+        local stand-in instead of AWS, for tests, benchmarks and load runs.
 
     Example:
-        Configuration for multi-environment setup::
+        Configuration for multi-environment setup, you can load it with
+        :meth:`from_dict` or :meth:`from_file`::
 
             {
                 "env_to_aws_profile_mapper": {"dev": "my-dev-profile", "prod": "my-prod-profile"},
-                "env_to_aws_region_mapper": {"dev": "us-east-1", "prod": "us-west-2"},
+                "env_to_aws_region_mapper": {"dev": "us-east-1", "prod": ["us-west-2", "eu-west-1"]},
                 "default_app_env_name": "dev",
                 "devops_env_name": "devops",
                 "workload_role_name_prefix_in_ci": "WorkloadRole-",
@@ -86,7 +197,7 @@ class BaseBotoSesEnum:
                 "is_ec2": false,
                 "is_lambda": false,
                 "is_batch": false,
-                "is_esc": false,
+                "is_ecs": false,
                 "is_glue": false
             }
 
@@ -100,7 +211,7 @@ class BaseBotoSesEnum:
     """
 
     env_to_aws_profile_mapper: dict[str, str] = dataclasses.field()
-    env_to_aws_region_mapper: dict[str, str] = dataclasses.field()
+    env_to_aws_region_mapper: dict[str, T.Union[str, list[str]]] = dataclasses.field()
     default_app_env_name: str = dataclasses.field()
     devops_env_name: str = dataclasses.field()
     workload_role_name_prefix_in_ci: str = dataclasses.field()
@@ -114,6 +225,71 @@ class BaseBotoSesEnum:
     is_batch: bool = dataclasses.field()
     is_ecs: bool = dataclasses.field()
     is_glue: bool = dataclasses.field()
+    credential_cache: T.Optional[CredentialCache] = dataclasses.field(default=None)
+    background_refresh: bool = dataclasses.field(default=False)
+    background_refresh_margin: int = dataclasses.field(default=1200)
+    max_client_pool_size: int = dataclasses.field(default=128)
+    env_to_parent_env_mapper: dict[str, str] = dataclasses.field(default_factory=dict)
+    client_config: dict[str, T.Any] = dataclasses.field(default_factory=dict)
+    env_to_client_config_mapper: dict[str, dict[str, T.Any]] = dataclasses.field(
+        default_factory=dict
+    )
+    service_to_client_config_mapper: dict[str, dict[str, T.Any]] = dataclasses.field(
+        default_factory=dict
+    )
+    sts_rate_limiter: T.Optional[RateLimiter] = dataclasses.field(default=None)
+    share_botocore_loader: bool = dataclasses.field(default=True)
+    instrumentation: Instrumentation = dataclasses.field(
+        default_factory=Instrumentation,
+        repr=False,
+        compare=False,
+    )
+    sts_stand_in: T.Optional[T.Union["LocalSts", "LocalStsServer"]] = (
+        dataclasses.field(default=None, repr=False, compare=False)
+    )
+
+    _session_registry: SessionRegistry = dataclasses.field(
+        default_factory=SessionRegistry,
+        init=False,
+        repr=False,
+        compare=False,
+    )
+    _client_pool: ClientPool = dataclasses.field(
+        default=None,
+        init=False,
+        repr=False,
+        compare=False,
+    )
+    _async_inflight: dict[tuple[str, str, str], "asyncio.Future"] = dataclasses.field(
+        default_factory=dict,
+        init=False,
+        repr=False,
+        compare=False,
+    )
+    _verified_identities: dict[str, tuple["BotoSesManager", CallerIdentity]] = (
+        dataclasses.field(
+            default_factory=dict,
+            init=False,
+            repr=False,
+            compare=False,
+        )
+    )
+    _topology_cache: T.Optional[tuple[tuple[T.Optional[str], ...], EnvTopology]] = (
+        dataclasses.field(
+            default=None,
+            init=False,
+            repr=False,
+            compare=False,
+        )
+    )
+    _client_config_cache: dict[tuple[str, str], tuple[T.Optional["Config"], str]] = (
+        dataclasses.field(
+            default_factory=dict,
+            init=False,
+            repr=False,
+            compare=False,
+        )
+    )
 
     def __post_init__(self):
         if self.default_app_env_name == self.devops_env_name:
@@ -121,6 +297,155 @@ class BaseBotoSesEnum:
                 f"default_app_env_name cannot be devops_env_name! "
                 f"'{self.devops_env_name}' is NOT an app environment."
             )
+        if self.devops_env_name in self.env_to_parent_env_mapper:
+            raise ValueError(
+                f"The devops environment '{self.devops_env_name}' cannot have "
+                f"a parent environment."
+            )
+        env_names = set(self._get_env_names())
+        env_names.add(self.devops_env_name)
+        for env_name, parent_env_name in self.env_to_parent_env_mapper.items():
+            if parent_env_name not in env_names:
+                raise ValueError(
+                    f"The parent environment '{parent_env_name}' of '{env_name}' "
+                    f"is not a known environment: {sorted(env_names)}."
+                )
+        for env_name in self.env_to_parent_env_mapper:
+            self.get_env_chain(env_name)
+        self._client_pool = ClientPool(max_size=self.max_client_pool_size)
+        fork.register(self)
+
+    def _after_fork_in_child(self):
+        """
+        Called in the child process after a fork, see :mod:`which_bsm.fork`.
+        """
+        self._session_registry._after_fork_in_child()
+        self.instrumentation._after_fork_in_child()
+        bsm_list = [bsm for _, bsm in self._session_registry.items()]
+        # cached_property accessors defined in subclasses
+        bsm_list.extend(value for value in vars(self).values() if fork.is_bsm(value))
+        for bsm in {id(bsm): bsm for bsm in bsm_list}.values():
+            fork.reset_bsm(bsm)
+        self._client_pool = ClientPool(max_size=self.max_client_pool_size)
+        self._async_inflight = dict()
+
+    @classmethod
+    def from_dict(cls, data: dict[str, T.Any]):
+        """
+        Create an instance from a config dictionary, see the class docstring
+        for the format.
+
+        :raises ValueError: if there is unknown or missing field
+        :raises TypeError: if a field has the wrong type
+        """
+        return cls(**validate_config(cls, data))
+
+    @classmethod
+    def from_file(
+        cls,
+        path: T.Union[str, "Path"],
+        dir_cache: T.Optional[T.Union[str, "Path"]] = dir_default_config_cache,
+    ):
+        """
+        Create an instance from a JSON or TOML config file.
+
+        The validated config is cached as a pickle file keyed on the config
+        file modification time, so the following calls skip parsing and
+        validation until the config file changes.
+
+        :param path: the ``.json`` or ``.toml`` config file path
+        :param dir_cache: the config cache directory, None to disable the cache
+        """
+        return cls(**load_config(cls, path, dir_cache=dir_cache))
+
+    @classmethod
+    def from_runtime(
+        cls,
+        dir_cache: T.Optional[T.Union[str, "Path"]] = dir_default_runtime_cache,
+        **kwargs,
+    ):
+        """
+        Create an instance with the runtime flags (``is_local_runtime_group``,
+        ``is_ci_runtime_group``, ``is_local``, ``is_cloud9``, etc.) detected
+        by ``which_runtime``.
+
+        The detection runs once per job. The result is published in the
+        ``WHICH_BSM_RUNTIME`` environment variable for the child processes,
+        and in CI, cached in a file keyed by the CI job ID for the following
+        invocations, see :func:`~which_bsm.runtime.load_runtime`.
+
+        :param dir_cache: the runtime cache directory, None to disable the cache file
+        :param kwargs: the other constructor arguments, they override the
+            detected runtime flags
+        """
+        return cls(**{**load_runtime(dir_cache=dir_cache), **kwargs})
+
+    def to_snapshot(
+        self,
+        env_names: T.Optional[T.Iterable[str]] = None,
+    ) -> Snapshot:
+        """
+        Export the configuration and the resolved credentials as a picklable
+        :class:`~which_bsm.snapshot.Snapshot`, use :meth:`from_snapshot` to
+        rehydrate it in a child process without repeating the role chain.
+
+        :param env_names: the environments to include, they are resolved if
+            not cached yet. Default to the environments in the session cache.
+        """
+        if env_names is None:
+            bsm_mapper = {
+                key[0]: bsm
+                for key, bsm in self._session_registry.items()
+                if key[1:] == ("", "") and is_not_expired(bsm)
+            }
+        else:
+            bsm_mapper = self.get_env_bsm_many(env_names)
+        config = dict()
+        for field in dataclasses.fields(self):
+            # runtime objects are not part of the configuration
+            if not field.init or field.name in ("instrumentation", "sts_stand_in"):
+                continue
+            value = getattr(self, field.name)
+            if isinstance(value, CredentialCache):
+                value = {
+                    "dir_cache": str(value.dir_cache),
+                    "expiry_margin": value.expiry_margin,
+                }
+            elif isinstance(value, RateLimiter):
+                value = dataclasses.asdict(value)
+                value["dir_state"] = str(value["dir_state"])
+            config[field.name] = value
+        return Snapshot(
+            config=config,
+            credentials={
+                env_name: CredentialSnapshot.from_bsm(bsm)
+                for env_name, bsm in bsm_mapper.items()
+            },
+        )
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: Snapshot,
+        expiry_margin: int = 300,
+        **kwargs,
+    ):
+        """
+        Create an instance from a :class:`~which_bsm.snapshot.Snapshot`, the
+        credentials that are valid for at least ``expiry_margin`` seconds are
+        put in the session cache, the others are fetched again on demand.
+
+        :param kwargs: additional constructor arguments that are not part of
+            the snapshot, for example ``instrumentation``
+        """
+        obj = cls(**validate_config(cls, snapshot.config), **kwargs)
+        for env_name, credentials in snapshot.credentials.items():
+            if credentials.is_fresh(expiry_margin):
+                obj._session_registry.put(
+                    obj._get_bsm_cache_key(env_name),
+                    obj._setup_bsm(env_name, credentials.to_bsm()),
+                )
+        return obj
 
     def get_workload_role_arn_in_ci(self, env_name: str) -> str:
         """
@@ -134,7 +459,8 @@ class BaseBotoSesEnum:
 
         :returns: Complete IAM role ARN for the workload environment
 
-        :raises ValueError: If env_name is the devops environment
+        :raises ValueError: If env_name is the devops environment, or the
+            AWS account ID is invalid
         :raises KeyError: If AWS account ID environment variable is not set
 
         .. note::
@@ -147,7 +473,7 @@ class BaseBotoSesEnum:
                 f"You cannot use the devops environment '{self.devops_env_name}' "
                 f"to get workload role ARN in CI."
             )
-        aws_account_id = os.environ[f"{env_name.upper()}_AWS_ACCOUNT_ID"]
+        aws_account_id = get_aws_account_id_in_ci(env_name)
         return (
             f"arn:aws:iam::{aws_account_id}:role/"
             f"{self.workload_role_name_prefix_in_ci}{env_name}{self.workload_role_name_suffix_in_ci}"
@@ -175,17 +501,144 @@ class BaseBotoSesEnum:
             )
 
     def get_aws_region(self, env_name: str) -> str:
+        """
+        Get the primary AWS region of the environment.
+        """
+        return self.get_aws_regions(env_name)[0]
+
+    def get_aws_regions(self, env_name: str) -> list[str]:
+        """
+        Get all the AWS regions of the environment, the primary region comes first.
+
+        :raises KeyError: If the environment is not configured
+        :raises ValueError: If the environment has an empty region list
+        """
         try:
-            return self.env_to_aws_region_mapper[env_name]
+            value = self.env_to_aws_region_mapper[env_name]
         except KeyError:
             raise KeyError(
                 f"Environment '{env_name}' is not configured in env_to_aws_region_mapper."
             )
+        if isinstance(value, str):
+            return [value]
+        if not value:
+            raise ValueError(
+                f"Environment '{env_name}' has no region in env_to_aws_region_mapper."
+            )
+        return list(value)
 
-    def get_devops_bsm_in_local(self) -> "BotoSesManager":  # pragma: no cover
+    def get_parent_env_name(self, env_name: str) -> str:
+        """
+        Get the environment whose session assumes the workload role of
+        ``env_name`` in CI.
+        """
+        return self.env_to_parent_env_mapper.get(env_name, self.devops_env_name)
+
+    def get_env_chain(self, env_name: str) -> list[str]:
+        """
+        Get the session dependency chain of an environment in CI, from the
+        devops environment to ``env_name``. For example ``["devops", "prod",
+        "prod-readonly"]`` means the devops session assumes the ``prod`` role,
+        whose session assumes the ``prod-readonly`` role.
+
+        :raises ValueError: if there is a cycle in ``env_to_parent_env_mapper``
+        """
+        chain = [env_name]
+        while chain[-1] != self.devops_env_name:
+            parent_env_name = self.get_parent_env_name(chain[-1])
+            if parent_env_name in chain:
+                raise ValueError(
+                    f"Cycle in env_to_parent_env_mapper: "
+                    f"{' -> '.join(reversed(chain + [parent_env_name]))}"
+                )
+            chain.append(parent_env_name)
+        return list(reversed(chain))
+
+    def _get_env_names(self) -> list[str]:
+        return list(
+            dict.fromkeys(
+                list(self.env_to_aws_profile_mapper)
+                + list(self.env_to_aws_region_mapper)
+            )
+        )
+
+    def compile_topology(self) -> EnvTopology:
+        """
+        Build an immutable :class:`~which_bsm.topology.EnvTopology` from the
+        profile / region mappers and the :meth:`get_workload_role_arn_in_ci`
+        and :meth:`get_workfload_role_session_name` hooks, so the subclass
+        overrides are honored. All settings are validated up front.
+
+        The AWS account ID of an environment is the one of its workload role
+        ARN. It is None if the ``${ENV_NAME}_AWS_ACCOUNT_ID`` environment
+        variable is not set, :meth:`EnvTopology.get_aws_account_id` and
+        :meth:`EnvTopology.get_role_arn` raise ``KeyError`` on lookup.
+
+        :raises KeyError: If an environment has no region
+        :raises ValueError: If an AWS account ID is invalid
+        """
+        specs = list()
+        for env_name in self._get_env_names():
+            aws_regions = self.get_aws_regions(env_name)
+            if env_name == self.devops_env_name:
+                role_arn = None
+            else:
+                # a missing account id only fails when the environment is
+                # used, a CI job may not need all the environments
+                try:
+                    role_arn = self.get_workload_role_arn_in_ci(env_name)
+                except KeyError:
+                    role_arn = None
+            if role_arn is None:
+                aws_account_id = None
+            else:
+                aws_account_id = validate_aws_account_id(
+                    env_name, role_arn.split(":")[4]
+                )
+            specs.append(
+                EnvSpec(
+                    env_name=env_name,
+                    aws_profile=self.env_to_aws_profile_mapper.get(env_name),
+                    aws_region=aws_regions[0],
+                    aws_regions=aws_regions,
+                    aws_account_id=aws_account_id,
+                    role_arn=role_arn,
+                    role_session_name=self.get_workfload_role_session_name(env_name),
+                )
+            )
+        return EnvTopology(devops_env_name=self.devops_env_name, specs=specs)
+
+    def _get_topology_signature(self) -> tuple[T.Optional[str], ...]:
+        return tuple(
+            os.environ.get(get_aws_account_id_env_var_name(env_name))
+            for env_name in self._get_env_names()
+        )
+
+    @property
+    def topology(self) -> EnvTopology:
+        """
+        The compiled environment topology, see :meth:`compile_topology`.
+        The CI role assumption uses it to look up the workload role ARN and
+        session name.
+
+        It is compiled on first access, and compiled again when an
+        ``${ENV_NAME}_AWS_ACCOUNT_ID`` environment variable changes, so it
+        agrees with :meth:`get_workload_role_arn_in_ci`.
+        """
+        signature = self._get_topology_signature()
+        cached = self._topology_cache
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        topology = self.compile_topology()
+        self._topology_cache = (signature, topology)
+        return topology
+
+    def get_devops_bsm_in_local(self) -> "BotoSesManager":
         """
         Get the boto session manager for the DevOps environment in local runtime.
         """
+        from boto_session_manager import BotoSesManager
+
         if self.is_cloud9:
             return BotoSesManager(
                 region_name=self.get_aws_region(self.devops_env_name),
@@ -196,41 +649,117 @@ class BaseBotoSesEnum:
                 region_name=self.get_aws_region(self.devops_env_name),
             )
 
-    def get_devops_bsm_in_ci(self) -> "BotoSesManager":  # pragma: no cover
+    def get_devops_bsm_in_ci(self) -> "BotoSesManager":
         """
         Get the boto session manager for the DevOps environment in CI runtime.
         """
+        from boto_session_manager import BotoSesManager
+
         return BotoSesManager(
             region_name=self.get_aws_region(self.devops_env_name),
         )
 
-    def get_devops_bsm(self) -> "BotoSesManager":  # pragma: no cover
+    def get_devops_bsm(self) -> "BotoSesManager":
         """
         Get the boto session manager for the DevOps environment based on the runtime group.
         """
         if self.is_local_runtime_group:
-            return self.get_devops_bsm_in_local()
+            bsm = self.get_devops_bsm_in_local()
         elif self.is_ci_runtime_group:
-            return self.get_devops_bsm_in_ci()
+            bsm = self.get_devops_bsm_in_ci()
         else:  # pragma: no cover
             raise RuntimeError(
                 "get_devops_bsm() should only be called in local or CI runtime groups."
             )
+        return self._setup_bsm(self.devops_env_name, bsm)
+
+    def _setup_bsm(self, env_name: str, bsm: "BotoSesManager") -> "BotoSesManager":
+        """
+        Set up a boto session manager created by this object. Its boto3
+        session, created lazily and re-created after a fork, gets the shared
+        botocore loader, the client config and the STS stand-in, see
+        :meth:`_setup_boto_ses`.
+        """
+        create_boto_ses = bsm.create_boto_ses
+
+        def create_and_setup_boto_ses() -> "boto3.session.Session":
+            boto_ses = create_boto_ses()
+            self._setup_boto_ses(env_name, boto_ses)
+            return boto_ses
+
+        bsm.create_boto_ses = create_and_setup_boto_ses
+        # the boto3 session may have been created already
+        boto_ses = getattr(bsm, "_boto_ses_cache", None)
+        if hasattr(boto_ses, "_session"):
+            self._setup_boto_ses(env_name, boto_ses)
+        return bsm
+
+    def _setup_boto_ses(self, env_name: str, boto_ses: "boto3.session.Session"):
+        """
+        Use the shared botocore loader if :attr:`share_botocore_loader` is
+        True, and set the environment level botocore ``Config`` as the
+        default client config of the session, so all the clients created from
+        it use it, including the ``bsm.s3_client`` like accessors. Then
+        attach :attr:`sts_stand_in` if set.
+        """
+        if self.share_botocore_loader:
+            share_loader(boto_ses)
+        config = self.get_client_config(env_name)
+        if config is not None:
+            boto_ses._session.set_default_client_config(config)
+        if self.sts_stand_in is not None:
+            self.sts_stand_in.attach_boto_ses(boto_ses)
+
+    def get_client_config_kwargs(
+        self,
+        env_name: str,
+        service_name: T.Optional[str] = None,
+    ) -> dict[str, T.Any]:
+        """
+        Get the merged botocore ``Config`` keyword arguments of the clients of
+        an environment, in the order :attr:`client_config` <
+        :attr:`env_to_client_config_mapper` < :attr:`service_to_client_config_mapper`.
+        """
+        kwargs_list = [
+            self.client_config,
+            self.env_to_client_config_mapper.get(env_name, {}),
+        ]
+        if service_name is not None:
+            kwargs_list.append(self.service_to_client_config_mapper.get(service_name, {}))
+        return merge_client_config_kwargs(*kwargs_list)
+
+    def get_client_config(
+        self,
+        env_name: str,
+        service_name: T.Optional[str] = None,
+    ) -> T.Optional["Config"]:
+        """
+        Get the botocore ``Config`` of the clients of an environment, see
+        :meth:`get_client_config_kwargs`. Return None if nothing is configured.
+        """
+        kwargs = self.get_client_config_kwargs(env_name, service_name)
+        if not kwargs:
+            return None
+        from botocore.config import Config
+
+        return Config(**kwargs)
 
     @cached_property
-    def bsm_devops(self) -> "BotoSesManager":  # pragma: no cover
+    def bsm_devops(self) -> "BotoSesManager":
         """
         Get the boto session manager for the DevOps environment.
         """
-        return self.get_devops_bsm()
+        return self.get_env_bsm(env_name=self.devops_env_name)
 
     def get_env_bsm_in_local(
         self,
         env_name: str,
-    ) -> "BotoSesManager":  # pragma: no cover
+    ) -> "BotoSesManager":
         """
         Get the boto session manager for a specific environment in local runtime.
         """
+        from boto_session_manager import BotoSesManager
+
         return BotoSesManager(
             profile_name=self.get_aws_profile(env_name),
             region_name=self.get_aws_region(env_name),
@@ -240,35 +769,464 @@ class BaseBotoSesEnum:
         self,
         env_name: str,
         assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
-    ) -> "BotoSesManager":  # pragma: no cover
-        bsm_devops = self.get_devops_bsm()
-        role_arn = self.get_workload_role_arn_in_ci(env_name)
-        role_session_name = self.get_workfload_role_session_name(env_name)
+    ) -> "BotoSesManager":
+        """
+        Get the boto session manager for a specific environment in CI runtime
+        by assuming the workload role from the session of its parent environment
+        (the DevOps environment by default, see :meth:`get_env_chain`).
+
+        The parent session comes from the session cache, so assuming roles
+        into N environments builds the parent session only once.
+
+        If :attr:`credential_cache` is set, the assumed role credentials are
+        reused from the local cache when still fresh. If :attr:`sts_rate_limiter`
+        is set, the ``sts:AssumeRole`` calls are rate limited across processes.
+        """
+        from boto_session_manager import BotoSesManager
+
+        role_arn = self.topology.get_role_arn(env_name)
+        role_session_name = self.topology.get_role_session_name(env_name)
         if assume_role_kwargs is None:
             assume_role_kwargs = {}
-        bsm_workload = bsm_devops.assume_role(
+
+        parent_env_name = self.get_parent_env_name(env_name)
+
+        def assume_role() -> "BotoSesManager":
+            bsm_parent = self.get_env_bsm(parent_env_name)
+
+            bsm_sts = self._get_sts_caller_bsm(parent_env_name, bsm_parent)
+
+            def call() -> "BotoSesManager":
+                with self.instrumentation.measure(OP_ASSUME_ROLE, env_name):
+                    return bsm_sts.assume_role(
+                        role_arn=role_arn,
+                        role_session_name=role_session_name,
+                        **assume_role_kwargs,
+                    )
+
+            return self._call_sts(env_name, call)
+
+        if self.background_refresh:
+            return self._new_background_refresh_bsm(
+                env_name=env_name,
+                assume_role=assume_role,
+                key=make_cache_key(
+                    role_arn=role_arn,
+                    role_session_name=role_session_name,
+                    assume_role_kwargs=assume_role_kwargs,
+                ),
+                region_name=assume_role_kwargs.get(
+                    "region_name",
+                    self.get_aws_region(self.devops_env_name),
+                ),
+            )
+
+        # auto refreshable credentials cannot be serialized to the cache
+        if self.credential_cache is None or assume_role_kwargs.get("auto_refresh"):
+            return assume_role()
+
+        key = make_cache_key(
             role_arn=role_arn,
             role_session_name=role_session_name,
-            **assume_role_kwargs,
+            assume_role_kwargs=assume_role_kwargs,
+        )
+        credentials = self._get_or_fetch_cached_credentials(
+            env_name=env_name,
+            key=key,
+            fetch=lambda: dump_bsm_credentials(assume_role()),
+        )
+        return BotoSesManager(
+            aws_access_key_id=credentials["AccessKeyId"],
+            aws_secret_access_key=credentials["SecretAccessKey"],
+            aws_session_token=credentials["SessionToken"],
+            region_name=assume_role_kwargs.get(
+                "region_name",
+                self.get_aws_region(self.devops_env_name),
+            ),
+            expiration_time=parse_expiration(credentials),
         )
-        return bsm_workload
 
-    def get_env_bsm(
+    def _call_sts(self, env_name: str, func: T.Callable[[], T.Any]) -> T.Any:
+        """
+        Call the STS API through :attr:`sts_rate_limiter` if set.
+        """
+        if self.sts_rate_limiter is None:
+            return func()
+        return self.sts_rate_limiter.call(
+            func,
+            on_throttled=lambda e: self.instrumentation.record(
+                OP_STS_THROTTLED, env_name
+            ),
+        )
+
+    def _get_sts_caller_bsm(
+        self,
+        env_name: str,
+        bsm: "BotoSesManager",
+    ) -> "BotoSesManager":
+        """
+        Get the boto session manager that calls ``sts:AssumeRole`` on behalf
+        of ``bsm``. If :attr:`sts_rate_limiter` is set, it is a copy of ``bsm``
+        whose STS client makes a single attempt: botocore retries would send
+        several requests per token, the rate limiter does the retries instead.
+        """
+        if self.sts_rate_limiter is None:
+            return bsm
+        from botocore.config import Config
+
+        sts_client = self.get_client(
+            env_name,
+            "sts",
+            config=Config(retries={"total_max_attempts": 1}),
+        )
+        bsm_sts = copy.copy(bsm)
+        bsm_sts._client_cache = {"sts": sts_client}
+        return bsm_sts
+
+    def _get_or_fetch_cached_credentials(
+        self,
+        env_name: str,
+        key: str,
+        fetch: T.Callable[[], dict[str, str]],
+    ) -> dict[str, str]:
+        """
+        Get the credentials from :attr:`credential_cache` and record the
+        cache hit / miss.
+        """
+        is_miss = False
+
+        def fetch_on_miss() -> dict[str, str]:
+            nonlocal is_miss
+            is_miss = True
+            return fetch()
+
+        credentials = self.credential_cache.get_or_fetch(key, fetch_on_miss)
+        if is_miss:
+            self.instrumentation.record(OP_CREDENTIAL_CACHE_MISS, env_name)
+        else:
+            self.instrumentation.record(OP_CREDENTIAL_CACHE_HIT, env_name)
+        return credentials
+
+    def _new_background_refresh_bsm(
+        self,
+        env_name: str,
+        assume_role: T.Callable[[], "BotoSesManager"],
+        key: str,
+        region_name: str,
+    ) -> "BotoSesManager":
+        """
+        Create a boto session manager whose credentials are renewed in the
+        background by :class:`~which_bsm.refresh.CredentialRefresher`.
+
+        The initial credentials come from the :attr:`credential_cache` if
+        available. The renewals always call STS and update the cache.
+        """
+        from boto_session_manager import BotoSesManager
+        from .refresh import credentials_to_metadata, create_refreshable_botocore_session
+
+        is_first_fetch = True
+
+        def fetch() -> dict[str, str]:
+            return dump_bsm_credentials(assume_role())
+
+        def fetch_metadata() -> dict[str, str]:
+            nonlocal is_first_fetch
+            if self.credential_cache is None:
+                credentials = fetch()
+            elif is_first_fetch:
+                credentials = self._get_or_fetch_cached_credentials(
+                    env_name, key, fetch
+                )
+            else:
+                credentials = fetch()
+                self.credential_cache.put(key, credentials)
+            is_first_fetch = False
+            return credentials_to_metadata(credentials)
+
+        botocore_session, _ = create_refreshable_botocore_session(
+            fetch_metadata=fetch_metadata,
+            refresh_margin=self.background_refresh_margin,
+        )
+        return BotoSesManager(
+            botocore_session=botocore_session,
+            region_name=region_name,
+            # the credentials never expire, they are renewed in the background
+            expiration_time=datetime(2099, 12, 31, 23, 59, 59, tzinfo=timezone.utc),
+        )
+
+    def new_env_bsm(
         self,
         env_name: str,
         assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
     ) -> "BotoSesManager":
         """
-        Get the boto session manager for a specific environment based on the runtime group.
+        Create a new boto session manager for a specific environment based on
+        the runtime group, bypassing the session cache.
         """
+        if env_name == self.devops_env_name:
+            return self.get_devops_bsm()
         if self.is_local_runtime_group:
-            return self.get_env_bsm_in_local(env_name)
+            bsm = self.get_env_bsm_in_local(env_name)
         elif self.is_ci_runtime_group:
-            return self.get_env_bsm_in_ci(env_name, assume_role_kwargs)
+            bsm = self.get_env_bsm_in_ci(env_name, assume_role_kwargs)
         else:  # pragma: no cover
             raise RuntimeError(
                 "get_env_bsm() should only be called in local or CI runtime groups."
             )
+        return self._setup_bsm(env_name, bsm)
+
+    def _get_bsm_cache_key(
+        self,
+        env_name: str,
+        assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+        region: T.Optional[str] = None,
+    ) -> tuple[str, str, str]:
+        if region is None:
+            region = ""
+        if not assume_role_kwargs:
+            return (env_name, "", region)
+        return (
+            env_name,
+            json.dumps(assume_role_kwargs, sort_keys=True, default=str),
+            region,
+        )
+
+    def get_env_bsm(
+        self,
+        env_name: str,
+        assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+        region: T.Optional[str] = None,
+    ) -> "BotoSesManager":
+        """
+        Get the boto session manager for a specific environment based on the runtime group.
+
+        If ``region`` is given, return a boto session manager for that region.
+        It is derived from the credentials of the primary one, so it needs no
+        additional ``sts:AssumeRole`` call in CI, and it is cached as well.
+        The region has to be one of :meth:`get_aws_regions`.
+
+        The boto session manager is cached per environment (and assume role
+        arguments) in a thread-safe :class:`~which_bsm.registry.SessionRegistry`,
+        and is re-created when it is expired. All the ``cached_property``
+        accessors like :attr:`bsm_app`, :attr:`bsm_devops` share this cache,
+        so does :meth:`prefetch`.
+
+        Concurrent first calls for the same environment from many threads
+        collapse into one construction (single-flight). Subclass defined
+        accessors that call this method, like ``bsm_dev``, get the same
+        guarantee even if they are plain ``cached_property``.
+        """
+        if region is not None:
+            return self._get_regional_env_bsm(env_name, region, assume_role_kwargs)
+        key = self._get_bsm_cache_key(env_name, assume_role_kwargs)
+        bsm = self._session_registry.get(key)
+        if bsm is not None:
+            self.instrumentation.record(OP_SESSION_CACHE_HIT, env_name)
+            return bsm
+
+        def factory() -> "BotoSesManager":
+            self.instrumentation.record(OP_SESSION_CACHE_MISS, env_name)
+            with self.instrumentation.measure(OP_SESSION_BUILD, env_name):
+                return self.new_env_bsm(env_name, assume_role_kwargs)
+
+        return self._session_registry.get_or_create(key=key, factory=factory)
+
+    def _get_regional_env_bsm(
+        self,
+        env_name: str,
+        region: str,
+        assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+    ) -> "BotoSesManager":
+        if region not in self.get_aws_regions(env_name):
+            raise ValueError(
+                f"Region '{region}' is not configured for environment '{env_name}' "
+                f"in env_to_aws_region_mapper."
+            )
+        bsm = self.get_env_bsm(env_name, assume_role_kwargs)
+        if bsm.aws_region == region:
+            return bsm
+        key = self._get_bsm_cache_key(env_name, assume_role_kwargs, region)
+
+        credentials = bsm.boto_ses._session.get_credentials()
+
+        def is_valid(regional_bsm: "BotoSesManager") -> bool:
+            # the primary one may have been re-created with new credentials
+            return regional_bsm.boto_ses._session._credentials is credentials and (
+                is_not_expired(regional_bsm)
+            )
+
+        regional_bsm = self._session_registry.get(key, is_valid)
+        if regional_bsm is not None:
+            self.instrumentation.record(OP_SESSION_CACHE_HIT, env_name)
+            return regional_bsm
+
+        def factory() -> "BotoSesManager":
+            self.instrumentation.record(OP_SESSION_CACHE_MISS, env_name)
+            with self.instrumentation.measure(OP_SESSION_BUILD, env_name):
+                return self._setup_bsm(env_name, derive_regional_bsm(bsm, region))
+
+        return self._session_registry.get_or_create(
+            key=key,
+            factory=factory,
+            is_valid=is_valid,
+        )
+
+    def get_env_bsm_many(
+        self,
+        env_names: T.Iterable[str],
+        assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+        max_workers: T.Optional[int] = None,
+    ) -> dict[str, "BotoSesManager"]:
+        """
+        Get the boto session managers for many environments concurrently.
+
+        In CI, each environment requires an ``sts:AssumeRole`` API call. This
+        method runs them in parallel on a thread pool, so the total time is
+        roughly the time of the slowest one instead of the sum of all.
+
+        :param env_names: the environment names
+        :param assume_role_kwargs: see :meth:`get_env_bsm`
+        :param max_workers: the max number of threads, default to the number
+            of environments
+
+        :returns: a mapping from environment name to boto session manager
+        """
+        env_names = list(dict.fromkeys(env_names))
+        if not env_names:
+            return {}
+        if max_workers is None:
+            max_workers = len(env_names)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            bsm_list = list(
+                executor.map(
+                    lambda env_name: self.get_env_bsm(env_name, assume_role_kwargs),
+                    env_names,
+                )
+            )
+        return dict(zip(env_names, bsm_list))
+
+    def prefetch(
+        self,
+        env_names: T.Optional[T.Iterable[str]] = None,
+        max_workers: T.Optional[int] = None,
+    ) -> dict[str, "BotoSesManager"]:
+        """
+        Create the boto session managers for many environments concurrently
+        and store them in the session cache, so that the following
+        :meth:`get_env_bsm` calls and ``cached_property`` accessors return
+        immediately.
+
+        :param env_names: the environment names, default to all environments
+            in ``env_to_aws_region_mapper``
+        :param max_workers: see :meth:`get_env_bsm_many`
+        """
+        if env_names is None:
+            env_names = list(self.env_to_aws_region_mapper)
+        return self.get_env_bsm_many(env_names, max_workers=max_workers)
+
+    def get_env_credentials(self, env_name: str) -> CredentialSnapshot:
+        """
+        Get the credentials of an environment, with the region of the environment.
+
+        In CI, when :attr:`credential_cache` is set and holds fresh credentials
+        for the environment, they are returned without importing the AWS SDK
+        or creating any boto session. Otherwise the boto session manager is
+        resolved with :meth:`get_env_bsm`, which also warms the cache.
+        """
+        region_name = self.get_aws_region(env_name)
+        if (
+            self.is_ci_runtime_group
+            and self.credential_cache is not None
+            and env_name != self.devops_env_name
+        ):
+            key = make_cache_key(
+                role_arn=self.topology.get_role_arn(env_name),
+                role_session_name=self.topology.get_role_session_name(env_name),
+                assume_role_kwargs={},
+            )
+            credentials = self.credential_cache.get(key)
+            if credentials is not None:
+                self.instrumentation.record(OP_CREDENTIAL_CACHE_HIT, env_name)
+                return CredentialSnapshot(
+                    access_key_id=credentials["AccessKeyId"],
+                    secret_access_key=credentials["SecretAccessKey"],
+                    session_token=credentials["SessionToken"],
+                    expiration=credentials["Expiration"],
+                    region_name=region_name,
+                )
+        bsm = self.get_env_bsm(env_name)
+        return dataclasses.replace(
+            CredentialSnapshot.from_bsm(bsm),
+            region_name=region_name,
+        )
+
+    def _get_expected_aws_account_id(self, env_name: str) -> T.Optional[str]:
+        if env_name == self.devops_env_name:
+            return None
+        return self.topology.get(env_name).aws_account_id
+
+    def verify_identities(
+        self,
+        env_names: T.Optional[T.Iterable[str]] = None,
+        max_workers: T.Optional[int] = None,
+    ) -> dict[str, CallerIdentity]:
+        """
+        Call ``sts:GetCallerIdentity`` for many environments concurrently and
+        confirm that each one returns the AWS account ID configured in
+        ``${ENV_NAME}_AWS_ACCOUNT_ID``. The environments without a configured
+        AWS account ID (the devops environment, or local runs without the
+        environment variable) are not checked.
+
+        A verified identity is cached as long as the boto session manager of
+        the environment is, so the check is done once per credentials.
+
+        :param env_names: the environment names, default to all environments
+            in ``env_to_aws_region_mapper``
+        :param max_workers: the max number of threads, default to the number
+            of environments
+
+        :returns: a mapping from environment name to caller identity
+
+        :raises ValueError: If any environment returns an unexpected AWS account ID
+        """
+        if env_names is None:
+            env_names = list(self.env_to_aws_region_mapper)
+        env_names = list(dict.fromkeys(env_names))
+        if not env_names:
+            return {}
+        if max_workers is None:
+            max_workers = len(env_names)
+
+        def get_identity(env_name: str) -> CallerIdentity:
+            bsm = self.get_env_bsm(env_name)
+            cached = self._verified_identities.get(env_name)
+            if cached is not None and cached[0] is bsm:
+                return cached[1]
+            identity = CallerIdentity.from_sts_client(
+                env_name=env_name,
+                sts_client=self.get_client(env_name, "sts"),
+            )
+            expected = self._get_expected_aws_account_id(env_name)
+            if expected is None or identity.aws_account_id == expected:
+                self._verified_identities[env_name] = (bsm, identity)
+            else:
+                self._verified_identities.pop(env_name, None)
+            return identity
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            identities = dict(zip(env_names, executor.map(get_identity, env_names)))
+
+        errors = list()
+        for env_name, identity in identities.items():
+            expected = self._get_expected_aws_account_id(env_name)
+            if expected is not None and identity.aws_account_id != expected:
+                errors.append(
+                    f"'{env_name}' expects AWS account {expected}, "
+                    f"got {identity.aws_account_id} ({identity.principal_arn})"
+                )
+        if errors:
+            raise ValueError("AWS account ID mismatch: " + "; ".join(errors))
+        return identities
 
     def get_app_bsm(self) -> "BotoSesManager":
         """
@@ -282,3 +1240,168 @@ class BaseBotoSesEnum:
         Get the boto session manager for the application environment.
         """
         return self.get_app_bsm()
+
+    async def aget_env_bsm(
+        self,
+        env_name: str,
+        assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+        region: T.Optional[str] = None,
+    ) -> "BotoSesManager":
+        """
+        The asyncio version of :meth:`get_env_bsm`.
+
+        The blocking work (profile resolution, ``sts:AssumeRole``) runs in the
+        event loop's default executor, so the event loop is never blocked.
+        Concurrent awaits for the same environment share one executor job.
+        A cached boto session manager is returned without using the executor.
+        """
+        import asyncio
+
+        bsm = self._session_registry.get(
+            self._get_bsm_cache_key(env_name, assume_role_kwargs)
+        )
+        if bsm is not None:
+            if region is None:
+                return bsm
+            # deriving a regional one from the cached credentials does no I/O
+            return self.get_env_bsm(env_name, assume_role_kwargs, region)
+
+        key = self._get_bsm_cache_key(env_name, assume_role_kwargs, region)
+        loop = asyncio.get_running_loop()
+        future = self._async_inflight.get(key)
+        if future is None or future.get_loop() is not loop:
+            future = loop.run_in_executor(
+                None,
+                self.get_env_bsm,
+                env_name,
+                assume_role_kwargs,
+                region,
+            )
+            self._async_inflight[key] = future
+
+            def done_callback(f: "asyncio.Future"):
+                if self._async_inflight.get(key) is f:
+                    del self._async_inflight[key]
+
+            future.add_done_callback(done_callback)
+        # one cancelled awaiter should not cancel the others
+        return await asyncio.shield(future)
+
+    async def aget_app_bsm(self) -> "BotoSesManager":
+        """
+        The asyncio version of :meth:`get_app_bsm`.
+        """
+        return await self.aget_env_bsm(env_name=self.default_app_env_name)
+
+    async def aget_env_bsm_many(
+        self,
+        env_names: T.Iterable[str],
+        assume_role_kwargs: T.Optional[dict[str, T.Any]] = None,
+    ) -> dict[str, "BotoSesManager"]:
+        """
+        The asyncio version of :meth:`get_env_bsm_many`, gathers all
+        environments concurrently.
+        """
+        import asyncio
+
+        env_names = list(dict.fromkeys(env_names))
+        bsm_list = await asyncio.gather(
+            *[
+                self.aget_env_bsm(env_name, assume_role_kwargs)
+                for env_name in env_names
+            ]
+        )
+        return dict(zip(env_names, bsm_list))
+
+    async def aprefetch(
+        self,
+        env_names: T.Optional[T.Iterable[str]] = None,
+    ) -> dict[str, "BotoSesManager"]:
+        """
+        The asyncio version of :meth:`prefetch`.
+        """
+        if env_names is None:
+            env_names = list(self.env_to_aws_region_mapper)
+        return await self.aget_env_bsm_many(env_names)
+
+    def get_client(
+        self,
+        env_name: str,
+        service_name: str,
+        region_name: T.Optional[str] = None,
+        config: T.Optional["Config"] = None,
+        per_thread: bool = False,
+    ) -> "BaseClient":
+        """
+        Get a pooled boto3 client for a specific environment and service.
+
+        The clients are memoized in a bounded LRU pool keyed by
+        ``(env_name, service_name, region_name, config)``, so the cost of
+        loading the service model and resolving the endpoint is paid once.
+
+        :param env_name: the environment name
+        :param service_name: the AWS service name, for example ``"s3"``
+        :param region_name: default to the region of the environment
+        :param config: optional botocore ``Config`` object, it overrides the
+            configured one, see :meth:`get_client_config`. The configured one
+            is built on the first call per environment and service, changes
+            of the client config mappers after that are not picked up
+        :param per_thread: if True, each thread gets its own client. Use it
+            when the client is not safe to share, for example when you
+            register event handlers on it.
+        """
+        bsm = self.get_env_bsm(env_name)
+        if region_name is None:
+            region_name = bsm.aws_region
+        try:
+            service_config, config_key = self._client_config_cache[
+                (env_name, service_name)
+            ]
+        except KeyError:
+            service_config = self.get_client_config(env_name, service_name)
+            config_key = make_config_key(service_config)
+            self._client_config_cache[(env_name, service_name)] = (
+                service_config,
+                config_key,
+            )
+        if config is None:
+            config = service_config
+        else:
+            if service_config is not None:
+                config = service_config.merge(config)
+            config_key = make_config_key(config)
+        key = (
+            env_name,
+            service_name,
+            region_name,
+            config_key,
+        )
+        is_miss = False
+
+        def factory() -> "BaseClient":
+            nonlocal is_miss
+            is_miss = True
+            with self.instrumentation.measure(OP_CLIENT_CREATE, env_name):
+                return bsm.boto_ses.client(
+                    service_name,
+                    region_name=region_name,
+                    config=config,
+                )
+
+        client = self._client_pool.get_or_create(
+            key=key,
+            bsm=bsm,
+            factory=factory,
+            per_thread=per_thread,
+        )
+        if is_miss:
+            self.instrumentation.record(OP_CLIENT_CACHE_MISS, env_name)
+        else:
+            self.instrumentation.record(OP_CLIENT_CACHE_HIT, env_name)
+        return client
+
+    def get_client_pool_stats(self) -> ClientPoolStats:
+        """
+        Get the hit / miss counters of the client pool used by :meth:`get_client`.
+        """
+        return self._client_pool.stats()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+One botocore data loader shared by all the boto sessions created by the
+library.
+
+Every botocore session owns a ``data_loader`` component that reads the
+service models, endpoint rule sets, paginators, ... from the JSON files
+shipped with botocore, and memoizes them. With many environments, each
+session loads and keeps its own copy of the same models. Registering one
+loader in all sessions parses each file once per process.
+"""
+
+import typing as T
+import os
+import threading
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import boto3.session
+    from botocore.loaders import Loader
+
+_lock = threading.Lock()
+_shared_loader: T.Optional["Loader"] = None
+
+
+def get_shared_loader() -> "Loader":
+    """
+    Get the process wide botocore loader, with the boto3 resource models
+    in its search paths.
+    """
+    global _shared_loader
+    if _shared_loader is None:
+        with _lock:
+            if _shared_loader is None:
+                import boto3
+                from botocore.loaders import create_loader
+
+                loader = create_loader()
+                loader.search_paths.append(
+                    os.path.join(os.path.dirname(boto3.__file__), "data")
+                )
+                _shared_loader = loader
+    return _shared_loader
+
+
+def is_shared_loader(loader: T.Any) -> bool:
+    return loader is not None and loader is _shared_loader
+
+
+def share_loader(boto_ses: "boto3.session.Session"):
+    """
+    Make the boto3 session use the shared loader.
+    """
+    loader = get_shared_loader()
+    botocore_session = boto_ses._session
+    if botocore_session.get_component("data_loader") is not loader:
+        botocore_session.register_component("data_loader", loader)
+    boto_ses._loader = loader
+    # a boto3 session created from a botocore session that already uses the
+    # shared loader appends the boto3 data path again
+    search_paths = list(dict.fromkeys(loader.search_paths))
+    if len(search_paths) != len(loader.search_paths):
+        with _lock:
+            loader.search_paths[:] = search_paths
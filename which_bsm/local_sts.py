@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+
+"""
+Offline local STS stand-in for tests, benchmarks and load runs.
+
+:class:`LocalSts` answers ``sts:AssumeRole`` and ``sts:GetCallerIdentity``
+with fake credentials, a configurable latency and throttling. It can be used
+in two ways:
+
+- in-process: :meth:`LocalSts.attach` registers botocore event handlers on a
+  ``BotoSesManager`` so the STS API calls never leave the process.
+- over HTTP: :class:`LocalStsServer` serves the STS query protocol on
+  ``127.0.0.1``, :meth:`LocalStsServer.attach` sends the STS API calls of a
+  ``BotoSesManager`` to it. Use it when many processes share one stand-in,
+  for example in load tests.
+
+Set ``BaseBotoSesEnum.sts_stand_in`` to either of them to point all the
+sessions created by ``BaseBotoSesEnum`` at the stand-in.
+"""
+
+import typing as T
+import time
+import uuid
+import random
+import threading
+import collections
+import dataclasses
+from urllib.parse import parse_qs
+from datetime import datetime, timezone, timedelta
+from xml.sax.saxutils import escape
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import boto3.session
+    from boto_session_manager import BotoSesManager
+
+STS_XMLNS = "https://sts.amazonaws.com/doc/2011-06-15/"
+
+
+class LocalStsError(Exception):
+    """
+    An STS error response.
+    """
+
+    def __init__(self, code: str, message: str, status_code: int = 400):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+@dataclasses.dataclass(frozen=True)
+class Identity:
+    user_id: str
+    account: str
+    arn: str
+
+
+@dataclasses.dataclass
+class LocalStsStats:
+    """
+    The request counters of a :class:`LocalSts`.
+    """
+
+    assume_role: int = dataclasses.field(default=0)
+    get_caller_identity: int = dataclasses.field(default=0)
+    throttled: int = dataclasses.field(default=0)
+
+    def to_dict(self) -> dict[str, int]:
+        return dataclasses.asdict(self)
+
+
+class LocalSts:
+    """
+    In-process fake STS.
+
+    :param latency: seconds to sleep before answering each request
+    :param throttle_probability: the probability to answer a request with a
+        ``Throttling`` error, in [0, 1]
+    :param max_requests_per_second: if set, requests beyond this rate (in a
+        sliding one second window) are answered with a ``Throttling`` error,
+        like the real STS does
+    :param default_account_id: the account ID of unknown callers, for example
+        the devops session
+    :param seed: the random seed for ``throttle_probability``
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        throttle_probability: float = 0.0,
+        max_requests_per_second: T.Optional[float] = None,
+        default_account_id: str = "000000000000",
+        seed: T.Optional[int] = None,
+    ):
+        self.latency = latency
+        self.throttle_probability = throttle_probability
+        self.max_requests_per_second = max_requests_per_second
+        self.default_account_id = default_account_id
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._request_times: T.Deque[float] = collections.deque()
+        self._identities: dict[str, Identity] = dict()
+        self.stats = LocalStsStats()
+
+    @property
+    def default_identity(self) -> Identity:
+        return Identity(
+            user_id="AIDALOCALSTS",
+            account=self.default_account_id,
+            arn=f"arn:aws:iam::{self.default_account_id}:user/local-sts",
+        )
+
+    def _check_throttle(self):
+        with self._lock:
+            throttled = False
+            if self.throttle_probability and (
+                self._random.random() < self.throttle_probability
+            ):
+                throttled = True
+            if self.max_requests_per_second is not None:
+                now = time.monotonic()
+                while self._request_times and now - self._request_times[0] >= 1:
+                    self._request_times.popleft()
+                if len(self._request_times) >= self.max_requests_per_second:
+                    throttled = True
+                else:
+                    self._request_times.append(now)
+            if throttled:
+                self.stats.throttled += 1
+                raise LocalStsError("Throttling", "Rate exceeded")
+
+    def _before_request(self):
+        if self.latency:
+            time.sleep(self.latency)
+        self._check_throttle()
+
+    def assume_role(
+        self,
+        role_arn: str,
+        role_session_name: str,
+        duration_seconds: int = 3600,
+    ) -> dict[str, T.Any]:
+        """
+        Return the ``sts:AssumeRole`` response.
+
+        :raises LocalStsError: if throttled or the role ARN is invalid
+        """
+        self._before_request()
+        parts = role_arn.split(":")
+        if len(parts) != 6 or not parts[5].startswith("role/"):
+            raise LocalStsError("ValidationError", f"Invalid RoleArn {role_arn!r}")
+        account = parts[4]
+        role_name = parts[5].split("/")[-1]
+        access_key_id = f"ASIA{uuid.uuid4().hex[:16].upper()}"
+        role_id = f"AROA{uuid.uuid4().hex[:17].upper()}"
+        identity = Identity(
+            user_id=f"{role_id}:{role_session_name}",
+            account=account,
+            arn=f"arn:aws:sts::{account}:assumed-role/{role_name}/{role_session_name}",
+        )
+        with self._lock:
+            self._identities[access_key_id] = identity
+            self.stats.assume_role += 1
+        expiration = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(
+            seconds=duration_seconds
+        )
+        return {
+            "Credentials": {
+                "AccessKeyId": access_key_id,
+                "SecretAccessKey": uuid.uuid4().hex,
+                "SessionToken": uuid.uuid4().hex,
+                "Expiration": expiration,
+            },
+            "AssumedRoleUser": {
+                "AssumedRoleId": identity.user_id,
+                "Arn": identity.arn,
+            },
+        }
+
+    def get_caller_identity(
+        self,
+        access_key_id: T.Optional[str] = None,
+    ) -> dict[str, str]:
+        """
+        Return the ``sts:GetCallerIdentity`` response of the caller.
+
+        :raises LocalStsError: if throttled
+        """
+        self._before_request()
+        with self._lock:
+            identity = self._identities.get(access_key_id, self.default_identity)
+            self.stats.get_caller_identity += 1
+        return {
+            "UserId": identity.user_id,
+            "Account": identity.account,
+            "Arn": identity.arn,
+        }
+
+    def _handle_before_call(self, model, params, request_signer=None, **kwargs):
+        """
+        botocore ``before-call.sts.*`` event handler, a non None return value
+        short-circuits the HTTP request.
+        """
+        from botocore.awsrequest import AWSResponse
+
+        body = params.get("body", {})
+        try:
+            if model.name == "AssumeRole":
+                parsed = self.assume_role(
+                    role_arn=body["RoleArn"],
+                    role_session_name=body["RoleSessionName"],
+                    duration_seconds=int(body.get("DurationSeconds", 3600)),
+                )
+            elif model.name == "GetCallerIdentity":
+                access_key_id = None
+                if request_signer is not None:
+                    credentials = request_signer._credentials
+                    if credentials is not None:
+                        access_key_id = credentials.get_frozen_credentials().access_key
+                parsed = self.get_caller_identity(access_key_id)
+            else:  # pragma: no cover
+                return None
+        except LocalStsError as e:
+            parsed = {
+                "Error": {"Code": e.code, "Message": e.message},
+                "ResponseMetadata": {"HTTPStatusCode": e.status_code},
+            }
+            return AWSResponse(None, e.status_code, {}, None), parsed
+        parsed["ResponseMetadata"] = {"HTTPStatusCode": 200}
+        return AWSResponse(None, 200, {}, None), parsed
+
+    def attach_boto_ses(self, boto_ses: "boto3.session.Session"):
+        """
+        Answer the STS API calls of the boto3 session in-process.
+        It only affects the clients created after this call.
+        """
+        boto_ses.events.register(
+            "before-call.sts.AssumeRole",
+            self._handle_before_call,
+            unique_id="which_bsm-local-sts-AssumeRole",
+        )
+        boto_ses.events.register(
+            "before-call.sts.GetCallerIdentity",
+            self._handle_before_call,
+            unique_id="which_bsm-local-sts-GetCallerIdentity",
+        )
+
+    def attach(self, bsm: "BotoSesManager") -> "BotoSesManager":
+        """
+        Answer the STS API calls of the boto session manager in-process,
+        see :meth:`attach_boto_ses`.
+        """
+        self.attach_boto_ses(bsm.boto_ses)
+        return bsm
+
+
+# ------------------------------------------------------------------------------
+# HTTP server
+# ------------------------------------------------------------------------------
+def _to_xml(data: T.Any) -> str:
+    if isinstance(data, dict):
+        return "".join(f"<{k}>{_to_xml(v)}</{k}>" for k, v in data.items())
+    if isinstance(data, datetime):
+        return data.strftime("%Y-%m-%dT%H:%M:%SZ")
+    return escape(str(data))
+
+
+def _parse_access_key_id(authorization: str) -> T.Optional[str]:
+    # AWS4-HMAC-SHA256 Credential=AKID/20240101/us-east-1/sts/aws4_request, ...
+    marker = "Credential="
+    index = authorization.find(marker)
+    if index == -1:
+        return None
+    return authorization[index + len(marker) :].split("/", 1)[0]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def log_message(self, format, *args):  # pragma: no cover
+        pass
+
+    def _send(self, status_code: int, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {
+            k: v[0]
+            for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()
+        }
+        local_sts = self.server.local_sts
+        action = form.get("Action")
+        request_id = str(uuid.uuid4())
+        try:
+            if action == "AssumeRole":
+                result = local_sts.assume_role(
+                    role_arn=form.get("RoleArn", ""),
+                    role_session_name=form.get("RoleSessionName", ""),
+                    duration_seconds=int(form.get("DurationSeconds", 3600)),
+                )
+            elif action == "GetCallerIdentity":
+                result = local_sts.get_caller_identity(
+                    _parse_access_key_id(self.headers.get("Authorization", ""))
+                )
+            else:
+                raise LocalStsError("InvalidAction", f"Unsupported action {action!r}")
+        except LocalStsError as e:
+            body = (
+                f'<ErrorResponse xmlns="{STS_XMLNS}">'
+                f"<Error><Type>Sender</Type><Code>{e.code}</Code>"
+                f"<Message>{escape(e.message)}</Message></Error>"
+                f"<RequestId>{request_id}</RequestId></ErrorResponse>"
+            )
+            self._send(e.status_code, body)
+            return
+        body = (
+            f'<{action}Response xmlns="{STS_XMLNS}">'
+            f"<{action}Result>{_to_xml(result)}</{action}Result>"
+            f"<ResponseMetadata><RequestId>{request_id}</RequestId></ResponseMetadata>"
+            f"</{action}Response>"
+        )
+        self._send(200, body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    local_sts: LocalSts
+
+
+class LocalStsServer:
+    """
+    Serve a :class:`LocalSts` over HTTP on ``127.0.0.1``.
+
+    Example::
+
+        with LocalStsServer(LocalSts(latency=0.05)) as server:
+            boto_ses_enum.sts_stand_in = server
+            ...
+
+    :param local_sts: the fake STS to serve
+    :param port: the port to listen on, 0 to pick a free port
+    """
+
+    def __init__(
+        self,
+        local_sts: T.Optional[LocalSts] = None,
+        port: int = 0,
+    ):
+        if local_sts is None:
+            local_sts = LocalSts()
+        self.local_sts = local_sts
+        self.port = port
+        self._server: T.Optional[_Server] = None
+        self._thread: T.Optional[threading.Thread] = None
+
+    @property
+    def endpoint_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "LocalStsServer":
+        self._server = _Server(("127.0.0.1", self.port), _Handler)
+        self._server.local_sts = self.local_sts
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            name="which_bsm-local-sts-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self) -> "LocalStsServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _handle_before_send(self, request, **kwargs):
+        """
+        botocore ``before-send.sts`` event handler, send the signed request
+        to this server instead of the STS endpoint.
+        """
+        request.url = self.endpoint_url + "/"
+
+    def attach_boto_ses(self, boto_ses: "boto3.session.Session"):
+        """
+        Send the STS API calls of the boto3 session to this server.
+        It only affects the clients created after this call. If the session
+        has no credentials, fake static credentials are used to sign the
+        requests.
+        """
+        if boto_ses.get_credentials() is None:
+            boto_ses._session.set_credentials("AKIALOCALSTS", "secret")
+        boto_ses.events.register(
+            "before-send.sts",
+            self._handle_before_send,
+            unique_id="which_bsm-local-sts-server",
+        )
+
+    def attach(self, bsm: "BotoSesManager") -> "BotoSesManager":
+        """
+        Send the STS API calls of the boto session manager to this server,
+        see :meth:`attach_boto_ses`.
+        """
+        self.attach_boto_ses(bsm.boto_ses)
+        return bsm
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pluggable instrumentation for session creation and STS calls.
+
+:class:`Instrumentation` records built-in counters and latency histograms per
+operation and environment, and calls the registered event hooks for every
+event. The metrics can be exported as a dict or in the Prometheus text format.
+
+Built-in operations:
+
+- ``session_build``: create a new boto session manager for an environment
+- ``assume_role``: the ``sts:AssumeRole`` API call in CI
+- ``client_create``: create a new boto3 client
+- ``session_cache_hit`` / ``session_cache_miss``
+- ``credential_cache_hit`` / ``credential_cache_miss``
+- ``client_cache_hit`` / ``client_cache_miss``
+"""
+
+import typing as T
+import time
+import logging
+import threading
+import contextlib
+import dataclasses
+
+logger = logging.getLogger(__name__)
+
+OP_SESSION_BUILD = "session_build"
+OP_ASSUME_ROLE = "assume_role"
+OP_CLIENT_CREATE = "client_create"
+OP_SESSION_CACHE_HIT = "session_cache_hit"
+OP_SESSION_CACHE_MISS = "session_cache_miss"
+OP_CREDENTIAL_CACHE_HIT = "credential_cache_hit"
+OP_CREDENTIAL_CACHE_MISS = "credential_cache_miss"
+OP_CLIENT_CACHE_HIT = "client_cache_hit"
+OP_CLIENT_CACHE_MISS = "client_cache_miss"
+OP_STS_THROTTLED = "sts_throttled"
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Event:
+    """
+    An instrumentation event passed to the hooks.
+
+    :param operation: the operation name, for example ``"assume_role"``
+    :param env_name: the environment name
+    :param status: ``"ok"`` or ``"error"``
+    :param duration: the duration in seconds, None for counter only events
+    :param timestamp: the unix timestamp when the event is recorded
+    """
+
+    operation: str
+    env_name: str
+    status: str = STATUS_OK
+    duration: T.Optional[float] = None
+    timestamp: float = dataclasses.field(default_factory=time.time)
+
+
+class Histogram:
+    """
+    A cumulative latency histogram with fixed upper bounds.
+    """
+
+    def __init__(self, buckets: T.Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict[str, T.Any]:
+        return {
+            "buckets": dict(zip([str(b) for b in self.buckets], self.counts)),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+Key = T.Tuple[str, str, str]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Instrumentation:
+    """
+    Counters, latency histograms and event hooks.
+
+    :param buckets: the histogram bucket upper bounds in seconds
+    """
+
+    def __init__(self, buckets: T.Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._hooks: list[T.Callable[[Event], None]] = list()
+        self._counters: dict[Key, int] = dict()
+        self._histograms: dict[Key, Histogram] = dict()
+
+    def add_hook(self, hook: T.Callable[[Event], None]):
+        """
+        Register a callable that is called with every :class:`Event`.
+        Exceptions raised by hooks are logged and ignored.
+        """
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: T.Callable[[Event], None]):
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def record(
+        self,
+        operation: str,
+        env_name: str,
+        duration: T.Optional[float] = None,
+        status: str = STATUS_OK,
+    ) -> Event:
+        """
+        Record an event, increase the counter, observe the duration if given,
+        and call the hooks.
+        """
+        event = Event(
+            operation=operation,
+            env_name=env_name,
+            status=status,
+            duration=duration,
+        )
+        key = (operation, env_name, status)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            if duration is not None:
+                try:
+                    histogram = self._histograms[key]
+                except KeyError:
+                    histogram = Histogram(self.buckets)
+                    self._histograms[key] = histogram
+                histogram.observe(duration)
+            hooks = list(self._hooks)
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:  # pragma: no cover
+                logger.warning("Instrumentation hook %r failed.", hook, exc_info=True)
+        return event
+
+    @contextlib.contextmanager
+    def measure(self, operation: str, env_name: str):
+        """
+        Measure the duration of the code block and record it, the status is
+        ``"error"`` if the code block raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(
+                operation,
+                env_name,
+                duration=time.perf_counter() - start,
+                status=STATUS_ERROR,
+            )
+            raise
+        self.record(operation, env_name, duration=time.perf_counter() - start)
+
+    def get_count(
+        self,
+        operation: str,
+        env_name: T.Optional[str] = None,
+        status: T.Optional[str] = None,
+    ) -> int:
+        """
+        Get the counter value, optionally filtered by environment and status.
+        """
+        with self._lock:
+            return sum(
+                value
+                for (op, env, st), value in self._counters.items()
+                if op == operation
+                and (env_name is None or env == env_name)
+                and (status is None or st == status)
+            )
+
+    def _after_fork_in_child(self):
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def to_dict(self) -> dict[str, list[dict[str, T.Any]]]:
+        """
+        Export the metrics as a JSON serializable dict.
+        """
+        with self._lock:
+            counters = [
+                {"operation": op, "env_name": env, "status": st, "value": value}
+                for (op, env, st), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {"operation": op, "env_name": env, "status": st, **hist.to_dict()}
+                for (op, env, st), hist in sorted(self._histograms.items())
+            ]
+        return {"counters": counters, "histograms": histograms}
+
+    def to_prometheus(self, prefix: str = "which_bsm") -> str:
+        """
+        Export the metrics in the Prometheus text exposition format.
+        """
+        name_total = f"{prefix}_operations_total"
+        name_duration = f"{prefix}_operation_duration_seconds"
+        lines = [
+            f"# HELP {name_total} Number of which_bsm operations.",
+            f"# TYPE {name_total} counter",
+        ]
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(hist.counts), hist.sum, hist.count))
+                for key, hist in self._histograms.items()
+            )
+        for (op, env, st), value in counters:
+            labels = f'operation="{_escape(op)}",env="{_escape(env)}",status="{_escape(st)}"'
+            lines.append(f"{name_total}{{{labels}}} {value}")
+        lines.append(
+            f"# HELP {name_duration} Duration of which_bsm operations in seconds."
+        )
+        lines.append(f"# TYPE {name_duration} histogram")
+        for (op, env, st), (counts, sum_, count) in histograms:
+            labels = f'operation="{_escape(op)}",env="{_escape(env)}",status="{_escape(st)}"'
+            for upper_bound, bucket_count in zip(self.buckets, counts):
+                lines.append(
+                    f'{name_duration}_bucket{{{labels},le="{upper_bound}"}} {bucket_count}'
+                )
+            lines.append(f'{name_duration}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{name_duration}_sum{{{labels}}} {sum_}")
+            lines.append(f"{name_duration}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
@@ -25,6 +25,8 @@ path_cov_index_html = dir_htmlcov / "index.html"
 dir_unit_test = dir_project_root / "tests"
 dir_int_test = dir_project_root / "tests_int"
 dir_load_test = dir_project_root / "tests_load"
+dir_benchmark = dir_project_root / "benchmarks"
+dir_benchmark_results = dir_benchmark / "results"
 
 # ------------------------------------------------------------------------------
 # Doc Related
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+"""
+Startup profiler for the credential bootstrap path.
+
+:class:`StartupProfiler` times named phases of a code block, collects the
+:class:`~which_bsm.metrics.Instrumentation` events (session build, role
+assumption, ...) of the watched ``BaseBotoSesEnum`` objects, and optionally
+runs ``cProfile``::
+
+    with StartupProfiler(cprofile_path="startup.prof") as profiler:
+        with profiler.phase("config_load"):
+            boto_ses_enum = BaseBotoSesEnum.from_file("which_bsm.json")
+        profiler.watch(boto_ses_enum)
+        with profiler.phase("get_env_bsm"):
+            bsm = boto_ses_enum.get_env_bsm("dev")
+    print(profiler.format())
+
+:func:`profile_bootstrap` profiles the whole ``get_env_bsm`` bootstrap of an
+environment from a config file, it is also available as
+``which-bsm profile --env ${env_name}``.
+"""
+
+import typing as T
+import time
+import threading
+import contextlib
+import dataclasses
+
+from .config import dir_default_config_cache
+from .metrics import Event
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    import cProfile
+    from pathlib import Path
+    from .impl import BaseBotoSesEnum
+
+PHASE_RUNTIME_DETECTION = "runtime_detection"
+PHASE_CONFIG_LOAD = "config_load"
+PHASE_IMPORT_AWS_SDK = "import_aws_sdk"
+PHASE_GET_ENV_BSM = "get_env_bsm"
+PHASE_BOTO_SESSION_CREATE = "boto_session_create"
+PHASE_CREDENTIALS_RESOLVE = "credentials_resolve"
+
+
+@dataclasses.dataclass(frozen=True)
+class Phase:
+    """
+    :param name: the phase name
+    :param duration: the duration in seconds
+    """
+
+    name: str
+    duration: float
+
+
+class StartupProfiler:
+    """
+    Time the phases of a code block.
+
+    :param cprofile_path: if set, run ``cProfile`` in the context and write
+        the stats to this file, open it with ``pstats`` or ``snakeviz``
+    """
+
+    def __init__(self, cprofile_path: T.Optional[T.Union[str, "Path"]] = None):
+        self.cprofile_path = cprofile_path
+        self.phases: list[Phase] = list()
+        self.events: list[Event] = list()
+        self._lock = threading.Lock()
+        self._watched: list["BaseBotoSesEnum"] = list()
+        self._cprofile: T.Optional["cProfile.Profile"] = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """
+        Time the code block as a phase, the phase is recorded even if the
+        code block raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append(Phase(name=name, duration=time.perf_counter() - start))
+
+    def _on_event(self, event: Event):
+        if event.duration is not None:
+            with self._lock:
+                self.events.append(event)
+
+    def watch(self, boto_ses_enum: "BaseBotoSesEnum"):
+        """
+        Collect the timed instrumentation events of ``boto_ses_enum`` until
+        the profiler exits.
+        """
+        boto_ses_enum.instrumentation.add_hook(self._on_event)
+        self._watched.append(boto_ses_enum)
+
+    @property
+    def total(self) -> float:
+        return sum(phase.duration for phase in self.phases)
+
+    def __enter__(self) -> "StartupProfiler":
+        if self.cprofile_path is not None:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(str(self.cprofile_path))
+            self._cprofile = None
+        for boto_ses_enum in self._watched:
+            boto_ses_enum.instrumentation.remove_hook(self._on_event)
+        self._watched.clear()
+
+    def to_dict(self) -> dict[str, T.Any]:
+        return {
+            "total_ms": self.total * 1000,
+            "phases": [
+                {"name": phase.name, "duration_ms": phase.duration * 1000}
+                for phase in self.phases
+            ],
+            "events": [
+                {
+                    "operation": event.operation,
+                    "env_name": event.env_name,
+                    "status": event.status,
+                    "duration_ms": event.duration * 1000,
+                }
+                for event in self.events
+            ],
+        }
+
+    def format(self) -> str:
+        """
+        Format the phases and events as a text report.
+        """
+        total = self.total
+        lines = [f"{'phase':<24} {'ms':>10} {'%':>7}"]
+        for phase in self.phases:
+            percent = phase.duration / total * 100 if total else 0.0
+            lines.append(
+                f"{phase.name:<24} {phase.duration * 1000:>10.2f} {percent:>6.1f}%"
+            )
+        lines.append(f"{'total':<24} {total * 1000:>10.2f}")
+        if self.events:
+            lines.append("")
+            lines.append(f"{'event':<24} {'env':<12} {'ms':>10}")
+            for event in self.events:
+                name = event.operation
+                if event.status != "ok":
+                    name = f"{name} ({event.status})"
+                lines.append(
+                    f"{name:<24} {event.env_name:<12} {event.duration * 1000:>10.2f}"
+                )
+        return "\n".join(lines)
+
+
+def profile_bootstrap(
+    path_config: T.Union[str, "Path"],
+    env_name: str,
+    use_credential_cache: bool = False,
+    cprofile_path: T.Optional[T.Union[str, "Path"]] = None,
+    dir_config_cache: T.Optional[T.Union[str, "Path"]] = dir_default_config_cache,
+) -> StartupProfiler:
+    """
+    Profile the ``get_env_bsm`` bootstrap of an environment from a config
+    file, in the same order as the real path:
+
+    - ``runtime_detection``: :func:`~which_bsm.runtime.load_runtime`
+    - ``config_load``: parse and validate the config file
+    - ``import_aws_sdk``: import ``boto3``, ``botocore`` and
+      ``boto_session_manager``, 0 if already imported
+    - ``get_env_bsm``: the session cache miss, including the ``sts:AssumeRole``
+      calls in CI, see the ``assume_role`` events
+    - ``boto_session_create``: create the boto3 session, including reading
+      the AWS CLI config files for profiles
+    - ``credentials_resolve``: resolve the credentials of the boto3 session
+
+    :param use_credential_cache: see :func:`which_bsm.cli.load_boto_ses_enum`
+    :param dir_config_cache: see :func:`which_bsm.cli.load_boto_ses_enum`
+    """
+    from .runtime import load_runtime
+    from .cli import load_boto_ses_enum
+
+    with StartupProfiler(cprofile_path=cprofile_path) as profiler:
+        with profiler.phase(PHASE_RUNTIME_DETECTION):
+            load_runtime()
+        with profiler.phase(PHASE_CONFIG_LOAD):
+            boto_ses_enum = load_boto_ses_enum(
+                path_config,
+                use_credential_cache=use_credential_cache,
+                dir_config_cache=dir_config_cache,
+            )
+        profiler.watch(boto_ses_enum)
+        with profiler.phase(PHASE_IMPORT_AWS_SDK):
+            import boto3  # noqa: F401
+            import botocore.session  # noqa: F401
+            import boto_session_manager  # noqa: F401
+        with profiler.phase(PHASE_GET_ENV_BSM):
+            bsm = boto_ses_enum.get_env_bsm(env_name)
+        with profiler.phase(PHASE_BOTO_SESSION_CREATE):
+            boto_ses = bsm.boto_ses
+        with profiler.phase(PHASE_CREDENTIALS_RESOLVE):
+            credentials = boto_ses.get_credentials()
+            if credentials is not None:
+                credentials.get_frozen_credentials()
+    return profiler
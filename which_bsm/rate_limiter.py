@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cross-process rate limiter for STS API calls.
+
+When many CI jobs (for example a large build matrix) start on the same runner
+at the same time, they all call ``sts:AssumeRole`` within seconds, and STS
+throttles them. :class:`RateLimiter` is a token bucket whose state is a small
+JSON file protected by a file lock, so all processes on the machine share
+one request budget::
+
+    {"tokens": 4.5, "timestamp": 1700000000.0}
+
+Throttling errors that still happen are retried with jittered exponential
+backoff by :meth:`RateLimiter.call`. A throttling error also empties the
+shared bucket, so the other processes slow down as well.
+"""
+
+import typing as T
+import os
+import json
+import time
+import random
+import dataclasses
+from pathlib import Path
+
+from .file_lock import file_lock
+
+try:
+    dir_default_rate_limiter = Path.home() / ".cache" / "which_bsm" / "rate_limiter"
+except Exception:  # pragma: no cover
+    dir_default_rate_limiter = None
+
+#: the error codes of the AWS throttling errors
+THROTTLING_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+    "RequestThrottled",
+    "RequestThrottledException",
+}
+
+
+def is_throttling_error(e: Exception) -> bool:
+    """
+    Check whether the exception is a botocore ``ClientError`` caused by
+    throttling.
+    """
+    response = getattr(e, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+@dataclasses.dataclass
+class RateLimiter:
+    """
+    File-locked token bucket shared by all processes using the same
+    ``dir_state`` and ``name``.
+
+    :param rate: the number of requests per second refilled in the bucket
+    :param burst: the bucket size, the number of requests allowed at once
+    :param dir_state: the directory to store the bucket state
+    :param name: the bucket name, one state file per name
+    :param max_attempts: the max number of attempts of :meth:`call` when
+        the request is throttled
+    :param base_delay: the backoff delay in seconds of the first retry,
+        doubled on each retry
+    :param max_delay: the max backoff delay in seconds
+    """
+
+    rate: float = dataclasses.field(default=5.0)
+    burst: int = dataclasses.field(default=10)
+    dir_state: Path = dataclasses.field(
+        default_factory=lambda: dir_default_rate_limiter
+    )
+    name: str = dataclasses.field(default="sts")
+    max_attempts: int = dataclasses.field(default=5)
+    base_delay: float = dataclasses.field(default=0.5)
+    max_delay: float = dataclasses.field(default=20.0)
+
+    def __post_init__(self):
+        if self.dir_state is None:  # pragma: no cover
+            raise EnvironmentError("your system may not support $HOME directory")
+        if self.rate <= 0:
+            raise ValueError(f"rate must be positive, got {self.rate}")
+        if self.burst < 1:
+            raise ValueError(f"burst must be at least 1, got {self.burst}")
+        self.dir_state = Path(self.dir_state)
+
+    def get_path(self) -> Path:
+        return self.dir_state / f"{self.name}.json"
+
+    def get_lock_path(self) -> Path:
+        return self.dir_state / f"{self.name}.lock"
+
+    def _read(self, now: float) -> float:
+        """
+        Read the number of tokens refilled up to ``now``.
+        """
+        try:
+            state = json.loads(self.get_path().read_text())
+            tokens = float(state["tokens"])
+            timestamp = float(state["timestamp"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            return float(self.burst)
+        # the clock may go backwards
+        elapsed = max(0.0, now - timestamp)
+        return min(float(self.burst), tokens + elapsed * self.rate)
+
+    def _write(self, tokens: float, now: float):
+        path = self.get_path()
+        path_tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        path_tmp.write_text(json.dumps({"tokens": tokens, "timestamp": now}))
+        os.replace(path_tmp, path)
+
+    def try_acquire(self) -> float:
+        """
+        Take a token from the bucket if available.
+
+        :returns: 0 if a token is taken, otherwise the number of seconds to
+            wait for the next token
+        """
+        with file_lock(self.get_lock_path()):
+            now = time.time()
+            tokens = self._read(now)
+            if tokens >= 1:
+                self._write(tokens - 1, now)
+                return 0.0
+            self._write(tokens, now)
+            return (1 - tokens) / self.rate
+
+    def acquire(self, sleep: T.Callable[[float], None] = time.sleep) -> float:
+        """
+        Wait until a token is taken from the bucket.
+
+        :returns: the total number of seconds waited
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return waited
+            sleep(wait)
+            waited += wait
+
+    def drain(self):
+        """
+        Empty the bucket, all processes wait for the refill before the next
+        request. Called when a request is throttled.
+        """
+        with file_lock(self.get_lock_path()):
+            self._write(0.0, time.time())
+
+    def get_backoff_delay(self, attempt: int) -> float:
+        """
+        Get the "full jitter" backoff delay before the ``attempt``-th retry.
+        """
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        )
+
+    def call(
+        self,
+        func: T.Callable[[], T.Any],
+        sleep: T.Callable[[float], None] = time.sleep,
+        on_throttled: T.Optional[T.Callable[[Exception], None]] = None,
+    ) -> T.Any:
+        """
+        Call ``func`` after taking a token, retry it with jittered exponential
+        backoff when it raises a throttling error.
+
+        :param on_throttled: called with the throttling error before each retry
+        """
+        attempt = 1
+        while True:
+            self.acquire(sleep=sleep)
+            try:
+                return func()
+            except Exception as e:
+                if not is_throttling_error(e) or attempt >= self.max_attempts:
+                    raise
+                self.drain()
+                if on_throttled is not None:
+                    on_throttled(e)
+                sleep(self.get_backoff_delay(attempt))
+                attempt += 1
+
+    def clear(self):
+        """
+        Remove the bucket state, the bucket is full again.
+        """
+        with file_lock(self.get_lock_path()):
+            try:
+                self.get_path().unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+
+"""
+Background auto-refresh of assumed role credentials for long-running jobs.
+
+botocore's ``RefreshableCredentials`` only refreshes lazily, on the first API
+call inside the refresh window, which blocks that call on an ``sts:AssumeRole``
+round trip. :class:`CredentialRefresher` renews the credentials in a daemon
+thread ahead of that window, so the hot path never waits for STS. The running
+refreshers are restarted in the child process after a fork, with a random
+earlier first refresh, so the prefork workers don't all call STS at the same
+instant as the parent.
+
+.. note::
+
+    This module uses ``RefreshableCredentials._refresh_lock`` and
+    ``RefreshableCredentials._protected_refresh``, which are not public API
+    officially supported by botocore, the same way as
+    ``BotoSesManager.assume_role(..., auto_refresh=True)`` does.
+"""
+
+import typing as T
+import os
+import random
+import weakref
+import logging
+import threading
+
+import botocore.session
+from botocore.credentials import RefreshableCredentials
+
+logger = logging.getLogger(__name__)
+
+_started_refreshers: "weakref.WeakSet[CredentialRefresher]" = weakref.WeakSet()
+_refreshers_at_fork: list["CredentialRefresher"] = list()
+
+
+def credentials_to_metadata(credentials: dict[str, str]) -> dict[str, str]:
+    """
+    Convert credentials in the ``sts:AssumeRole`` response format to the
+    metadata format used by botocore ``RefreshableCredentials``.
+    """
+    return {
+        "access_key": credentials["AccessKeyId"],
+        "secret_key": credentials["SecretAccessKey"],
+        "token": credentials["SessionToken"],
+        "expiry_time": credentials["Expiration"],
+    }
+
+
+class CredentialRefresher:
+    """
+    Renew a ``RefreshableCredentials`` in a daemon thread ahead of expiry.
+
+    The thread only holds a weak reference to the credentials, it stops
+    automatically once the credentials are garbage collected.
+
+    :param credentials: the credentials to refresh
+    :param refresh_margin: refresh when the credentials expire within this
+        many seconds. It should be greater than botocore's advisory refresh
+        timeout (15 minutes) to keep the refresh off the hot path.
+    :param retry_interval: seconds to wait before retrying a failed refresh
+    :param fork_jitter: after a fork, the first refresh of the child happens
+        up to this many seconds earlier than due, picked at random.
+        Default to half of ``refresh_margin``.
+    """
+
+    def __init__(
+        self,
+        credentials: RefreshableCredentials,
+        refresh_margin: int = 1200,
+        retry_interval: int = 30,
+        fork_jitter: T.Optional[float] = None,
+    ):
+        self._credentials_ref = weakref.ref(credentials)
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        if fork_jitter is None:
+            fork_jitter = refresh_margin / 2
+        self.fork_jitter = fork_jitter
+        self._first_wait_jitter = 0.0
+        self._stop_event = threading.Event()
+        self._thread: T.Optional[threading.Thread] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "CredentialRefresher":
+        if not self.is_alive:
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="which_bsm-credential-refresher",
+                daemon=True,
+            )
+            self._thread.start()
+            _started_refreshers.add(self)
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def get_seconds_until_refresh(self) -> T.Optional[float]:
+        """
+        Return the number of seconds until the next refresh is due,
+        or None if the credentials are garbage collected.
+
+        If the credential lifetime is shorter than twice the ``refresh_margin``,
+        the refresh happens at half of the remaining lifetime instead.
+        """
+        credentials = self._credentials_ref()
+        if credentials is None:
+            return None
+        remaining = credentials._seconds_remaining()
+        return max(0.0, remaining - self.refresh_margin, remaining / 2)
+
+    def refresh(self) -> bool:
+        """
+        Refresh the credentials now.
+
+        :returns: True if the credentials are renewed.
+        """
+        credentials = self._credentials_ref()
+        if credentials is None:
+            return False
+        with credentials._refresh_lock:
+            expiry_time = credentials._expiry_time
+            # non mandatory refresh logs and swallows the error,
+            # the current credentials are kept
+            credentials._protected_refresh(is_mandatory=False)
+            return credentials._expiry_time != expiry_time
+
+    def _run(self):
+        jitter, self._first_wait_jitter = self._first_wait_jitter, 0.0
+        while True:
+            wait = self.get_seconds_until_refresh()
+            if wait is None:
+                return
+            if jitter:
+                wait = max(0.0, wait - random.uniform(0, jitter))
+                jitter = 0.0
+            if self._stop_event.wait(wait):
+                return
+            try:
+                ok = self.refresh()
+            except Exception:  # pragma: no cover
+                logger.warning("Background credential refresh failed.", exc_info=True)
+                ok = False
+            if not ok:
+                if self._stop_event.wait(self.retry_interval):
+                    return
+
+
+def _before_fork():
+    # keep the running refreshers alive, their threads don't exist in the child
+    _refreshers_at_fork[:] = [r for r in _started_refreshers if r.is_alive]
+
+
+def _after_fork_in_parent():
+    _refreshers_at_fork.clear()
+
+
+def _after_fork_in_child():
+    refreshers = list(_refreshers_at_fork)
+    _refreshers_at_fork.clear()
+    for refresher in refreshers:
+        credentials = refresher._credentials_ref()
+        if credentials is None:  # pragma: no cover
+            continue
+        credentials._refresh_lock = threading.Lock()
+        refresher._stop_event = threading.Event()
+        refresher._thread = None
+        # don't renew at the same instant as the parent and the other children
+        refresher._first_wait_jitter = refresher.fork_jitter
+        refresher.start()
+
+
+if hasattr(os, "register_at_fork"):  # pragma: no branch
+    os.register_at_fork(
+        before=_before_fork,
+        after_in_parent=_after_fork_in_parent,
+        after_in_child=_after_fork_in_child,
+    )
+
+
+def create_refreshable_botocore_session(
+    fetch_metadata: T.Callable[[], dict[str, str]],
+    refresh_margin: int = 1200,
+    method: str = "assume-role",
+) -> T.Tuple["botocore.session.Session", CredentialRefresher]:
+    """
+    Create a botocore session using credentials that are renewed in the
+    background by a :class:`CredentialRefresher`.
+
+    :param fetch_metadata: a callable that fetches new credentials and returns
+        them in the botocore metadata format, see :func:`credentials_to_metadata`
+    :param refresh_margin: see :class:`CredentialRefresher`
+    :param method: the credential provider method name used by botocore
+    """
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata=fetch_metadata(),
+        refresh_using=fetch_metadata,
+        method=method,
+    )
+    botocore_session = botocore.session.get_session()
+    botocore_session._credentials = credentials
+    refresher = CredentialRefresher(
+        credentials=credentials,
+        refresh_margin=refresh_margin,
+    ).start()
+    return botocore_session, refresher
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Thread-safe session registry with single-flight construction.
+
+``functools.cached_property`` has no locking since Python 3.12, so when many
+threads access an uncached property at the same time, each of them runs the
+getter. For boto session managers in CI, that means one ``sts:AssumeRole``
+call per thread. :class:`SessionRegistry` holds one lock per key, so concurrent
+first accesses to the same key collapse into one construction, while
+different keys are still constructed in parallel.
+"""
+
+import typing as T
+import threading
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from boto_session_manager import BotoSesManager
+
+
+def is_not_expired(bsm: "BotoSesManager") -> bool:
+    return not bsm.is_expired()
+
+
+class SessionRegistry:
+    """
+    A mapping from key to boto session manager with per-key locks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks: dict[T.Hashable, threading.Lock] = dict()
+        self._sessions: dict[T.Hashable, "BotoSesManager"] = dict()
+
+    def _get_key_lock(self, key: T.Hashable) -> threading.Lock:
+        try:
+            return self._key_locks[key]
+        except KeyError:
+            with self._lock:
+                return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(
+        self,
+        key: T.Hashable,
+        is_valid: T.Callable[["BotoSesManager"], bool] = is_not_expired,
+    ) -> T.Optional["BotoSesManager"]:
+        """
+        Get the valid cached boto session manager, return None if not found.
+        """
+        bsm = self._sessions.get(key)
+        if bsm is not None and is_valid(bsm):
+            return bsm
+        return None
+
+    def get_or_create(
+        self,
+        key: T.Hashable,
+        factory: T.Callable[[], "BotoSesManager"],
+        is_valid: T.Callable[["BotoSesManager"], bool] = is_not_expired,
+    ) -> "BotoSesManager":
+        """
+        Get the valid cached boto session manager, or create it with ``factory``.
+
+        Only one thread runs the ``factory`` for a given key at a time, the
+        other threads wait and then reuse the result.
+        """
+        bsm = self.get(key, is_valid)
+        if bsm is not None:
+            return bsm
+        with self._get_key_lock(key):
+            bsm = self.get(key, is_valid)
+            if bsm is not None:
+                return bsm
+            bsm = factory()
+            self._sessions[key] = bsm
+            return bsm
+
+    def put(self, key: T.Hashable, bsm: "BotoSesManager"):
+        with self._get_key_lock(key):
+            self._sessions[key] = bsm
+
+    def pop(self, key: T.Hashable) -> T.Optional["BotoSesManager"]:
+        with self._get_key_lock(key):
+            return self._sessions.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def _after_fork_in_child(self):
+        # the locks may be held by threads that don't exist in the child
+        self._lock = threading.Lock()
+        self._key_locks = dict()
+
+    def items(self) -> list[tuple[T.Hashable, "BotoSesManager"]]:
+        return list(self._sessions.items())
+
+    def __contains__(self, key: T.Hashable) -> bool:
+        return key in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
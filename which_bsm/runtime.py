@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""
+Detect the runtime once per job.
+
+``which_runtime`` inspects the environment variables (and for some runtimes,
+the file system) on every process start. :func:`load_runtime` detects the
+runtime flags used by ``BaseBotoSesEnum`` once, then publishes them:
+
+- in the ``WHICH_BSM_RUNTIME`` environment variable, inherited by the child
+  processes.
+- in a small cache file keyed by the CI job ID, read by the following CLI
+  invocations in the same CI job.
+"""
+
+import typing as T
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from .file_lock import file_lock
+
+try:
+    dir_default_runtime_cache = Path.home() / ".cache" / "which_bsm" / "runtime"
+except Exception:  # pragma: no cover
+    dir_default_runtime_cache = None
+
+#: the environment variable to publish the detected runtime flags
+RUNTIME_ENV_VAR = "WHICH_BSM_RUNTIME"
+
+#: mapping from ``BaseBotoSesEnum`` field name to ``which_runtime`` attribute
+RUNTIME_FLAGS = {
+    "is_local_runtime_group": "is_local_runtime_group",
+    "is_ci_runtime_group": "is_ci_runtime_group",
+    "is_local": "is_local",
+    "is_cloud9": "is_aws_cloud9",
+    "is_ec2": "is_aws_ec2",
+    "is_lambda": "is_aws_lambda",
+    "is_batch": "is_aws_batch",
+    "is_ecs": "is_aws_ecs",
+    "is_glue": "is_aws_glue",
+}
+
+#: the environment variables that identify a CI job, per CI system
+CI_JOB_ID_ENV_VARS = [
+    ("GITHUB_RUN_ID", "GITHUB_RUN_ATTEMPT", "GITHUB_JOB"),
+    ("CODEBUILD_BUILD_ID",),
+    ("CI_JOB_ID",),
+    ("BITBUCKET_BUILD_NUMBER", "BITBUCKET_STEP_UUID"),
+    ("CIRCLE_WORKFLOW_JOB_ID",),
+    ("BUILD_TAG",),
+]
+
+
+def get_ci_job_id(environ: T.Mapping[str, str]) -> T.Optional[str]:
+    """
+    Get the current CI job ID, return None if not in a known CI system.
+    """
+    for keys in CI_JOB_ID_ENV_VARS:
+        if all(environ.get(key) for key in keys):
+            return "|".join(environ[key] for key in keys)
+    return None
+
+
+def detect_runtime() -> dict[str, bool]:
+    """
+    Detect the runtime flags with ``which_runtime``.
+    """
+    from which_runtime.api import runtime
+
+    return {name: bool(getattr(runtime, attr)) for name, attr in RUNTIME_FLAGS.items()}
+
+
+def _parse_flags(text: str) -> T.Optional[dict[str, bool]]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or set(data) != set(RUNTIME_FLAGS):
+        return None
+    if not all(isinstance(value, bool) for value in data.values()):
+        return None
+    return data
+
+
+def get_runtime_cache_path(job_id: str, dir_cache: Path) -> Path:
+    digest = hashlib.sha256(job_id.encode("utf-8")).hexdigest()
+    return dir_cache / f"{digest}.json"
+
+
+def load_runtime(
+    environ: T.Optional[T.MutableMapping[str, str]] = None,
+    dir_cache: T.Optional[T.Union[str, Path]] = dir_default_runtime_cache,
+) -> dict[str, bool]:
+    """
+    Get the runtime flags from the ``WHICH_BSM_RUNTIME`` environment variable,
+    or the cache file of the current CI job, or detect and publish them.
+
+    :param environ: the environment variables to read and publish to,
+        default to ``os.environ``
+    :param dir_cache: the runtime cache directory, None to disable the cache file
+    """
+    if environ is None:
+        environ = os.environ
+    text = environ.get(RUNTIME_ENV_VAR)
+    if text:
+        flags = _parse_flags(text)
+        if flags is not None:
+            return flags
+
+    job_id = get_ci_job_id(environ)
+    path_cache = None
+    flags = None
+    if job_id is not None and dir_cache is not None:
+        path_cache = get_runtime_cache_path(job_id, Path(dir_cache))
+        try:
+            flags = _parse_flags(path_cache.read_text())
+        except FileNotFoundError:
+            pass
+
+    if flags is None:
+        flags = detect_runtime()
+        if path_cache is not None:
+            path_cache.parent.mkdir(parents=True, exist_ok=True)
+            with file_lock(path_cache.with_suffix(".lock")):
+                path_tmp = path_cache.with_name(f"{path_cache.name}.{os.getpid()}.tmp")
+                path_tmp.write_text(json.dumps(flags))
+                os.replace(path_tmp, path_cache)
+
+    environ[RUNTIME_ENV_VAR] = json.dumps(flags, separators=(",", ":"))
+    return flags
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact, picklable snapshot of resolved credentials and configuration.
+
+A child process of a ``ProcessPoolExecutor`` or a subprocess would otherwise
+repeat the runtime detection and the whole devops -> workload role chain.
+:meth:`BaseBotoSesEnum.to_snapshot` captures the configuration and the
+credentials of the resolved sessions, and
+:meth:`BaseBotoSesEnum.from_snapshot` rehydrates them without any API call.
+Expired credentials are dropped on rehydration, and fetched again as usual.
+
+A :class:`Snapshot` is a plain dataclass, it can be pickled, or passed to a
+subprocess through environment variables with :meth:`Snapshot.to_environ`.
+"""
+
+import typing as T
+import os
+import json
+import dataclasses
+from datetime import datetime, timezone, timedelta
+
+if T.TYPE_CHECKING:  # pragma: no cover
+    from boto_session_manager import BotoSesManager
+
+#: the environment variable to pass a JSON encoded snapshot to a subprocess
+SNAPSHOT_ENV_VAR = "WHICH_BSM_SNAPSHOT"
+
+
+@dataclasses.dataclass(frozen=True)
+class CredentialSnapshot:
+    """
+    The static credentials and region of a resolved boto session manager.
+
+    :param expiration: the ISO 8601 expiration time of the credentials
+    """
+
+    access_key_id: str
+    secret_access_key: str
+    session_token: T.Optional[str]
+    expiration: str
+    region_name: str
+
+    @classmethod
+    def from_bsm(cls, bsm: "BotoSesManager") -> "CredentialSnapshot":
+        credentials = bsm.boto_ses.get_credentials()
+        frozen = credentials.get_frozen_credentials()
+        # refreshable credentials know their real expiry time
+        expiration = getattr(credentials, "_expiry_time", None)
+        if expiration is None:
+            expiration = bsm.expiration_time
+        return cls(
+            access_key_id=frozen.access_key,
+            secret_access_key=frozen.secret_key,
+            session_token=frozen.token,
+            expiration=expiration.isoformat(),
+            region_name=bsm.aws_region,
+        )
+
+    def get_expiration(self) -> datetime:
+        expiration = datetime.fromisoformat(self.expiration)
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return expiration
+
+    def is_fresh(self, expiry_margin: int = 300) -> bool:
+        """
+        Check whether the credentials are still valid for at least
+        ``expiry_margin`` seconds.
+        """
+        now = datetime.now(timezone.utc)
+        return self.get_expiration() > now + timedelta(seconds=expiry_margin)
+
+    def to_environ(self) -> dict[str, str]:
+        """
+        The ``AWS_*`` environment variables understood by the AWS SDKs and CLI.
+        """
+        environ = {
+            "AWS_ACCESS_KEY_ID": self.access_key_id,
+            "AWS_SECRET_ACCESS_KEY": self.secret_access_key,
+            "AWS_REGION": self.region_name,
+            "AWS_DEFAULT_REGION": self.region_name,
+            "AWS_CREDENTIAL_EXPIRATION": self.expiration,
+        }
+        if self.session_token:
+            environ["AWS_SESSION_TOKEN"] = self.session_token
+        return environ
+
+    def to_bsm(self) -> "BotoSesManager":
+        from boto_session_manager import BotoSesManager
+
+        return BotoSesManager(
+            aws_access_key_id=self.access_key_id,
+            aws_secret_access_key=self.secret_access_key,
+            aws_session_token=self.session_token,
+            region_name=self.region_name,
+            expiration_time=self.get_expiration(),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """
+    The configuration of a ``BaseBotoSesEnum`` and the credentials of its
+    resolved sessions.
+
+    :param config: the config dict accepted by ``BaseBotoSesEnum.from_dict``
+    :param credentials: mapping from environment name to its credentials
+    """
+
+    config: dict[str, T.Any]
+    credentials: dict[str, CredentialSnapshot]
+
+    def to_dict(self) -> dict[str, T.Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, T.Any]) -> "Snapshot":
+        return cls(
+            config=data["config"],
+            credentials={
+                env_name: CredentialSnapshot(**value)
+                for env_name, value in data["credentials"].items()
+            },
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "Snapshot":
+        return cls.from_dict(json.loads(text))
+
+    def to_environ(self, env_name: T.Optional[str] = None) -> dict[str, str]:
+        """
+        The environment variables to pass this snapshot to a subprocess, use
+        :meth:`from_environ` in the subprocess to read it.
+
+        :param env_name: if given, also include the ``AWS_*`` environment
+            variables of this environment, so the AWS CLI and any AWS SDK in
+            the subprocess use its credentials
+
+        :raises ValueError: if the credentials of ``env_name`` are not in the
+            snapshot or already expired
+        """
+        environ = {SNAPSHOT_ENV_VAR: self.to_json()}
+        if env_name is not None:
+            try:
+                credentials = self.credentials[env_name]
+            except KeyError:
+                raise ValueError(
+                    f"Environment '{env_name}' has no credentials in the snapshot."
+                )
+            if not credentials.is_fresh(expiry_margin=0):
+                raise ValueError(
+                    f"The credentials of environment '{env_name}' are expired."
+                )
+            environ.update(credentials.to_environ())
+        return environ
+
+    @classmethod
+    def from_environ(
+        cls,
+        environ: T.Optional[T.Mapping[str, str]] = None,
+    ) -> T.Optional["Snapshot"]:
+        """
+        Read the snapshot set by :meth:`to_environ`, return None if not set.
+
+        :param environ: the environment variables, default to ``os.environ``
+        """
+        if environ is None:
+            environ = os.environ
+        text = environ.get(SNAPSHOT_ENV_VAR)
+        if not text:
+            return None
+        return cls.from_json(text)
@@ -64,7 +64,7 @@ class BotoSesEnum(BaseBotoSesEnum):
 
     @classmethod
     def new(cls):
-        return BotoSesEnum(
+        return cls.from_runtime(
             env_to_aws_profile_mapper={
                 EnvNameEnum.devops.value: "my_company_devops_us_east_1",
                 EnvNameEnum.dev.value: "my_company_dev_us_east_1",
@@ -81,15 +81,6 @@ class BotoSesEnum(BaseBotoSesEnum):
             devops_env_name=EnvNameEnum.devops.value,
             workload_role_name_prefix_in_ci="my_project_",
             workload_role_name_suffix_in_ci="_deployer",
-            is_local_runtime_group=runtime.is_local_runtime_group,
-            is_ci_runtime_group=runtime.is_ci_runtime_group,
-            is_local=runtime.is_local,
-            is_cloud9=runtime.is_aws_cloud9,
-            is_ec2=runtime.is_aws_ec2,
-            is_lambda=runtime.is_aws_lambda,
-            is_batch=runtime.is_aws_batch,
-            is_ecs=runtime.is_aws_ecs,
-            is_glue=runtime.is_aws_glue,
         )
 
 
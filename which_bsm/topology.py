@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compiled, immutable environment topology.
+
+:class:`EnvTopology` is built once from the ``BaseBotoSesEnum`` configuration
+and the ``${ENV_NAME}_AWS_ACCOUNT_ID`` environment variables. Everything is
+validated up front, then the AWS profile, region, account ID, workload role ARN
+and role session name of any environment are served by a dictionary lookup.
+"""
+
+import typing as T
+import types
+
+
+def validate_aws_account_id(env_name: str, value: str) -> str:
+    """
+    Validate the AWS account ID of an environment.
+
+    :raises ValueError: if the account ID is not a 12-digit number
+    """
+    if len(value) != 12:
+        raise ValueError(
+            f"Invalid AWS account ID '{value}' for environment '{env_name}'. "
+            "It should be a 12-digit number."
+        )
+    if not value.isdigit():
+        raise ValueError(
+            f"Invalid AWS account ID '{value}' for environment '{env_name}'. "
+            "It should contain only digits."
+        )
+    return value
+
+
+def get_aws_account_id_env_var_name(env_name: str) -> str:
+    return f"{env_name.upper()}_AWS_ACCOUNT_ID"
+
+
+class _Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: T.Any):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+
+class EnvSpec(_Frozen):
+    """
+    The resolved settings of one environment.
+
+    :param env_name: the environment name
+    :param aws_profile: the AWS CLI profile name, None if not configured
+    :param aws_region: the primary AWS region
+    :param aws_regions: all the AWS regions, the primary region comes first
+    :param aws_account_id: the AWS account ID, None if not available
+    :param role_arn: the workload role ARN to assume in CI, None for the
+        devops environment or when the account ID is not available
+    :param role_session_name: the role session name used in CI
+    """
+
+    __slots__ = (
+        "env_name",
+        "aws_profile",
+        "aws_region",
+        "aws_regions",
+        "aws_account_id",
+        "role_arn",
+        "role_session_name",
+    )
+
+    def __init__(
+        self,
+        env_name: str,
+        aws_profile: T.Optional[str],
+        aws_region: str,
+        aws_account_id: T.Optional[str],
+        role_arn: T.Optional[str],
+        role_session_name: T.Optional[str],
+        aws_regions: T.Optional[T.Sequence[str]] = None,
+    ):
+        if aws_regions is None:
+            aws_regions = (aws_region,)
+        object.__setattr__(self, "env_name", env_name)
+        object.__setattr__(self, "aws_profile", aws_profile)
+        object.__setattr__(self, "aws_region", aws_region)
+        object.__setattr__(self, "aws_regions", tuple(aws_regions))
+        object.__setattr__(self, "aws_account_id", aws_account_id)
+        object.__setattr__(self, "role_arn", role_arn)
+        object.__setattr__(self, "role_session_name", role_session_name)
+
+    def __repr__(self) -> str:
+        return (
+            f"EnvSpec(env_name={self.env_name!r}, aws_profile={self.aws_profile!r}, "
+            f"aws_region={self.aws_region!r}, aws_regions={self.aws_regions!r}, "
+            f"aws_account_id={self.aws_account_id!r}, "
+            f"role_arn={self.role_arn!r}, role_session_name={self.role_session_name!r})"
+        )
+
+    def __eq__(self, other: T.Any) -> bool:
+        if not isinstance(other, EnvSpec):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, k) for k in self.__slots__))
+
+
+class EnvTopology(_Frozen):
+    """
+    An immutable mapping from environment name to :class:`EnvSpec`.
+
+    Use ``BaseBotoSesEnum.compile_topology`` to create it.
+    """
+
+    __slots__ = ("devops_env_name", "env_names", "_specs")
+
+    def __init__(
+        self,
+        devops_env_name: str,
+        specs: T.Iterable[EnvSpec],
+    ):
+        specs = {spec.env_name: spec for spec in specs}
+        object.__setattr__(self, "devops_env_name", devops_env_name)
+        object.__setattr__(self, "env_names", tuple(specs))
+        object.__setattr__(self, "_specs", types.MappingProxyType(specs))
+
+    def get(self, env_name: str) -> EnvSpec:
+        try:
+            return self._specs[env_name]
+        except KeyError:
+            raise KeyError(f"Environment '{env_name}' is not configured.")
+
+    def get_aws_profile(self, env_name: str) -> str:
+        aws_profile = self.get(env_name).aws_profile
+        if aws_profile is None:
+            raise KeyError(
+                f"Environment '{env_name}' is not configured in env_to_aws_profile_mapper."
+            )
+        return aws_profile
+
+    def get_aws_region(self, env_name: str) -> str:
+        return self.get(env_name).aws_region
+
+    def get_aws_regions(self, env_name: str) -> tuple[str, ...]:
+        return self.get(env_name).aws_regions
+
+    def get_aws_account_id(self, env_name: str) -> str:
+        aws_account_id = self.get(env_name).aws_account_id
+        if aws_account_id is None:
+            raise KeyError(
+                f"Environment variable '{get_aws_account_id_env_var_name(env_name)}' "
+                "is not set. Make sure to set it in your CI environment "
+                "to store the AWS account ID."
+            )
+        return aws_account_id
+
+    def get_role_arn(self, env_name: str) -> str:
+        if env_name == self.devops_env_name:
+            raise ValueError(
+                f"You cannot use the devops environment '{self.devops_env_name}' "
+                f"to get workload role ARN in CI."
+            )
+        self.get_aws_account_id(env_name)
+        return self.get(env_name).role_arn
+
+    def get_role_session_name(self, env_name: str) -> str:
+        return self.get(env_name).role_session_name
+
+    def __contains__(self, env_name: str) -> bool:
+        return env_name in self._specs
+
+    def __iter__(self) -> T.Iterator[EnvSpec]:
+        return iter(self._specs.values())
+
+    def __len__(self) -> int:
+        return len(self._specs)